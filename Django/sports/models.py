@@ -469,8 +469,23 @@ class Arbitrage(models.Model):
     bet_amount_two = models.FloatField(db_column='bet_amount_two')
     profit_percentage = models.FloatField(db_column='profit_percentage')
     last_updated_timestamp = models.DateTimeField(db_column='last_updated_timestamp')
+    market_type = models.TextField(db_column='market_type', default='player_prop')
 
     class Meta:
         db_table = 'arbitrage'
         unique_together = (('game_ID', 'Prop_Type', 'Player_Name', 'Betting_Point', 'bookie_one', 'outcome_one', 'bookie_two', 'outcome_two'),)
+        managed = False
+
+class ArbitrageLeg(models.Model):
+    id = models.AutoField(primary_key=True, db_column='id')
+    arbitrage = models.ForeignKey(Arbitrage, on_delete=models.DO_NOTHING, related_name='legs', db_column='arbitrage_id')
+    leg_number = models.IntegerField(db_column='leg_number')
+    bookie = models.TextField(db_column='bookie')
+    outcome = models.TextField(db_column='outcome')
+    odds = models.IntegerField(db_column='odds')
+    bet_amount = models.FloatField(db_column='bet_amount')
+
+    class Meta:
+        db_table = 'arbitrage_legs'
+        unique_together = (('arbitrage', 'leg_number'),)
         managed = False
\ No newline at end of file
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Moneyline, Overunder, Props, Scores, Spreads, UpcomingGames, latest_Moneyline, latest_Overunder, latest_Props, latest_Spreads, DistinctProps, UserBet, ExpectedValueMoneyline, ExpectedValueProps, Arbitrage
+from .models import Moneyline, Overunder, Props, Scores, Spreads, UpcomingGames, latest_Moneyline, latest_Overunder, latest_Props, latest_Spreads, DistinctProps, UserBet, ExpectedValueMoneyline, ExpectedValueProps, Arbitrage, ArbitrageLeg
 
 
 class MoneylineSerializer(serializers.ModelSerializer):
@@ -101,7 +101,15 @@ class ExpectedValuePropsSerializer(serializers.ModelSerializer):
         model = ExpectedValueProps
         fields = '__all__'
 
+class ArbitrageLegSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArbitrageLeg
+        fields = ['leg_number', 'bookie', 'outcome', 'odds', 'bet_amount']
+
 class ArbitrageSerializer(serializers.ModelSerializer):
+    # Every leg of a multi-way arbitrage; two-way rows have none
+    legs = ArbitrageLegSerializer(many=True, read_only=True)
+
     class Meta:
         model = Arbitrage
         fields = '__all__'
\ No newline at end of file
@@ -3,6 +3,7 @@ from celery import shared_task
 from django.core.mail import send_mail
 from .models import UserBet
 from sports.models import latest_Moneyline
+from src.utils.odds_math import DECIMAL_ODDS, IMPLIED_PROBABILITY
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -45,17 +46,12 @@ def check_arbitrage_opportunities():
 
             logger.debug(f"User's line: {bet.line}, Bookie's line: {user_line} for {opposite_team}.")
 
-            # Calculate implied probability for user's bet
-            if bet.line < 0:
-                user_implied_prob = abs(bet.line) / (abs(bet.line) + 100)
-            else:
-                user_implied_prob = 100 / (bet.line + 100)
-
-            # Calculate implied probability for bookie's odds
-            if user_line < 0:
-                bookie_implied_prob = abs(user_line) / (abs(user_line) + 100)
-            else:
-                bookie_implied_prob = 100 / (user_line + 100)
+            # Calculate implied probabilities for user's bet and bookie's odds
+            user_implied_prob = IMPLIED_PROBABILITY[bet.line]
+            bookie_implied_prob = IMPLIED_PROBABILITY[user_line]
+            if user_implied_prob is None or bookie_implied_prob is None:
+                logger.debug(f"Invalid odds of 0 for bet on game {bet.game_id}. Skipping.")
+                continue
 
             logger.debug(f"Implied Probability for User's Bet: {user_implied_prob:.2%}")
             logger.debug(f"Implied Probability for Bookie's Odds: {bookie_implied_prob:.2%}")
@@ -74,17 +70,9 @@ def check_arbitrage_opportunities():
             # Check if arbitrage return meets the threshold
             if arb_return >= (bet.alert_threshold / 100):
 
-                # User's bet odds
-                if bet.line < 0:
-                    user_odds = (100 / abs(bet.line)) + 1
-                else:
-                    user_odds = (bet.line / 100) + 1
-
-                # Bookie's odds
-                if user_line < 0:
-                    bookie_odds = (100 / abs(user_line)) + 1
-                else:
-                    bookie_odds = (user_line / 100) + 1
+                # Decimal odds of the user's bet and the bookie's line
+                user_odds = DECIMAL_ODDS[bet.line]
+                bookie_odds = DECIMAL_ODDS[user_line]
 
                 opposite_bet_amount = float(bet.bet_amount) * user_odds / bookie_odds
 
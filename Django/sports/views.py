@@ -53,7 +53,7 @@ from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import send_mail
 from rest_framework import generics, permissions
-import boto3
+from src.utils.aws import get_client
 import time
 import datetime
 
@@ -199,7 +199,7 @@ class PropsListView(APIView):
             where_sql = " AND ".join(wheres) if wheres else "1=1"
 
             # Execute Athena query
-            athena = boto3.client('athena', region_name=settings.AWS_DEFAULT_REGION)
+            athena = get_client('athena', region_name=settings.AWS_DEFAULT_REGION)
             query = f"""
                 SELECT * FROM props
                 WHERE {where_sql}
@@ -561,7 +561,7 @@ class latest_PropsListView(APIView):
                 """
 
             # Execute Athena query
-            athena = boto3.client('athena', region_name=settings.AWS_DEFAULT_REGION)
+            athena = get_client('athena', region_name=settings.AWS_DEFAULT_REGION)
             resp = athena.start_query_execution(
                 QueryString=query,
                 QueryExecutionContext={'Database': 'default'},
@@ -1251,5 +1251,5 @@ class ExpectedValuePropsListView(generics.ListAPIView):
 
 
 class ArbitrageListView(generics.ListAPIView):
-    queryset = Arbitrage.objects.all()
+    queryset = Arbitrage.objects.prefetch_related('legs')
     serializer_class = ArbitrageSerializer
\ No newline at end of file
@@ -1,11 +1,18 @@
 import os
 import csv
 from src.data.odds_api import Odds_API
+from src.data.snapshot import IngestionSnapshot
+from src.data.scheduler import PollingScheduler
+from src.data.delta import OddsDeltaCache
+from src.data.rows import PropBet, parse_point
+from src.data.incremental import IncrementalPropAnalyzer
 from src.utils.db import DB
 from src.data.expected_value import ExpectedValueAnalyzer
 from src.data.arbitrage import ArbitrageAnalyzer
+from src.data.middles import MiddleDetector
+from src.data.parallel import ParallelPropAnalyzer
 import logging
-import boto3
+from src.utils.aws import get_client
 from datetime import datetime
 import io
 import time
@@ -20,20 +27,47 @@ if os.environ.get("AWS_EXECUTION_ENV") is None:
 ATHENA_DATABASE = os.environ["ATHENA_DATABASE"]
 ATHENA_OUTPUT_LOCATION = os.environ["ATHENA_OUTPUT_LOCATION"]
 
-# Initialize S3 client
-s3_client = boto3.client('s3')
-athena_client = boto3.client('athena')
+# Clients are shared across warm invocations of the container
+s3_client = get_client('s3')
+athena_client = get_client('athena')
+
+PROPS_CSV_COLUMNS = [
+    "game_ID", "last_updated_timestamp", "bookie", "prop_type",
+    "bet_type", "player_name", "betting_line", "betting_point", "sport_type"
+]
+
+
+class PropsCSVBuffer:
+    """In-memory props CSV that rows are appended to as they stream in, so the tuples can be dropped."""
+
+    def __init__(self):
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.writer.writerow(PROPS_CSV_COLUMNS)
+        self.rows = 0
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.rows += len(rows)
+
+    def __len__(self):
+        return self.rows
+
+    def to_bytes(self):
+        return io.BytesIO(self.buffer.getvalue().encode('utf-8'))
 
 
 def lambda_handler(event=None, context=None):
     logger.info("Executing main...")
 
     db = None  # Ensure db is defined before try block
+    odds_api = None
 
     try:
         db = DB()        
         odds_api = Odds_API()
-        odds_api.fetch_active_sports()
+        # Near-game events are refreshed every run, far-out ones replay their last fetch until they are due
+        scheduler = PollingScheduler() if os.environ.get("ADAPTIVE_POLLING", "1") != "0" else None
 
         # Create tables and db
         db.create_db()
@@ -51,91 +85,170 @@ def lambda_handler(event=None, context=None):
         # db.create_latest_EV_moneyline()
         # db.create_latest_EV_props()
         # db.create_arbitrage()
-        def clean_tables(table_name):
-            try:
-                db.truncate_table(f'{table_name}')
-            except Exception as e:
-                logging.error(f'Error with truncating {table_name} table. Error: {e}')
-                pass
-
-        
-        def update_arbitrage_and_ev(db, odds_api):
-            # Fetch all prop bets for arbitrage and expected value
-            all_prop_bets, _ = odds_api.prop_bets_filters()
+        # db.create_arbitrage_legs()
+        # db.create_middles()
+        # db.partition_history_table('moneyline')  # Postgres only, once per history table: moneyline, spreads, overunder, props
+        # (CockroachDB gets row-level TTL on them from clean_old_data instead)
+
+        def update_arbitrage_and_ev(db, odds_api, snapshot):
+            # Stream prop bets event by event into both analyzers; read-only, so the events fetched
+            # here are still due for the main ingestion and reach the history tables there
+            _, all_event_details = odds_api.get_events(snapshot)
+            game_totals, game_spreads, game_lines = odds_api.bookies_and_odds(snapshot)
+            prop_analyzer = ParallelPropAnalyzer()
+            middles = MiddleDetector()
+            job_scheduler = PollingScheduler(read_only=True) if scheduler else None
+            for prop_rows in odds_api.iter_prop_bets(all_event_details, scheduler=job_scheduler):
+                prop_analyzer.add_lines(prop_rows)
+                middles.add_prop_lines(prop_rows)
+            arbitage_props, arbitage_multiway, ev_opportunities_prop = prop_analyzer.analyze()
             # Arbitrage
-            arbitage = ArbitrageAnalyzer(all_prop_bets)
-            arbitage_props = arbitage.analyze()
-            clean_tables('arbitrage')
-            db.insert_arbitrage(arbitage_props)
+            arbitage_props += arbitage_multiway
+            arbitage_props += ArbitrageAnalyzer().analyze_game_markets(game_lines, game_spreads, game_totals)
+            with db.refresh_table('arbitrage'):
+                db.insert_arbitrage(arbitage_props)
+            # Middles across alternate points
+            middles.add_game_totals(game_totals)
+            with db.refresh_table('middles'):
+                db.insert_middles(middles.analyze())
             # Expected Value Moneyline
-            _, _, game_lines = odds_api.bookies_and_odds()
             ev_opportunities_ml = ExpectedValueAnalyzer(game_lines).analyze_ml()
-            clean_tables('expected_value_moneyline')
-            db.insert_expected_value_moneyline(ev_opportunities_ml)
+            with db.refresh_table('expected_value_moneyline'):
+                db.insert_expected_value_moneyline(ev_opportunities_ml)
             # Expected Value Props
-            ev_opportunities_prop = ExpectedValueAnalyzer(all_prop_bets).analyze_prop()
-            clean_tables('expected_value_props')
-            db.insert_expected_value_props(ev_opportunities_prop)
+            with db.refresh_table('expected_value_props'):
+                db.insert_expected_value_props(ev_opportunities_prop)
 
         # Example usage: run this task if event requests it
         if (event or {}).get("job") == "arbitrage_and_ev":
-            update_arbitrage_and_ev(db, odds_api)
+            snapshot = IngestionSnapshot.build(odds_api, include_scores=False, include_props=False)
+            update_arbitrage_and_ev(db, odds_api, snapshot)
             return
 
-        # API Usage from Odds API
-        all_game_results = odds_api.filter_scores()
-        game_totals, game_spreads, game_lines = odds_api.bookies_and_odds()
-        all_prop_bets, unique_player_props = odds_api.prop_bets_filters()
-        all_event_ids, all_event_details = odds_api.get_events()
+        # API Usage from Odds API, every endpoint is requested once per run; props are streamed below
+        snapshot = IngestionSnapshot.build(odds_api, include_props=False)
+        all_game_results = odds_api.filter_scores(snapshot)
+        game_totals, game_spreads, game_lines = odds_api.bookies_and_odds(snapshot)
+        all_event_ids, all_event_details = odds_api.get_events(snapshot)
 
         
         db.insert_NFL_scores(all_game_results)
 
-        arbitage = ArbitrageAnalyzer(all_prop_bets)
-        arbitage_props = arbitage.analyze()
-
-        #process expected value
-        ev_opportunities_ml_results = ExpectedValueAnalyzer(game_lines)
-        ev_opportunities_ml = ev_opportunities_ml_results.analyze_ml()
-
-        ev_opportunities_prop_results = ExpectedValueAnalyzer(all_prop_bets)
-        ev_opportunities_prop = ev_opportunities_prop_results.analyze_prop() 
+        # Only rows whose price moved since the last run go to the history tables and props/ dumps
+        delta = OddsDeltaCache() if os.environ.get("DELTA_INGESTION", "1") != "0" else None
+        if delta and (delta.generation is None or delta.generation != db.get_delta_generation()):
+            # Cold start, or another container saved since: compare against what was last written instead
+            latest_rows = {
+                'props': load_latest_props_from_s3(os.environ['S3_BUCKET_NAME']),
+                'moneyline': db.read_latest_rows('moneyline'),
+                'spreads': db.read_latest_rows('spreads'),
+                'totals': db.read_latest_rows('overunder'),
+            }
+            delta.seed({kind: rows for kind, rows in latest_rows.items() if rows is not None})
+
+        # Result tables are updated in place from the prop groups whose prices moved since the last run
+        incremental = IncrementalPropAnalyzer() if delta and os.environ.get("INCREMENTAL_ANALYSIS", "1") != "0" else None
+
+        # Each event's props are flattened and fed to the analyzers and CSV dumps, then released
+        prop_analyzer = ParallelPropAnalyzer() if not incremental else None
+        middles = MiddleDetector()
+        latest_props_csv = PropsCSVBuffer()
+        changed_props_csv = PropsCSVBuffer() if delta else None
+        unique_player_props = {}
+        if delta:
+            delta.begin('props')
+        if incremental:
+            incremental.begin(delta.generation)
+        for prop_rows in odds_api.iter_prop_bets(all_event_details, unique_player_props, scheduler):
+            latest_props_csv.write(prop_rows)
+            # Middles span every alternate point of a player's prop, so they always see every row
+            middles.add_prop_lines(prop_rows)
+            changed_prop_rows = delta.check('props', prop_rows) if delta else None
+            if incremental:
+                incremental.feed(prop_rows, changed_prop_rows)
+            else:
+                prop_analyzer.add_lines(prop_rows)
+            if delta:
+                changed_props_csv.write(changed_prop_rows)
+        if delta:
+            removed_prop_keys = delta.finish('props')
+            if incremental:
+                incremental.remove(removed_prop_keys)
+        unique_player_props = list(unique_player_props.values())
+
+        middles.add_game_totals(game_totals)
+        middle_opportunities = middles.analyze()
+
+        if incremental:
+            result_changes = incremental.analyze(game_lines, game_spreads, game_totals)
+        else:
+            arbitage_props, arbitage_multiway, ev_opportunities_prop = prop_analyzer.analyze()
+            arbitage_props += arbitage_multiway
+            arbitage_props += ArbitrageAnalyzer().analyze_game_markets(game_lines, game_spreads, game_totals)
+
+            #process expected value
+            ev_opportunities_ml_results = ExpectedValueAnalyzer(game_lines)
+            ev_opportunities_ml = ev_opportunities_ml_results.analyze_ml()
  
-        # Upload the CSV file to S3
-        save_and_upload_props_to_s3(all_prop_bets, os.environ['S3_BUCKET_NAME'])
-    
-        ## remove existing and Insert data into latest_tables for best bets
-        VALID_TABLES = ['upcoming_games', 'latest_spreads', 'latest_moneyline', 'latest_overunder', 'expected_value_moneyline', 'expected_value_props', 'arbitrage']
+        changed_game_lines = delta.changed('moneyline', game_lines) if delta else None
+        changed_game_spreads = delta.changed('spreads', game_spreads) if delta else None
+        changed_game_totals = delta.changed('totals', game_totals) if delta else None
 
-        clean_tables('upcoming_games')
-        db.insert_NFL_upcoming_games(all_event_details)
+        # Upload the CSV file to S3
+        props_history_written = save_and_upload_props_to_s3(latest_props_csv, os.environ['S3_BUCKET_NAME'], changed_prop_bets=changed_props_csv)
 
-        clean_tables('arbitrage')
-        db.insert_arbitrage(arbitage_props)
-        # Insert data into Postgresql tables for expected value
-        clean_tables('expected_value_moneyline')
-        db.insert_expected_value_moneyline(ev_opportunities_ml)
-        clean_tables('expected_value_props')
-        db.insert_expected_value_props(ev_opportunities_prop)
+        ## remove existing and Insert data into latest_tables for best bets
+        with db.refresh_table('upcoming_games'):
+            db.insert_NFL_upcoming_games(all_event_details)
+
+        if incremental:
+            # Every table is attempted; the state is only kept if all of them were written
+            results_applied = all([
+                db.apply_result_changes(table, upserts, deleted_keys, replace=incremental.rebuild)
+                for table, (upserts, deleted_keys) in result_changes.items()
+            ])
+        else:
+            with db.refresh_table('arbitrage'):
+                db.insert_arbitrage(arbitage_props)
+            # Insert data into Postgresql tables for expected value
+            with db.refresh_table('expected_value_moneyline'):
+                db.insert_expected_value_moneyline(ev_opportunities_ml)
+            with db.refresh_table('expected_value_props'):
+                db.insert_expected_value_props(ev_opportunities_prop)
+        with db.refresh_table('middles'):
+            db.insert_middles(middle_opportunities)
 
         # # insert latest bookie data and aggregate props data simultaneously
-        clean_tables('latest_moneyline')
-        db.insert_moneyline_and_latest_moneyline(game_lines)
-        clean_tables('latest_spreads')
-        db.insert_spreads_and_latest_spreads(game_spreads)
-        clean_tables('latest_overunder')
-        db.insert_overunder_and_latest_overunder(game_totals)
+        failed_writes = db.failed_writes  # Off Postgres the history rows commit with the refresh, which can still fail
+        with db.refresh_table('latest_moneyline'):
+            moneyline_written = db.insert_moneyline_and_latest_moneyline(game_lines, history_rows=changed_game_lines)
+        with db.refresh_table('latest_spreads'):
+            spreads_written = db.insert_spreads_and_latest_spreads(game_spreads, history_rows=changed_game_spreads)
+        with db.refresh_table('latest_overunder'):
+            totals_written = db.insert_overunder_and_latest_overunder(game_totals, history_rows=changed_game_totals)
+        if delta:
+            # The changed rows are only forgotten once every history write committed; otherwise the
+            # next run compares against the old prices and writes them again
+            history_written = moneyline_written and spreads_written and totals_written and db.failed_writes == failed_writes
+            if props_history_written and history_written:
+                delta.save()
+                db.set_delta_generation(delta.generation)
+                if incremental and results_applied:
+                    incremental.save(delta.generation)
+            else:
+                logger.warning("History writes failed, keeping the previous delta cache so the changed rows are retried next run")
 
         #update unique players in distinct props
         db.update_distinct_props(unique_player_props)
 
-        # delete old games
-        db.delete_old_games()
-
+        # Expired history goes first (whole partitions where partitioned), leaving less for the scores cascade
         VALID_CLEANUP_TABLES = ['moneyline', 'spreads', 'overunder']
         for cleanup in VALID_CLEANUP_TABLES:
             db.clean_old_data(cleanup)
 
+        # delete old games
+        db.delete_old_games()
+
         # this triggers delete on cascade to only have most recent events
         try:
             db.delete_games_with_true_status()  # Delete any game_IDs with True status as the game is completed
@@ -151,14 +264,25 @@ def lambda_handler(event=None, context=None):
     finally:
         if db:
             db.close_connection()
+        if odds_api:
+            odds_api.quota.log_summary()
+            odds_api.close()
 
 def save_and_upload_props_to_s3(all_prop_bets, bucket_name, max_files=48,
-                                prefix="props/", latest_prefix="latest-props/"):
-    """Saves prop bets to S3 and repairs Athena tables when CSVs update."""
+                                prefix="props/", latest_prefix="latest-props/", changed_prop_bets=None):
+    """Saves prop bets to S3 and repairs Athena tables when CSVs update.
+
+    latest-props/ always gets the full set. props/ keeps the history, so when changed_prop_bets
+    is given only those rows are written there. Either argument may be a list of rows or a
+    PropsCSVBuffer the rows were streamed into.
+
+    Returns True once the props/ history is written (or there was nothing to write), False otherwise.
+    """
+    history_written = False
     try:
         if not all_prop_bets:
             logger.warning("The all_prop_bets list is empty. No CSV file will be created.")
-            return
+            return True
 
         # Create timestamped filename
         file_name = f"all_props_{datetime.utcnow():%Y%m%d%H%M%S}.csv"
@@ -166,24 +290,23 @@ def save_and_upload_props_to_s3(all_prop_bets, bucket_name, max_files=48,
         latest_key = f"{latest_prefix}{file_name}"
 
         # Write CSV to in-memory buffer
-        column_names = [
-            "game_ID", "last_updated_timestamp", "bookie", "prop_type",
-            "bet_type", "player_name", "betting_line", "betting_point", "sport_type"
-        ]
-        buffer = io.StringIO()
-        writer = csv.writer(buffer)
-        writer.writerow(column_names)
-        writer.writerows(all_prop_bets)
-        buffer.seek(0)
-        byte_buf = io.BytesIO(buffer.getvalue().encode('utf-8'))
+        def to_csv_bytes(rows):
+            if isinstance(rows, PropsCSVBuffer):
+                return rows.to_bytes()
+            buffer = PropsCSVBuffer()
+            buffer.write(rows)
+            return buffer.to_bytes()
 
         # Upload to props/ and latest-props/
-        s3_client.upload_fileobj(byte_buf, bucket_name, props_key, ExtraArgs={'ContentType': 'text/csv'})
-        logger.info(f"Uploaded {props_key} to s3://{bucket_name}/{props_key}")
-
-        buffer.seek(0)
-        byte_buf = io.BytesIO(buffer.getvalue().encode('utf-8'))
-        s3_client.upload_fileobj(byte_buf, bucket_name, latest_key, ExtraArgs={'ContentType': 'text/csv'})
+        history_rows = all_prop_bets if changed_prop_bets is None else changed_prop_bets
+        if history_rows:
+            s3_client.upload_fileobj(to_csv_bytes(history_rows), bucket_name, props_key, ExtraArgs={'ContentType': 'text/csv'})
+            logger.info(f"Uploaded {props_key} to s3://{bucket_name}/{props_key} with {len(history_rows)} rows")
+        else:
+            logger.info(f"No prop prices changed since the last run, skipping {props_key}")
+        history_written = True
+
+        s3_client.upload_fileobj(to_csv_bytes(all_prop_bets), bucket_name, latest_key, ExtraArgs={'ContentType': 'text/csv'})
         logger.info(f"Uploaded {latest_key} to s3://{bucket_name}/{latest_key}")
 
         # Cleanup latest-props folder
@@ -220,6 +343,34 @@ def save_and_upload_props_to_s3(all_prop_bets, bucket_name, max_files=48,
     except Exception as e:
         logger.error(f"Failed in save_and_upload_props_to_s3: {e}", exc_info=True)
 
+    return history_written
+
+def load_latest_props_from_s3(bucket_name, latest_prefix="latest-props/"):
+    """Reads back the newest latest-props/ CSV written by save_and_upload_props_to_s3.
+
+    Returns:
+        list of PropBet rows, or None if there is no file or it could not be read.
+    """
+    try:
+        latest_objs = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=latest_prefix).get('Contents', [])
+        if not latest_objs:
+            return None
+        latest_key = max(latest_objs, key=lambda o: o['LastModified'])['Key']
+        body = s3_client.get_object(Bucket=bucket_name, Key=latest_key)['Body'].read().decode('utf-8')
+        reader = csv.reader(io.StringIO(body))
+        next(reader, None)  # Header
+        # The CSV writes None as an empty field and every number as text
+        rows = [
+            PropBet(game_id, last_update, bookie, prop_type, bet_type, player_name or None,
+                    int(line) if line else None, parse_point(point), sport_type)
+            for game_id, last_update, bookie, prop_type, bet_type, player_name, line, point, sport_type in reader
+        ]
+        logger.info(f"Read {len(rows)} rows from s3://{bucket_name}/{latest_key}")
+        return rows
+    except Exception as e:
+        logger.error(f"Failed to read the latest props from s3://{bucket_name}/{latest_prefix}: {e}", exc_info=True)
+        return None
+
 if __name__ == "__main__":
     lambda_handler()    
     # lambda_handler({"job": "arbitrage_and_ev"})
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""
+bench_db_copy.py - Times the COPY loader against the batched VALUES writers on a local Postgres or CockroachDB
+
+Run from the repository root so logging.conf is found, pointing BENCH_DATABASE_URL (or
+DATABASE_URL) at a scratch database:
+
+    BENCH_DATABASE_URL=postgresql://postgres@localhost/postgres python -m benchmarks.bench_db_copy
+
+Loads 100k synthetic prop rows into props and latest_props with insert_props_and_latest_props,
+once through the execute_values CTE path and once through copy_latest_and_history, both with every
+row going to history and with only a tenth of them changed. The tables are created in a
+bench_copy schema that is dropped afterwards. Exits 1 if the two paths leave different row counts
+or the COPY path fell back to VALUES; exits 0 without timing anything if psycopg2 or the database
+is not available. On CockroachDB the COPY path goes through the shared props_staging table.
+"""
+import logging
+import os
+import sys
+import time
+
+from benchmarks.synthetic import SyntheticMarkets
+
+try:
+    from src.utils.db import DB
+except ImportError:  # psycopg2 is not installed
+    DB = None
+
+ROWS = 100_000
+SCHEMA = 'bench_copy'
+
+
+def connect():
+    """A DB on the benchmark database with the scratch schema and its tables, or None."""
+    url = os.getenv("BENCH_DATABASE_URL") or os.getenv("DATABASE_URL")
+    if DB is None or not url:
+        return None
+    os.environ["DATABASE_URL"] = url
+    db = DB()
+    if not hasattr(db, 'conn'):
+        return None
+    with db.conn.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+        cursor.execute(f"SET search_path TO {SCHEMA}")
+    db.conn.commit()
+    db.create_NFL_scores()
+    db.create_NFL_props()
+    db.create_latest_props()
+    return db
+
+
+def reset(db):
+    with db.conn.cursor() as cursor:
+        cursor.execute("TRUNCATE props, latest_props")
+    db.conn.commit()
+
+
+def counts(db):
+    with db.conn.cursor() as cursor:
+        cursor.execute("SELECT (SELECT count(*) FROM props), (SELECT count(*) FROM latest_props)")
+        return cursor.fetchone()
+
+
+def main():
+    db = connect()
+    if db is None:
+        print("psycopg2, BENCH_DATABASE_URL or a Postgres server is not available, skipping")
+        return 0
+    logging.disable(logging.CRITICAL)
+
+    props = SyntheticMarkets.for_rows(ROWS).prop_bets()
+    changed = props[::10]
+    db.insert_NFL_scores([(game_id, 'synthetic', '2025-03-14T23:00:00Z', 'False', None, None, None, None, None)
+                          for game_id in sorted({row[0] for row in props})])
+    print(f"{len(props)} prop rows, {len(changed)} changed")
+
+    failed = False
+    try:
+        for label, history_rows in (('all rows to history', None), ('changed rows to history', changed)):
+            results = {}
+            for path in ('values', 'copy'):
+                reset(db)
+                db.copy_loads = path == 'copy'
+                start = time.perf_counter()
+                db.insert_props_and_latest_props(props, history_rows=history_rows)
+                results[path] = (time.perf_counter() - start, counts(db))
+                if path == 'copy' and not db.copy_loads:
+                    print(f"{label:>24}: COPY load fell back to VALUES")
+                    failed = True
+            values_time, values_counts = results['values']
+            copy_time, copy_counts = results['copy']
+            print(f"{label:>24}: values {values_time:6.3f}s  copy {copy_time:6.3f}s  {values_time / copy_time:5.1f}x")
+            if values_counts != copy_counts:
+                print(f"{label:>24}: row counts differ (values {values_counts}, copy {copy_counts})")
+                failed = True
+    finally:
+        db.conn.rollback()
+        with db.conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        db.conn.commit()
+        db.close_connection()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+run_benchmarks.py - Times the analyzers, prop flattening, odds lookups and DB batch building on synthetic slates
+
+Run from the repository root so logging.conf is found:
+
+    python -m benchmarks.run_benchmarks                           # 10k, 100k and 1M rows
+    python -m benchmarks.run_benchmarks --sizes 10000 100000      # skip the 1M slate
+    python -m benchmarks.run_benchmarks --cases analyze_prop      # only cases whose name contains this
+    python -m benchmarks.run_benchmarks --update-baseline         # store these results as the baseline
+
+Every case runs on a SyntheticMarkets slate of each size and reports its best wall time,
+throughput in rows per second and the peak memory it allocated (measured on a separate
+tracemalloc run, so tracing does not skew the timings). Results are compared with
+benchmarks/baseline.json; the script exits 1 when a case's throughput drops or its peak memory
+grows by more than --tolerance. The baseline is only meaningful on the machine that recorded it,
+so refresh it with --update-baseline when moving to another one.
+
+This is the only benchmark runner and it only checks speed and memory; whether the engines, the
+odds tables and the sharded analyzer return the right rows is covered by the tests in tests/.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.synthetic import SyntheticMarkets
+from src.data.arbitrage import ArbitrageAnalyzer
+from src.data.expected_value import ExpectedValueAnalyzer, np
+from src.data.parallel import ParallelPropAnalyzer
+from src.data.snapshot import IngestionSnapshot
+from src.utils.odds_math import DECIMAL_ODDS, IMPLIED_PROBABILITY, PAYOUT
+
+try:
+    from src.utils.db import _sanitize_props, _sanitized_batches
+except ImportError:  # psycopg2 is not installed
+    _sanitized_batches = None
+
+SIZES = [10_000, 100_000, 1_000_000]
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+TOLERANCE = 0.35  # Timings on shared machines swing by a quarter run to run
+MIN_SECONDS = 1.0  # Keep repeating a case until it has run this long
+MAX_REPEAT = 50
+MEMORY_SLACK_MB = 1.0  # Peak memory of small cases moves by allocator noise alone
+
+
+class Slate:
+    """The inputs every case of one size reads, built once."""
+
+    def __init__(self, size):
+        self.size = size
+        self.markets = SyntheticMarkets.for_rows(size)
+        self.payloads = list(self.markets.iter_props())
+        self.prop_bets, _ = self.markets.odds_api.prop_bets_filters(IngestionSnapshot(props=self.payloads))
+        # Enough games per sport for size moneylines, most bookies quoting each game
+        games = -(-size // int(len(self.markets.bookies) * self.markets.coverage * len(self.markets.sports))) + 1
+        self.game_lines = self.markets.game_lines(games)[:size]
+
+
+def arbitrage_analyze(engine):
+    def run(slate):
+        analyzer = ArbitrageAnalyzer(engine=engine)
+        analyzer.add_lines(slate.prop_bets)
+        analyzer.analyze()
+        return len(slate.prop_bets)
+    return run
+
+
+def expected_value_analyze_prop(engine):
+    def run(slate):
+        analyzer = ExpectedValueAnalyzer(engine=engine)
+        analyzer.add_prop_lines(slate.prop_bets)
+        analyzer.analyze_prop()
+        return len(slate.prop_bets)
+    return run
+
+
+def expected_value_analyze_ml(slate):
+    ExpectedValueAnalyzer(slate.game_lines).analyze_ml()
+    return len(slate.game_lines)
+
+
+def parallel_analyze(slate):
+    analyzer = ParallelPropAnalyzer()
+    analyzer.add_lines(slate.prop_bets)
+    analyzer.analyze()
+    return len(slate.prop_bets)
+
+
+def odds_math_lookups(slate):
+    prices = [line.betting_line for line in slate.prop_bets if line.betting_line]
+    for table in (IMPLIED_PROBABILITY, DECIMAL_ODDS, PAYOUT):
+        for odds in prices:
+            table[odds]
+    return len(prices)
+
+
+def odds_api_prop_bets_filters(slate):
+    all_prop_bets, _ = slate.markets.odds_api.prop_bets_filters(IngestionSnapshot(props=slate.payloads))
+    return len(all_prop_bets)
+
+
+def db_sanitized_batches(slate):
+    for _ in _sanitized_batches(slate.prop_bets, _sanitize_props, 5000):
+        pass
+    return len(slate.prop_bets)
+
+
+def build_cases():
+    """Return (name, run) pairs; numpy and DB cases are skipped when their packages are missing."""
+    engines = ['python', 'numpy'] if np is not None else ['python']
+    cases = [(f"arbitrage.analyze[{engine}]", arbitrage_analyze(engine)) for engine in engines]
+    cases += [(f"expected_value.analyze_prop[{engine}]", expected_value_analyze_prop(engine)) for engine in engines]
+    cases.append(("expected_value.analyze_ml", expected_value_analyze_ml))
+    cases.append(("parallel.analyze", parallel_analyze))
+    cases.append(("odds_math.lookups", odds_math_lookups))
+    cases.append(("odds_api.prop_bets_filters", odds_api_prop_bets_filters))
+    if _sanitized_batches is not None:
+        cases.append(("db.sanitized_batches[props]", db_sanitized_batches))
+    else:
+        print("psycopg2 is not installed, skipping the db cases")
+    return cases
+
+
+def measure(run, slate, min_repeat):
+    """Return (best seconds, rows, peak MB allocated during one run).
+
+    Runs at least min_repeat times and until MIN_SECONDS have been spent, so the best time of the
+    small slates is not left to a single noisy run.
+    """
+    best = None
+    total = 0.0
+    runs = 0
+    while runs < min_repeat or (total < MIN_SECONDS and runs < MAX_REPEAT):
+        gc.collect()
+        start = time.perf_counter()
+        rows = run(slate)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        total += elapsed
+        runs += 1
+
+    gc.collect()
+    tracemalloc.start()
+    run(slate)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, rows, peak / 1e6
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def compare(result, baseline, tolerance):
+    """Return the regressions of one result against its baseline entry."""
+    problems = []
+    if result['rows_per_second'] < baseline['rows_per_second'] * (1 - tolerance):
+        problems.append(f"throughput {result['rows_per_second']:,.0f} rows/s < {baseline['rows_per_second']:,.0f}")
+    if result['peak_mb'] > baseline['peak_mb'] * (1 + tolerance) + MEMORY_SLACK_MB:
+        problems.append(f"peak {result['peak_mb']:.1f}MB > {baseline['peak_mb']:.1f}MB")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='Prop rows per slate')
+    parser.add_argument('--cases', help='Only run cases whose name contains this')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='Allowed throughput drop / memory growth')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON file')
+    parser.add_argument('--update-baseline', action='store_true', help='Write these results to the baseline')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    cases = [(name, run) for name, run in build_cases() if not args.cases or args.cases in name]
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+    elif baseline.get('python') != platform.python_version() or baseline.get('machine') != platform.machine():
+        print(f"Baseline was recorded on Python {baseline.get('python')} / {baseline.get('machine')}; timings may not compare")
+
+    results = {}
+    regressions = []
+    print(f"{'case':<36} {'rows':>9} {'seconds':>9} {'rows/s':>12} {'peak MB':>9}")
+    for size in args.sizes:
+        slate = Slate(size)
+        for name, run in cases:
+            seconds, rows, peak_mb = measure(run, slate, min_repeat=3 if size <= 100_000 else 1)
+            key = f"{name}@{size}"
+            results[key] = {'seconds': round(seconds, 4), 'rows_per_second': round(rows / seconds), 'peak_mb': round(peak_mb, 2)}
+            line = f"{name:<36} {rows:>9} {seconds:>9.3f} {rows / seconds:>12,.0f} {peak_mb:>9.1f}"
+            if baseline is not None and key in baseline['results']:
+                problems = compare(results[key], baseline['results'][key], args.tolerance)
+                if problems:
+                    regressions.append((key, problems))
+                    line += "  REGRESSION: " + "; ".join(problems)
+            print(line)
+        del slate
+
+    if args.update_baseline:
+        stored = baseline or {'results': {}}
+        stored.update({'python': platform.python_version(), 'machine': platform.machine()})
+        stored['results'].update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"{len(regressions)} regressions against {args.baseline}")
+        return 1
+    if baseline is not None:
+        print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+synthetic.py - Deterministic synthetic odds markets for benchmarks
+
+Builds Odds API shaped payloads (event props and team odds) and the rows the pipeline flattens
+them into, for any number of sports, events, bookies and prop types. Every event is generated from
+its own seed, so the same options always give the same rows, whether the slate is built at once or
+streamed one event at a time.
+
+Prices come from a fair probability per outcome with the bookie's vig and some noise on top. A
+share of prop points get one soft price that opens an arbitrage (arb_rate) or a +EV spot (ev_rate).
+
+    from benchmarks.synthetic import SyntheticMarkets
+
+    markets = SyntheticMarkets.for_rows(100_000)
+    all_prop_bets = markets.prop_bets()
+    game_lines = markets.game_lines()
+"""
+import random
+
+from src.data.odds_api import Odds_API
+from src.data.snapshot import IngestionSnapshot
+
+# Prop types per sport and how their outcomes are shaped: 'over_under' props have an Over and an
+# Under per player and point, 'yes_no' props a Yes and a No per player, and 'multi' props one Yes
+# per player with a single winner across the game
+SPORT_PROPS = {
+    'basketball_nba': {
+        'player_points': 'over_under', 'player_rebounds': 'over_under', 'player_assists': 'over_under',
+        'player_double_double': 'yes_no', 'player_first_basket': 'multi',
+    },
+    'americanfootball_nfl': {
+        'player_pass_yds': 'over_under', 'player_rush_yds': 'over_under', 'player_receptions': 'over_under',
+        'player_anytime_td': 'yes_no', 'player_1st_td': 'multi',
+    },
+    'icehockey_nhl': {
+        'player_points': 'over_under', 'player_shots_on_goal': 'over_under',
+        'player_goal_scorer_anytime': 'yes_no', 'player_goal_scorer_first': 'multi',
+    },
+    'baseball_mlb': {
+        'batter_hits': 'over_under', 'batter_total_bases': 'over_under', 'batter_home_runs': 'over_under',
+        'batter_first_home_run': 'multi',
+    },
+}
+TIMESTAMP = '2025-03-14T00:06:03Z'
+COMMENCE_TIME = '2025-03-14T23:00:00Z'
+
+
+def to_american(probability):
+    """Convert an implied probability into American odds rounded to 5."""
+    probability = min(max(probability, 0.01), 0.97)
+    if probability >= 0.5:
+        return -int(round(probability / (1 - probability) * 100 / 5) * 5)
+    return max(int(round((1 - probability) / probability * 100 / 5) * 5), 100)
+
+
+def soft_price(probability, edge):
+    """American odds paying edge (e.g. 0.12 for 12%) more than the fair price of probability."""
+    decimal = (1 + edge) / probability
+    if decimal >= 2:
+        return int((decimal - 1) * 100)
+    return -int(100 / (decimal - 1))
+
+
+class SyntheticMarkets:
+    """A reproducible slate of events with props and team odds from a set of bookies."""
+
+    def __init__(self, events=10, sports=None, bookies=12, players=16, prop_types=None, points=2,
+                 vig=0.045, noise=0.008, coverage=0.85, arb_rate=0.002, ev_rate=0.02, seed=7):
+        """Initialize the generator.
+
+        Args:
+            events: Events per sport (default: 10).
+            sports: Sport keys to generate (default: every sport in SPORT_PROPS).
+            bookies: Number of bookies quoting the slate (default: 12).
+            players: Players per event (default: 16).
+            prop_types: Optional list of prop types to keep, from SPORT_PROPS.
+            points: Alternate points per over/under prop and player (default: 2).
+            vig: Overround added to each two-sided market (default: 0.045).
+            noise: Standard deviation of each bookie's implied probability around the market (default: 0.008).
+            coverage: Chance a bookie quotes a given prop for an event (default: 0.85).
+            arb_rate: Share of prop points with one price soft enough to open an arbitrage (default: 0.002).
+            ev_rate: Share of prop points with one +EV price (default: 0.02).
+            seed: Base seed; each event derives its own from it (default: 7).
+        """
+        self.events = events
+        self.sports = list(sports or SPORT_PROPS)
+        self.bookies = [f"bookie{index:02d}" for index in range(bookies)]
+        self.players = players
+        self.prop_types = set(prop_types) if prop_types else None
+        self.points = points
+        self.vig = vig
+        self.noise = noise
+        self.coverage = coverage
+        self.arb_rate = arb_rate
+        self.ev_rate = ev_rate
+        self.seed = seed
+        self.odds_api = Odds_API(link='http://localhost', api_key='synthetic')
+
+    @classmethod
+    def for_rows(cls, rows, **options):
+        """Build a generator sized so prop_bets() returns about rows rows across its sports."""
+        sample = cls(events=1, **options)
+        rows_per_event = len(sample.prop_bets()) / len(sample.sports)
+        return cls(events=max(1, round(rows / rows_per_event / len(sample.sports))), **options)
+
+    def event_ids(self):
+        """Yield (sport, event_id) for every event of the slate."""
+        for sport in self.sports:
+            for index in range(self.events):
+                yield sport, f"{sport}_{index:05d}"
+
+    def _sport_props(self, sport):
+        props = SPORT_PROPS[sport]
+        if self.prop_types is not None:
+            props = {prop_type: shape for prop_type, shape in props.items() if prop_type in self.prop_types}
+        return props
+
+    def _prices(self, rng, probabilities):
+        """One bookie's prices for a market's outcomes: fair probabilities with vig and noise."""
+        vig = 1 + self.vig
+        return [to_american(probability * vig + rng.gauss(0, self.noise)) for probability in probabilities]
+
+    def _soften(self, rng, quotes, probabilities):
+        """Maybe give one bookie a soft price on one outcome, for an arbitrage or a +EV spot."""
+        roll = rng.random()
+        if roll >= self.arb_rate + self.ev_rate or not quotes:
+            return
+        edge = rng.uniform(0.08, 0.15) if roll < self.arb_rate else rng.uniform(0.06, 0.1)
+        bookie = rng.choice(list(quotes))
+        outcome = rng.randrange(len(probabilities))
+        quotes[bookie][outcome] = soft_price(probabilities[outcome], edge)
+
+    def event_props(self, sport, event_id):
+        """Build one event's props payload, shaped like /v4/sports/{sport}/events/{event_id}/odds/."""
+        rng = random.Random(f"{self.seed}:{event_id}")
+        players = [f"{event_id} Player {index}" for index in range(self.players)]
+        # bookie -> market key -> outcomes, filled market by market and then laid out per bookie
+        markets = {bookie: {} for bookie in self.bookies}
+
+        for prop_type, shape in self._sport_props(sport).items():
+            quoting = [bookie for bookie in self.bookies if rng.random() < self.coverage]
+            if shape == 'multi':
+                weights = [rng.random() ** 2 for _ in players]
+                probabilities = [weight / sum(weights) for weight in weights]
+                quotes = {bookie: [to_american(probability * rng.uniform(1.15, 1.35)) for probability in probabilities]
+                          for bookie in quoting}
+                self._soften(rng, quotes, probabilities)
+                for bookie, prices in quotes.items():
+                    markets[bookie][prop_type] = [
+                        {'name': 'Yes', 'description': player, 'price': price}
+                        for player, price in zip(players, prices)
+                    ]
+                continue
+
+            for player in players:
+                if shape == 'yes_no':
+                    sides = [('Yes', None), ('No', None)]
+                else:
+                    base = rng.randint(2, 30)
+                    sides = [(side, base + offset + 0.5) for offset in range(self.points) for side in ('Over', 'Under')]
+                chance = rng.uniform(0.3, 0.85)
+                for pair in range(0, len(sides), 2):
+                    if pair:
+                        chance *= rng.uniform(0.75, 0.9)  # Each alternate point is a point higher
+                    probabilities = [chance, 1 - chance]
+                    quotes = {bookie: self._prices(rng, probabilities) for bookie in quoting}
+                    self._soften(rng, quotes, probabilities)
+                    for bookie, prices in quotes.items():
+                        outcomes = markets[bookie].setdefault(prop_type, [])
+                        for (name, point), price in zip(sides[pair:pair + 2], prices):
+                            outcome = {'name': name, 'description': player, 'price': price}
+                            if point is not None:
+                                outcome['point'] = point
+                            outcomes.append(outcome)
+
+        return {
+            'id': event_id,
+            'sport_key': sport,
+            'commence_time': COMMENCE_TIME,
+            'bookmakers': [
+                {'key': bookie, 'markets': [
+                    {'key': prop_type, 'last_update': TIMESTAMP, 'outcomes': outcomes}
+                    for prop_type, outcomes in bookie_markets.items()
+                ]}
+                for bookie, bookie_markets in markets.items() if bookie_markets
+            ]
+        }
+
+    def iter_props(self):
+        """Yield every event's props payload, one at a time."""
+        for sport, event_id in self.event_ids():
+            yield self.event_props(sport, event_id)
+
+    def prop_bets(self):
+        """Flatten every event into PropBet rows with Odds_API.flatten_event_props, like prop_bets_filters."""
+        unique_player_props = {}
+        rows = []
+        for data in self.iter_props():
+            rows.extend(self.odds_api.flatten_event_props(data, unique_player_props))
+        return rows
+
+    def team_odds(self, games=None):
+        """Build team odds payloads (h2h, spreads and totals), shaped like /v4/sports/{sport}/odds/.
+
+        Args:
+            games: Optional number of games per sport; defaults to the number of events.
+        """
+        payloads = []
+        for sport in self.sports:
+            for index in range(games if games is not None else self.events):
+                event_id = f"{sport}_{index:05d}"
+                rng = random.Random(f"{self.seed}:{event_id}:team_odds")
+                home_team, away_team = f"{event_id} Home", f"{event_id} Away"
+                home_chance = rng.uniform(0.25, 0.75)
+                spread = round(rng.uniform(1, 12)) + 0.5
+                total = round(rng.uniform(40, 230)) + 0.5
+                bookmakers = []
+                for bookie in self.bookies:
+                    if rng.random() >= self.coverage:
+                        continue
+                    h2h = self._prices(rng, [home_chance, 1 - home_chance])
+                    self._soften(rng, {bookie: h2h}, [home_chance, 1 - home_chance])
+                    spreads = self._prices(rng, [0.5, 0.5])
+                    totals = self._prices(rng, [0.5, 0.5])
+                    bookmakers.append({'key': bookie, 'title': bookie, 'last_update': TIMESTAMP, 'markets': [
+                        {'key': 'h2h', 'outcomes': [
+                            {'name': home_team, 'price': h2h[0]}, {'name': away_team, 'price': h2h[1]}]},
+                        {'key': 'spreads', 'outcomes': [
+                            {'name': home_team, 'price': spreads[0], 'point': -spread},
+                            {'name': away_team, 'price': spreads[1], 'point': spread}]},
+                        {'key': 'totals', 'outcomes': [
+                            {'name': 'Over', 'price': totals[0], 'point': total},
+                            {'name': 'Under', 'price': totals[1], 'point': total}]},
+                    ]})
+                payloads.append({'id': event_id, 'sport_key': sport, 'commence_time': COMMENCE_TIME,
+                                 'home_team': home_team, 'away_team': away_team, 'bookmakers': bookmakers})
+        return payloads
+
+    def game_markets(self, games=None):
+        """Flatten the team odds with Odds_API.bookies_and_odds into (game_totals, game_spreads, game_lines)."""
+        return self.odds_api.bookies_and_odds(IngestionSnapshot(team_odds=self.team_odds(games)))
+
+    def game_lines(self, games=None):
+        """GameLine rows for the slate, as bookies_and_odds returns them."""
+        return self.game_markets(games)[2]
@@ -2,5 +2,7 @@ import logging
 import logging.config
 import os
 
-logging.config.fileConfig("logging.conf")
+# Only when run from the repository root or the Lambda bundle; the Django app imports src.utils with its own logging
+if os.path.exists("logging.conf"):
+    logging.config.fileConfig("logging.conf")
 
@@ -1,18 +1,55 @@
 import logging
 
+try:
+    import numpy as np
+except ImportError:  # The Lambda bundle may ship without numpy; fall back to the Python engine
+    np = None
+
+from src.data.expected_value import MULTI_OUTCOME_PROPS
+from src.utils.odds_math import DECIMAL_ODDS
+
 logger = logging.getLogger(__name__)
 
+# Outcome that completes each two-way prop
+OTHER_OUTCOME = {"yes": "no", "no": "yes", "over": "under", "under": "over"}
+
+# Game markets from Odds_API.bookies_and_odds, written to the arbitrage table with their key as Prop_Type
+GAME_MARKETS = ('h2h', 'spreads', 'totals')
+
+# Outcomes of multi-outcome props that pay out when no player does, which close the field
+NO_WINNER_OUTCOMES = {'no scorer', 'no goalscorer', 'no goal scorer', 'no touchdown scorer', 'no td scorer', 'no home run'}
+
 class ArbitrageAnalyzer:
-    def __init__(self, bet_lines, min_profit_percentage=1, max_odds=50000, min_bookies_per_outcome=1):
+    def __init__(self, bet_lines=None, min_profit_percentage=1, max_odds=50000, min_bookies_per_outcome=1, engine='auto'):
         """Initialize the arbitrage analyzer with betting lines and parameters.
 
         Args:
-            bet_lines: List of betting lines to analyze.
+            bet_lines: List of PropBet rows to analyze; leave empty and call add_lines to stream them in.
             min_profit_percentage: Minimum profit percentage to consider (default: 1).
             max_odds: Maximum odds to consider (default: 50000).
             min_bookies_per_outcome: Minimum number of bookies per outcome (default: 1).
+            engine: 'python' for the per-group loop, 'numpy' to evaluate every prop at once on
+                columnar arrays, or 'auto' to use numpy when it is installed (default: 'auto').
         """
-        self.bet_lines = bet_lines
+        if engine == 'auto':
+            engine = 'numpy' if np is not None else 'python'
+        if engine == 'numpy' and np is None:
+            logger.warning("numpy is not installed, using the python arbitrage engine")
+            engine = 'python'
+        self.engine = engine
+        self.bet_lines = bet_lines if bet_lines is not None else []
+        self.prop_groups = {}
+        self.multiway_groups = {}  # (game_ID, Prop_Type) -> N-outcome market, one outcome per player
+        self.lines_grouped = 0
+
+        # Columnar encoding used by the numpy engine: one entry per prop group and one per line
+        self.group_index = {}
+        self.group_lines = []  # First line seen for each group
+        self.group_outcomes = []  # First outcome seen for each group, which becomes side 0
+        self.line_groups = []
+        self.line_sides = []
+        self.line_odds = []
+        self.line_bookies = []
         self.min_profit_percentage = min_profit_percentage
         self.max_odds = max_odds
         self.min_bookies_per_outcome = min_bookies_per_outcome
@@ -26,66 +63,145 @@ class ArbitrageAnalyzer:
         Returns:
             Decimal odds as a float, or None if invalid.
         """
-        if odds > 0:
-            return (odds / 100.0) + 1
-        elif odds < 0:
-            return (100.0 / abs(odds)) + 1
-        else:
-            return None
+        return DECIMAL_ODDS[odds]
 
-    def analyze(self):
-        """Analyze betting lines to find arbitrage opportunities for two-outcome props.
+    def add_lines(self, lines):
+        """Group a chunk of betting lines by prop so lines can be streamed in event by event.
 
-        Returns:
-            List of tuples, each containing arbitrage opportunity details in the order:
-            (game_ID, Prop_Type, Player_Name, Betting_Point, sport_type,
-             bookie_one, outcome_one, odds_one, bet_amount_one,
-             bookie_two, outcome_two, odds_two, bet_amount_two,
-             profit_percentage, last_updated_timestamp)
+        Args:
+            lines: List of PropBet rows from Odds_API.
         """
-        logger.info(f"Number of bet lines loaded: {len(self.bet_lines)}")
-        if not self.bet_lines:
-            logger.error("No bet lines to analyze.")
-            return []
+        self._group_multiway(lines)
+        if self.engine == 'numpy':
+            self._encode_lines(lines)
+            return
 
-        # Group betting lines by prop
-        prop_groups = {}
-        for line in self.bet_lines:
-            game_id, last_updated_timestamp, bookie, prop_type, bet_type, player_name, betting_line, betting_point, sport_type = line
-            if bet_type.lower() in ["yes", "no"]:
-                prop_key = (game_id, prop_type, player_name)
-                outcome = bet_type.lower()
+        prop_groups = self.prop_groups
+        for line in lines:
+            outcome = line.bet_type.lower()
+            if outcome in ["yes", "no"]:
+                prop_key = (line.game_id, line.prop_type, line.player_name)
                 expected_outcomes = {"yes", "no"}
-            elif bet_type.lower() in ["over", "under"]:
-                prop_key = (game_id, prop_type, player_name, betting_point)
-                outcome = bet_type.lower()
+            elif outcome in ["over", "under"]:
+                prop_key = (line.game_id, line.prop_type, line.player_name, line.betting_point)
                 expected_outcomes = {"over", "under"}
             else:
-                logger.debug(f"Skipping unknown bet_type {bet_type} for prop {line}")
+                logger.debug(f"Skipping unknown bet_type {line.bet_type} for prop {line}")
                 continue
 
             if prop_key not in prop_groups:
                 prop_groups[prop_key] = {
                     "outcomes": {},
-                    "game_ID": game_id,
-                    "Prop_Type": prop_type,
-                    "Player_Name": player_name,
-                    "Betting_Point": betting_point if bet_type.lower() in ["over", "under"] else "N/A",
-                    "sport_type": sport_type,
-                    "last_updated_timestamp": last_updated_timestamp,
+                    "game_ID": line.game_id,
+                    "Prop_Type": line.prop_type,
+                    "Player_Name": line.player_name,
+                    "Betting_Point": line.betting_point if outcome in ["over", "under"] else "N/A",
+                    "sport_type": line.sport_type,
+                    "last_updated_timestamp": line.last_updated_timestamp,
                     "expected_outcomes": expected_outcomes
                 }
             if outcome not in prop_groups[prop_key]["outcomes"]:
                 prop_groups[prop_key]["outcomes"][outcome] = []
-            prop_groups[prop_key]["outcomes"][outcome].append((bookie, betting_line))
+            prop_groups[prop_key]["outcomes"][outcome].append((line.bookie, line.betting_line))
+        self.lines_grouped += len(lines)
 
+    def _group_multiway(self, lines):
+        """Group the Yes lines of multi-outcome props (first scorer and the like) by game and market."""
+        multiway_groups = self.multiway_groups
+        for line in lines:
+            if line.prop_type not in MULTI_OUTCOME_PROPS:
+                continue
+            if line.bet_type.lower() != "yes":
+                continue
+            market_key = (line.game_id, line.prop_type)
+            if market_key not in multiway_groups:
+                multiway_groups[market_key] = {
+                    "outcomes": {},
+                    "game_ID": line.game_id,
+                    "Prop_Type": line.prop_type,
+                    "Player_Name": "N/A",
+                    "Betting_Point": "N/A",
+                    "sport_type": line.sport_type,
+                    "last_updated_timestamp": line.last_updated_timestamp
+                }
+            outcomes = multiway_groups[market_key]["outcomes"]
+            if line.player_name not in outcomes:
+                outcomes[line.player_name] = []
+            outcomes[line.player_name].append((line.bookie, line.betting_line))
+
+    def _encode_lines(self, lines):
+        """Append a chunk of betting lines to the columnar arrays used by the numpy engine."""
+        group_index = self.group_index
+        group_outcomes = self.group_outcomes
+        line_groups = self.line_groups
+        line_sides = self.line_sides
+        line_odds = self.line_odds
+        line_bookies = self.line_bookies
+
+        for line in lines:
+            outcome = line.bet_type.lower()
+            if outcome in ["yes", "no"]:
+                prop_key = (line.game_id, line.prop_type, line.player_name)
+            elif outcome in ["over", "under"]:
+                prop_key = (line.game_id, line.prop_type, line.player_name, line.betting_point)
+            else:
+                logger.debug(f"Skipping unknown bet_type {line.bet_type} for prop {line}")
+                continue
+
+            group = group_index.get(prop_key)
+            if group is None:
+                group = len(group_outcomes)
+                group_index[prop_key] = group
+                self.group_lines.append(line)
+                group_outcomes.append(outcome)
+            line_groups.append(group)
+            line_sides.append(0 if outcome == group_outcomes[group] else 1)
+            line_odds.append(line.betting_line)
+            line_bookies.append(line.bookie)
+        self.lines_grouped += len(lines)
+
+    def analyze(self):
+        """Analyze betting lines to find arbitrage opportunities for two-outcome props.
+
+        Returns:
+            List of tuples, each containing arbitrage opportunity details in the order:
+            (game_ID, Prop_Type, Player_Name, Betting_Point, sport_type,
+             bookie_one, outcome_one, odds_one, bet_amount_one,
+             bookie_two, outcome_two, odds_two, bet_amount_two,
+             profit_percentage, last_updated_timestamp)
+        """
+        if self.bet_lines and not self.lines_grouped:
+            self.add_lines(self.bet_lines)
+
+        logger.info(f"Number of bet lines loaded: {self.lines_grouped}")
+        if not self.lines_grouped:
+            logger.error("No bet lines to analyze.")
+            return []
+
+        if self.engine == 'numpy':
+            return self._analyze_numpy()
+
+        prop_groups = self.prop_groups
         logger.info(f"Grouped {len(prop_groups)} props for arbitrage analysis")
+        arbitrage_opportunities = self._two_way_opportunities(prop_groups)
 
+        # Sort by profit percentage
+        arbitrage_opportunities.sort(key=lambda x: x[13], reverse=True)  # Index 13 is profit_percentage
+        logger.info(f"Found {len(arbitrage_opportunities)} arbitrage opportunities" if arbitrage_opportunities else "No arbitrage opportunities found")
+        return arbitrage_opportunities
+
+    def _two_way_opportunities(self, groups):
+        """Find the arbitrage opportunities among grouped two-outcome markets, in group order.
+
+        Args:
+            groups: Dict of group key -> details with 'outcomes' (outcome -> [(bookie, odds)]),
+                'expected_outcomes' and the fields used by _opportunity.
+        """
         # Store arbitrage opportunities
         arbitrage_opportunities = []
 
         # Process each prop group
-        for prop_key, data in prop_groups.items():
+        for prop_key, data in groups.items():
             outcomes_dict = data["outcomes"]
             expected_outcomes = data["expected_outcomes"]
 
@@ -122,54 +238,347 @@ class ArbitrageAnalyzer:
             if len(best_odds_dict) != 2:
                 continue
 
-            # Convert to decimal odds
-            decimal_odds = {
-                outcome: self.american_to_decimal(odds)
-                for outcome, (odds, _) in best_odds_dict.items()
-            }
-            if None in decimal_odds.values():
+            opportunity = self._opportunity(data, best_odds_dict)
+            if opportunity:
+                arbitrage_opportunities.append(opportunity)
+        return arbitrage_opportunities
+
+    def group_game_markets(self, game_lines=None, game_spreads=None, game_totals=None):
+        """Group moneylines, spreads and totals from every bookie into two-outcome markets in one pass.
+
+        Moneylines are one market per game. Spreads are matched on the point of the team that
+        sorts first, so one bookie's "A -3.5 / B +3.5" lines up with another's "B +3.5 / A -3.5";
+        outcomes are labelled with their signed point. Totals are one market per game and total.
+
+        Args:
+            game_lines: GameLine rows.
+            game_spreads: GameSpread rows.
+            game_totals: GameTotal rows.
+
+        Returns:
+            Dict of market key -> details in the shape _two_way_opportunities expects.
+        """
+        game_groups = {}
+
+        def add(market_key, row, prop_type, betting_point, sides):
+            data = game_groups.get(market_key)
+            if data is None:
+                data = game_groups[market_key] = {
+                    "outcomes": {},
+                    "game_ID": row.game_id,
+                    "Prop_Type": prop_type,
+                    "Player_Name": "N/A",
+                    "Betting_Point": betting_point,
+                    "sport_type": row.sport_type,
+                    "last_updated_timestamp": row.last_updated_timestamp,
+                    "expected_outcomes": {outcome for outcome, _ in sides}
+                }
+            outcomes = data["outcomes"]
+            for outcome, odds in sides:
+                if outcome not in outcomes:
+                    outcomes[outcome] = []
+                outcomes[outcome].append((row.bookie, odds))
+
+        for row in game_lines or []:
+            add((row.game_id, 'h2h'), row, 'h2h', "N/A",
+                ((row.home_team, row.line_1), (row.away_team, row.line_2)))
+
+        for row in game_spreads or []:
+            if row.spread_1 is None or row.spread_2 is None or row.spread_1 != -row.spread_2:
+                logger.debug(f"Skipping spread without opposite points: {row}")
+                continue
+            (team_a, point_a, odds_a), (team_b, point_b, odds_b) = sorted((
+                (row.home_team, row.spread_1, row.line_1), (row.away_team, row.spread_2, row.line_2)
+            ), key=lambda side: side[0])
+            add((row.game_id, 'spreads', point_a), row, 'spreads', point_a,
+                ((f"{team_a} {point_a:+g}", odds_a), (f"{team_b} {point_b:+g}", odds_b)))
+
+        for row in game_totals or []:
+            sides = ((row.over_or_under_1.lower(), row.over_under_line_1), (row.over_or_under_2.lower(), row.over_under_line_2))
+            if row.over_under_total_1 != row.over_under_total_2 or {sides[0][0], sides[1][0]} != {"over", "under"}:
+                logger.debug(f"Skipping total without matching over/under: {row}")
+                continue
+            add((row.game_id, 'totals', row.over_under_total_1), row, 'totals', row.over_under_total_1, sides)
+
+        return game_groups
+
+    def analyze_game_markets(self, game_lines=None, game_spreads=None, game_totals=None):
+        """Find arbitrage opportunities in moneylines, spreads and totals across bookies.
+
+        Args:
+            game_lines: GameLine rows.
+            game_spreads: GameSpread rows.
+            game_totals: GameTotal rows.
+
+        Returns:
+            List of tuples in the order returned by analyze, with the market ('h2h', 'spreads' or
+            'totals') as Prop_Type and 'N/A' as Player_Name.
+        """
+        game_groups = self.group_game_markets(game_lines, game_spreads, game_totals)
+        logger.info(f"Grouped {len(game_groups)} game markets for arbitrage analysis")
+        arbitrage_opportunities = self._two_way_opportunities(game_groups)
+
+        arbitrage_opportunities.sort(key=lambda x: x[13], reverse=True)  # Index 13 is profit_percentage
+        logger.info(f"Found {len(arbitrage_opportunities)} game market arbitrage opportunities" if arbitrage_opportunities else "No game market arbitrage opportunities found")
+        return arbitrage_opportunities
+
+    def _opportunity(self, data, best_odds_dict):
+        """Turn the best price on each side of a prop into an arbitrage tuple.
+
+        Args:
+            data: Prop group details (game_ID, Prop_Type, Player_Name, Betting_Point, sport_type,
+                last_updated_timestamp).
+            best_odds_dict: outcome -> (best American odds, bookie offering them), in first-seen order.
+
+        Returns:
+            Arbitrage tuple in the order returned by analyze, or None when the prices don't
+            clear min_profit_percentage.
+        """
+        # Convert to decimal odds
+        decimal_odds = {
+            outcome: DECIMAL_ODDS[odds]
+            for outcome, (odds, _) in best_odds_dict.items()
+        }
+        if None in decimal_odds.values():
+            return None
+
+        # Check for arbitrage
+        S = sum(1 / d for d in decimal_odds.values())
+        if S >= 1:
+            return None
+        profit_percentage = (1 / S - 1) * 100
+        if profit_percentage < self.min_profit_percentage:
+            return None
+
+        # Calculate bet amounts for total wager of $100
+        total_stake = 100
+        outcome1, outcome2 = list(decimal_odds.keys())
+        d1 = decimal_odds[outcome1]
+        d2 = decimal_odds[outcome2]
+        betamount1 = total_stake * (d2 / (d1 + d2))
+        betamount2 = total_stake * (d1 / (d1 + d2))
+
+        # Extract bookies and odds
+        bookie1 = best_odds_dict[outcome1][1]
+        bookie2 = best_odds_dict[outcome2][1]
+        odds1 = best_odds_dict[outcome1][0]
+        odds2 = best_odds_dict[outcome2][0]
+
+        # Create tuple in the exact order expected by insert_arbitrage
+        return (
+            data["game_ID"],
+            data["Prop_Type"],
+            data["Player_Name"],
+            str(data["Betting_Point"]),  # Ensure Betting_Point is a string
+            data["sport_type"],
+            bookie1,
+            outcome1,
+            odds1,
+            round(betamount1, 2),
+            bookie2,
+            outcome2,
+            odds2,
+            round(betamount2, 2),
+            round(profit_percentage, 2),
+            data["last_updated_timestamp"]
+        )
+
+    def analyze_multiway(self, min_outcomes=3):
+        """Analyze N-outcome markets for arbitrage across every outcome's best price.
+
+        A market is only a true arbitrage if its outcomes cover every result. A bookmaker list that
+        leaves out a player makes the rest sum below 1, so markets are only reported when their field
+        is known to be complete (see _field_complete).
+
+        Args:
+            min_outcomes: Fewest outcomes a market needs; two-way props are handled by analyze (default: 3).
+
+        Returns:
+            List of tuples in the order returned by analyze, with the first two legs in the
+            bookie_one/bookie_two columns, followed by a tuple of every leg as
+            (bookie, outcome, odds, bet_amount).
+        """
+        if self.bet_lines and not self.lines_grouped:
+            self.add_lines(self.bet_lines)
+
+        logger.info(f"Grouped {len(self.multiway_groups)} multi-outcome markets for arbitrage analysis")
+        # Inverse odds sum at which the profit drops below min_profit_percentage
+        max_inverse_sum = 1 / (1 + max(self.min_profit_percentage, 0) / 100)
+        arbitrage_opportunities = []
+
+        for market_key, data in self.multiway_groups.items():
+            outcomes_dict = data["outcomes"]
+            if len(outcomes_dict) < min_outcomes:
                 continue
 
-            # Check for arbitrage
-            S = sum(1 / d for d in decimal_odds.values())
-            if S < 1:
-                profit_percentage = (1 / S - 1) * 100
-                if profit_percentage >= self.min_profit_percentage:
-                    # Calculate bet amounts for total wager of $100
-                    total_stake = 100
-                    outcome1, outcome2 = list(decimal_odds.keys())
-                    d1 = decimal_odds[outcome1]
-                    d2 = decimal_odds[outcome2]
-                    betamount1 = total_stake * (d2 / (d1 + d2))
-                    betamount2 = total_stake * (d1 / (d1 + d2))
-
-                    # Extract bookies and odds
-                    bookie1 = best_odds_dict[outcome1][1]
-                    bookie2 = best_odds_dict[outcome2][1]
-                    odds1 = best_odds_dict[outcome1][0]
-                    odds2 = best_odds_dict[outcome2][0]
-
-                    # Create tuple in the exact order expected by insert_arbitrage
-                    arbitrage_tuple = (
-                        data["game_ID"],
-                        data["Prop_Type"],
-                        data["Player_Name"],
-                        str(data["Betting_Point"]),  # Ensure Betting_Point is a string
-                        data["sport_type"],
-                        bookie1,
-                        outcome1,
-                        odds1,
-                        round(betamount1, 2),
-                        bookie2,
-                        outcome2,
-                        odds2,
-                        round(betamount2, 2),
-                        round(profit_percentage, 2),
-                        data["last_updated_timestamp"]
-                    )
-                    arbitrage_opportunities.append(arbitrage_tuple)
+            # One pass per outcome for its best price, first bookie on ties; stop as soon as
+            # the inverse odds already sum past the threshold, which most markets do early
+            best_odds_dict = {}
+            inverse_sum = 0
+            for outcome, odds_list in outcomes_dict.items():
+                best_odds = None
+                best_bookie = None
+                bookies = set()
+                for bookie, odds in odds_list:
+                    if odds is None or odds == 0 or odds > self.max_odds:
+                        continue
+                    bookies.add(bookie)
+                    if best_odds is None or odds > best_odds:
+                        best_odds, best_bookie = odds, bookie
+                if best_odds is None or len(bookies) < self.min_bookies_per_outcome:
+                    break
+                inverse_sum += 1 / DECIMAL_ODDS[best_odds]
+                if inverse_sum > max_inverse_sum:
+                    break
+                best_odds_dict[outcome] = (best_odds, best_bookie)
+            if len(best_odds_dict) != len(outcomes_dict):
+                logger.debug(f"Skipping {market_key}: no arbitrage across {len(outcomes_dict)} outcomes")
+                continue
+            if not self._field_complete(outcomes_dict):
+                logger.info(f"Skipping {market_key}: prices sum below 1 but the field may be missing outcomes")
+                continue
+
+            opportunity = self._multiway_opportunity(data, best_odds_dict)
+            if opportunity:
+                arbitrage_opportunities.append(opportunity)
+
+        arbitrage_opportunities.sort(key=lambda x: x[13], reverse=True)  # Index 13 is profit_percentage
+        logger.info(f"Found {len(arbitrage_opportunities)} multi-way arbitrage opportunities" if arbitrage_opportunities else "No multi-way arbitrage opportunities found")
+        return arbitrage_opportunities
+
+    @staticmethod
+    def _field_complete(outcomes_dict):
+        """Return True when a multi-outcome market's outcomes are known to cover every result.
+
+        That is when it has a no-winner outcome such as "No Scorer", or when at least two bookies
+        quote it and every one of them lists the same outcomes.
+
+        Args:
+            outcomes_dict: outcome -> list of (bookie, odds), as grouped by _group_multiway.
+        """
+        if any(outcome and outcome.lower() in NO_WINNER_OUTCOMES for outcome in outcomes_dict):
+            return True
+        bookie_outcomes = {}
+        for outcome, odds_list in outcomes_dict.items():
+            for bookie, _ in odds_list:
+                bookie_outcomes.setdefault(bookie, set()).add(outcome)
+        return len(bookie_outcomes) >= 2 and all(len(outcomes) == len(outcomes_dict) for outcomes in bookie_outcomes.values())
+
+    def _multiway_opportunity(self, data, best_odds_dict):
+        """Solve the stake split of an N-outcome market so every outcome returns the same payout.
+
+        Args:
+            data: Market details (game_ID, Prop_Type, Player_Name, Betting_Point, sport_type,
+                last_updated_timestamp).
+            best_odds_dict: outcome -> (best American odds, bookie offering them), in first-seen order.
+
+        Returns:
+            Multi-way arbitrage tuple as returned by analyze_multiway, or None when the prices don't
+            clear min_profit_percentage.
+        """
+        decimal_odds = {
+            outcome: DECIMAL_ODDS[odds]
+            for outcome, (odds, _) in best_odds_dict.items()
+        }
+        if None in decimal_odds.values():
+            return None
+
+        S = sum(1 / d for d in decimal_odds.values())
+        if S >= 1:
+            return None
+        profit_percentage = (1 / S - 1) * 100
+        if profit_percentage < self.min_profit_percentage:
+            return None
+
+        # Stake each outcome in proportion to its inverse odds out of a total wager of $100
+        total_stake = 100
+        legs = tuple(
+            (bookie, outcome, odds, round(total_stake * (1 / decimal_odds[outcome]) / S, 2))
+            for outcome, (odds, bookie) in best_odds_dict.items()
+        )
+        (bookie1, outcome1, odds1, betamount1), (bookie2, outcome2, odds2, betamount2) = legs[:2]
+
+        return (
+            data["game_ID"],
+            data["Prop_Type"],
+            data["Player_Name"],
+            str(data["Betting_Point"]),
+            data["sport_type"],
+            bookie1,
+            outcome1,
+            odds1,
+            betamount1,
+            bookie2,
+            outcome2,
+            odds2,
+            betamount2,
+            round(profit_percentage, 2),
+            data["last_updated_timestamp"],
+            legs
+        )
+
+    def _analyze_numpy(self):
+        """Find arbitrage opportunities for every encoded prop group at once.
+
+        Each line lands in a slot (group * 2 + side). The best price per slot and the first line
+        offering it come from grouped reductions, and the 1/d1 + 1/d2 < 1 test runs over all
+        groups together. Only the groups that pass are turned into tuples, through the same
+        _opportunity used by the python engine, so both engines return identical results.
+        """
+        group_count = len(self.group_outcomes)
+        logger.info(f"Grouped {group_count} props for arbitrage analysis")
+        if not group_count:
+            logger.info("No arbitrage opportunities found")
+            return []
+
+        slots = np.array(self.line_groups, dtype=np.int64) * 2 + np.array(self.line_sides, dtype=np.int64)
+        odds = np.array(self.line_odds, dtype=np.float64)  # None becomes NaN and fails every comparison
+
+        # Best price per side among lines within max_odds
+        valid = np.flatnonzero(odds <= self.max_odds)
+        best = np.full(group_count * 2, -np.inf)
+        np.maximum.at(best, slots[valid], odds[valid])
+
+        # First line per side offering the best price, matching the python engine's tie-break
+        offering_best = valid[odds[valid] == best[slots[valid]]]
+        first_line = np.full(group_count * 2, len(odds), dtype=np.int64)
+        np.minimum.at(first_line, slots[offering_best], offering_best)
+
+        best_one, best_two = best[0::2], best[1::2]
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            decimal_one = np.where(best_one > 0, best_one / 100.0 + 1, 100.0 / np.abs(best_one) + 1)
+            decimal_two = np.where(best_two > 0, best_two / 100.0 + 1, 100.0 / np.abs(best_two) + 1)
+            S = 1 / decimal_one + 1 / decimal_two
+            profit_percentage = (1 / S - 1) * 100
+        candidates = np.flatnonzero(
+            np.isfinite(best_one) & np.isfinite(best_two) & (best_one != 0) & (best_two != 0)
+            & (S < 1) & (profit_percentage >= self.min_profit_percentage)
+        )
+
+        arbitrage_opportunities = []
+        for group in candidates.tolist():
+            line = self.group_lines[group]
+            outcome1 = self.group_outcomes[group]
+            outcome2 = OTHER_OUTCOME[outcome1]
+            line1 = int(first_line[group * 2])
+            line2 = int(first_line[group * 2 + 1])
+            data = {
+                "game_ID": line.game_id,
+                "Prop_Type": line.prop_type,
+                "Player_Name": line.player_name,
+                "Betting_Point": line.betting_point if outcome1 in ["over", "under"] else "N/A",
+                "sport_type": line.sport_type,
+                "last_updated_timestamp": line.last_updated_timestamp
+            }
+            best_odds_dict = {
+                outcome1: (self.line_odds[line1], self.line_bookies[line1]),
+                outcome2: (self.line_odds[line2], self.line_bookies[line2])
+            }
+            opportunity = self._opportunity(data, best_odds_dict)
+            if opportunity:
+                arbitrage_opportunities.append(opportunity)
 
         # Sort by profit percentage
         arbitrage_opportunities.sort(key=lambda x: x[13], reverse=True)  # Index 13 is profit_percentage
         logger.info(f"Found {len(arbitrage_opportunities)} arbitrage opportunities" if arbitrage_opportunities else "No arbitrage opportunities found")
-        return arbitrage_opportunities
\ No newline at end of file
+        return arbitrage_opportunities
@@ -0,0 +1,153 @@
+import gzip
+import json
+import logging
+import os
+import tempfile
+import uuid
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+def _props_key(row):
+    # (game_ID, last_update, bookie, prop_type, bet_type, player_name, price, point, sport_type)
+    return (row[0], row[2], row[3], row[4], row[5], row[7]), row[6]
+
+def _moneyline_key(row):
+    # (game_ID, bookie, matchup_type, team1, line1, team2, line2, event_timestamp, last_updated, sport_type)
+    return (row[0], row[1], row[2]), (row[3], row[4], row[5], row[6])
+
+def _spreads_key(row):
+    # (game_ID, bookie, matchup_type, team1, point1, line1, team2, point2, line2, event_timestamp, last_updated, sport_type)
+    return (row[0], row[1], row[2]), tuple(row[3:9])
+
+def _totals_key(row):
+    # (game_ID, bookie, matchup_type, home, away, ou1, total1, line1, ou2, total2, line2, event_timestamp, last_updated, sport_type)
+    return (row[0], row[1], row[2]), tuple(row[5:11])
+
+# Splits a row into (identity, price) for each kind of odds row
+KEY_FUNCTIONS = {
+    'props': _props_key,
+    'moneyline': _moneyline_key,
+    'spreads': _spreads_key,
+    'totals': _totals_key,
+}
+
+
+class OddsDeltaCache:
+    """Remembers the last price seen for every (game, bookie, market, outcome, point) so that only
+    rows whose price moved since the previous run are written to the history tables.
+
+    The cache is a gzip JSON file in the temp dir so it survives warm Lambda invocations, which
+    makes it per-container. Each save gets a new generation, which the caller also records in the
+    database. A cache whose generation is not the recorded one is missing, or was outrun by
+    another container. It is reseeded with seed() from the latest_ tables, so a price that moved
+    and moved back while another container ran is still compared against what was written last.
+    """
+
+    def __init__(self, cache_path=None):
+        """Initialize the cache and load the previous run's prices.
+
+        Args:
+            cache_path: Path of the cache file (default: ODDS_DELTA_CACHE_PATH env var, or the temp dir).
+        """
+        self.cache_path = cache_path or os.getenv(
+            'ODDS_DELTA_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'odds_delta_cache.json.gz')
+        )
+        self.prices = {kind: {} for kind in KEY_FUNCTIONS}
+        self.generation = None  # Changes on every save, so state derived from these prices can tell it is in sync
+        self._current = {}  # Prices seen so far by streamed comparisons, per kind
+        self.load()
+
+    def load(self):
+        """Load cached prices, starting empty if the file is missing or unreadable."""
+        try:
+            with gzip.open(self.cache_path, 'rt', encoding='utf-8') as f:
+                saved = json.load(f)
+            for kind in KEY_FUNCTIONS:
+                # JSON has no tuples, so keys and values come back as lists
+                self.prices[kind] = {
+                    tuple(key): tuple(value) if isinstance(value, list) else value
+                    for key, value in saved.get(kind, [])
+                }
+            self.generation = saved.get('generation')
+            logger.info(f"Loaded delta cache with {sum(len(p) for p in self.prices.values())} prices from {self.cache_path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not read delta cache from {self.cache_path}, starting fresh. Error: {e}")
+            self.prices = {kind: {} for kind in KEY_FUNCTIONS}
+            self.generation = None
+
+    def save(self):
+        """Persist the current prices for the next run."""
+        self.generation = uuid.uuid4().hex
+        try:
+            with gzip.open(self.cache_path, 'wt', encoding='utf-8') as f:
+                saved = {kind: [[list(key), value] for key, value in prices.items()]
+                         for kind, prices in self.prices.items()}
+                saved['generation'] = self.generation
+                json.dump(saved, f)
+        except Exception as e:
+            logger.error(f"Failed to save delta cache to {self.cache_path}. Error: {e}")
+
+    def seed(self, rows_by_kind):
+        """Replace the cached prices with the ones in rows, e.g. read back from the latest_ tables.
+
+        Args:
+            rows_by_kind: Dict of kind -> rows laid out like the Odds_API rows of that kind; kinds
+                left out keep their cached prices.
+        """
+        for kind, rows in rows_by_kind.items():
+            key_function = KEY_FUNCTIONS[kind]
+            self.prices[kind] = dict(key_function(row) for row in rows)
+        self.generation = None  # State derived from the old prices is out of sync
+        logger.info(f"Seeded delta cache with {sum(len(p) for p in self.prices.values())} prices")
+
+    def begin(self, kind):
+        """Start a streamed comparison of one kind of row; feed rows with check() and end with finish()."""
+        self._current[kind] = {}
+
+    def check(self, kind, rows):
+        """Compare a chunk of rows against the cached prices, returning the rows that are new or moved."""
+        key_function = KEY_FUNCTIONS[kind]
+        previous = self.prices[kind]
+        current = self._current[kind]
+        changed_rows = []
+
+        for row in rows:
+            key, price = key_function(row)
+            known = current[key] if key in current else previous.get(key, _MISSING)
+            if known != price:
+                changed_rows.append(row)
+            current[key] = price
+        return changed_rows
+
+    def finish(self, kind):
+        """Replace the cached prices with the ones seen since begin(), returning the keys no longer offered."""
+        current = self._current.pop(kind)
+        removed_keys = [key for key in self.prices[kind] if key not in current]
+        self.prices[kind] = current
+        return removed_keys
+
+    def diff(self, kind, rows):
+        """Compare rows against the cached prices and update the cache.
+
+        Args:
+            kind: One of 'props', 'moneyline', 'spreads' or 'totals'.
+            rows: Every current row of that kind, as produced by Odds_API.
+
+        Returns:
+            Tuple of (changed_rows, removed_keys): the rows that are new or whose price moved,
+            and the identity keys that were cached but are no longer offered.
+        """
+        self.begin(kind)
+        changed_rows = self.check(kind, rows)
+        removed_keys = self.finish(kind)
+        logger.info(f"Delta {kind}: {len(changed_rows)} of {len(rows)} rows changed, {len(removed_keys)} removed")
+        return changed_rows, removed_keys
+
+    def changed(self, kind, rows):
+        """Return only the rows that are new or whose price moved since the last run."""
+        changed_rows, _ = self.diff(kind, rows)
+        return changed_rows
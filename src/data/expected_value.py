@@ -1,22 +1,134 @@
 import logging
 from statistics import median
 
+try:
+    import numpy as np
+except ImportError:  # The Lambda bundle may ship without numpy; fall back to the Python engine
+    np = None
+
+from src.utils.odds_math import IMPLIED_PROBABILITY, expected_value
+
 logger = logging.getLogger(__name__)
 
+# filter_prop_bets criteria per prop type; prop types not listed are kept as they are
+PROP_BET_CRITERIA = {
+    # NBA
+    'player_points':         {'min_ev': 8, 'max_odds': 200,   'min_z_score': -1.15},
+    'player_rebounds':       {'min_ev': 6, 'max_odds': 200,   'min_z_score': -1.75},
+    'player_assists':        {'min_ev': 5, 'max_odds': 200,   'min_z_score': -1.45},
+    'player_steals':         {'min_ev': 5, 'max_odds': 250,   'min_z_score': -1.3},
+    'player_blocks':         {'min_ev': 10, 'max_odds': 400,  'min_z_score': -1.45},
+    'player_threes':         {'min_ev': 7, 'max_odds': 300,   'min_z_score': -1.3},
+    'player_points_assists': {'min_ev': 7, 'max_odds': 200,   'min_z_score': -1.75},
+    'player_rebounds_assists': {'min_ev': 8, 'max_odds': 200, 'min_z_score': -2.2},
+    'player_turnovers':      {'min_ev': 5, 'max_odds': 200,   'min_z_score': -1.15},
+    'player_double_double':  {'min_ev': 26, 'max_odds': 2200, 'min_z_score': -1.6},
+    'player_triple_double':  {'min_ev': 39, 'max_odds': 3000, 'min_z_score': -1.15},
+    # MLB
+    'batter_home_runs':    {'min_ev': 15, 'max_odds': 1300,   'min_z_score': -2.2},
+    'batter_doubles':      {'min_ev': 17, 'max_odds': 500,    'min_z_score': -2.2},
+    'batter_stolen_bases': {'min_ev': 17, 'max_odds': 500,    'min_z_score': -2.2},
+    'batter_singles':      {'min_ev': 6,  'max_odds': 300,    'min_z_score': -1.75},
+    'batter_triples':      {'min_ev': 5,  'max_odds': 1100,   'min_z_score': -1.75},
+    'batter_total_bases':  {'min_ev': 6,  'max_odds': 300,   'min_z_score': -1.75},
+    'batter_hits':         {'min_ev': 6,  'max_odds': 250,    'min_z_score': -1.6},
+    'batter_rbis':         {'min_ev': 10, 'max_odds': 300,    'min_z_score': -2.35},
+    # Add more sports/props here as needed
+}
+
+# Props with one winner among many players, analyzed per game rather than per player
+MULTI_OUTCOME_PROPS = {
+    'player_1st_td', 'player_last_td', 'player_first_basket', 'player_first_team_basket',
+    'player_goal_scorer_first', 'player_goal_scorer_last', 'batter_first_home_run'
+}
+
+
+def _first_odds_by_bookie(odds_list):
+    """Map each bookie to the first odds it quotes in a list of (bookie, odds) pairs."""
+    first_odds = {}
+    for bookie, odds in odds_list:
+        if bookie not in first_odds:
+            first_odds[bookie] = odds
+    return first_odds
+
+
+class SideStats:
+    """Count, mean, variance and median of one market side's implied probabilities.
+
+    Built once per side and shared by every bookie's z-score on it. The mean and population
+    variance are accumulated in one pass with Welford's update; the median is computed on first
+    use and cached.
+    """
+    __slots__ = ('values', 'count', 'mean', 'm2', '_median')
+
+    def __init__(self, values=()):
+        self.values = []
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._median = None
+        for value in values:
+            self.add(value)
+
+    def add(self, value):
+        """Add one value to the running statistics."""
+        self.values.append(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self._median = None
+
+    @property
+    def std(self):
+        """Population standard deviation, or None for fewer than two values."""
+        if self.count < 2:
+            return None
+        return (self.m2 / self.count) ** 0.5
+
+    @property
+    def median(self):
+        """Median of the values, or None when there are none."""
+        if self._median is None and self.values:
+            self._median = median(self.values)
+        return self._median
+
+    def z_score(self, value):
+        """z-score of value against this side, 0 when every price agrees, None for fewer than two values."""
+        std = self.std
+        if std is None:
+            return None
+        if std == 0:
+            return 0
+        return (value - self.mean) / std
+
+
 class ExpectedValueAnalyzer:
-    def __init__(self, bet_lines, min_bookies=2, ev_target=5, long_shot_threshold=400, long_shot_inflate=0.07, favorite_threshold=125, favorite_deflate=0.07, high_ev_target=15):
+    def __init__(self, bet_lines=None, min_bookies=2, ev_target=5, long_shot_threshold=400, long_shot_inflate=0.07, favorite_threshold=125, favorite_deflate=0.07, high_ev_target=15, engine='auto'):
         """Initialize the analyzer with bet lines (moneylines or props) and a minimum bookie threshold.
         
         Args:
-            bet_lines: List of betting lines to analyze.
+            bet_lines: List of GameLine or PropBet rows to analyze; for props, leave empty and call add_prop_lines to stream them in.
             min_bookies: Minimum number of bookies required (default: 2).
             ev_target: Target EV threshold for +EV bets (default: 7.5).
             long_shot_threshold: Odds threshold for long shots (default: 400).
             long_shot_inflate: Additional overround inflation for long shots (default: 0.03).
             favorite_threshold: Odds threshold for favorites (default: -100).
             favorite_deflate: Overround deflation for favorites (default: 0.015).
+            engine: 'python' for the per-group loops, 'numpy' to score every prop row at once on
+                arrays, or 'auto' to use numpy when it is installed (default: 'auto'). Only
+                analyze_prop and filter_prop_bets have a numpy path.
         """
-        self.bet_lines = bet_lines
+        if engine == 'auto':
+            engine = 'numpy' if np is not None else 'python'
+        if engine == 'numpy' and np is None:
+            logger.warning("numpy is not installed, using the python expected value engine")
+            engine = 'python'
+        self.engine = engine
+        self.bet_lines = bet_lines if bet_lines is not None else []
+        self.multi_outcome_dict = {}
+        self.single_outcome_dict = {}
+        self.prop_lines_grouped = 0
         self.high_ev_target = high_ev_target
         self.min_bookies = min_bookies
         self.z_score_limit_types = ['batter_home_runs', 'batter_doubles']
@@ -39,41 +151,16 @@ class ExpectedValueAnalyzer:
         self.inflate_prop = {'player_goal_scorer_first'}
         self.inflate_rate = 0.01  # Base inflation rate for bets without both sides
         self.z_score_limit = -1.2  # Default z-score threshold
-        self.multi_outcome_props = {
-            'player_1st_td', 'player_last_td', 'player_first_basket', 'player_first_team_basket',
-            'player_goal_scorer_first', 'player_goal_scorer_last', 'batter_first_home_run'
-        }
+        self.multi_outcome_props = set(MULTI_OUTCOME_PROPS)
+        self.median_overround = None  # Set to pin the global median overround instead of computing it from the loaded props
         self.long_shot_threshold = long_shot_threshold
         self.long_shot_inflate = long_shot_inflate
         self.favorite_threshold = favorite_threshold
         self.favorite_deflate = favorite_deflate
 
     def filter_prop_bets(self, bets):
-        # Combine all sports' criteria here
-        all_criteria = {
-            # NBA
-            'player_points':         {'min_ev': 8, 'max_odds': 200,   'min_z_score': -1.15},
-            'player_rebounds':       {'min_ev': 6, 'max_odds': 200,   'min_z_score': -1.75},
-            'player_assists':        {'min_ev': 5, 'max_odds': 200,   'min_z_score': -1.45},
-            'player_steals':         {'min_ev': 5, 'max_odds': 250,   'min_z_score': -1.3},
-            'player_blocks':         {'min_ev': 10, 'max_odds': 400,  'min_z_score': -1.45},
-            'player_threes':         {'min_ev': 7, 'max_odds': 300,   'min_z_score': -1.3},
-            'player_points_assists': {'min_ev': 7, 'max_odds': 200,   'min_z_score': -1.75},
-            'player_rebounds_assists': {'min_ev': 8, 'max_odds': 200, 'min_z_score': -2.2},
-            'player_turnovers':      {'min_ev': 5, 'max_odds': 200,   'min_z_score': -1.15},
-            'player_double_double':  {'min_ev': 26, 'max_odds': 2200, 'min_z_score': -1.6},
-            'player_triple_double':  {'min_ev': 39, 'max_odds': 3000, 'min_z_score': -1.15},
-            # MLB
-            'batter_home_runs':    {'min_ev': 15, 'max_odds': 1300,   'min_z_score': -2.2},
-            'batter_doubles':      {'min_ev': 17, 'max_odds': 500,    'min_z_score': -2.2},
-            'batter_stolen_bases': {'min_ev': 17, 'max_odds': 500,    'min_z_score': -2.2},
-            'batter_singles':      {'min_ev': 6,  'max_odds': 300,    'min_z_score': -1.75},
-            'batter_triples':      {'min_ev': 5,  'max_odds': 1100,   'min_z_score': -1.75},
-            'batter_total_bases':  {'min_ev': 6,  'max_odds': 300,   'min_z_score': -1.75},
-            'batter_hits':         {'min_ev': 6,  'max_odds': 250,    'min_z_score': -1.6},
-            'batter_rbis':         {'min_ev': 10, 'max_odds': 300,    'min_z_score': -2.35},
-            # Add more sports/props here as needed
-        }
+        if self.engine == 'numpy' and bets:
+            return self._filter_prop_bets_numpy(bets)
 
         filtered = []
         for row in bets:
@@ -81,7 +168,7 @@ class ExpectedValueAnalyzer:
             odds = row[6]
             ev = row[7]
             z_score = row[14] if len(row) > 14 else None
-            crit = all_criteria.get(prop_type)
+            crit = PROP_BET_CRITERIA.get(prop_type)
             # If prop_type is not in criteria, keep the bet (no filtering)
             if not crit:
                 filtered.append(row)
@@ -102,32 +189,25 @@ class ExpectedValueAnalyzer:
 
     def calculate_implied_probability(self, odds):
         """Calculate the implied probability based on American odds."""
-        if odds > 0:
-            return 100 / (odds + 100)
-        elif odds < 0:
-            return -odds / (-odds + 100)
-        else:
-            return None
+        return IMPLIED_PROBABILITY[odds]
 
     def calculate_expected_value(self, odds, fair_probability):
         """Calculate the expected value (EV) of a bet for a standard $100 bet."""
-        bet_amount = 100
-        if odds > 0:
-            payout = (odds / 100) * bet_amount
-        else:
-            payout = (100 / abs(odds)) * bet_amount
-        return (fair_probability * payout) - ((1 - fair_probability) * bet_amount)
+        return expected_value(odds, fair_probability)
 
     def calculate_z_score(self, imp_prob, imp_probs_list):
-        """Calculate the z-score of an implied probability given a list of implied probabilities."""
-        if len(imp_probs_list) < 2:
+        """Calculate the z-score of an implied probability given a list of implied probabilities.
+
+        Prefer building a SideStats once per side and calling its z_score for each bookie.
+        """
+        return SideStats(imp_probs_list).z_score(imp_prob)
+
+    def z_score_stats(self, imp_probs_list):
+        """Return the (mean, standard deviation) used by calculate_z_score, or None for fewer than two values."""
+        stats = SideStats(imp_probs_list)
+        if stats.std is None:
             return None
-        mean_imp = sum(imp_probs_list) / len(imp_probs_list)
-        variance = sum((p - mean_imp) ** 2 for p in imp_probs_list) / len(imp_probs_list)
-        std_imp = variance ** 0.5
-        if std_imp == 0:
-            return 0
-        return (imp_prob - mean_imp) / std_imp
+        return stats.mean, stats.std
 
     def calculate_estimated_ev(self, data, side, overround_est, best_bets):
         """Calculate EV for a single outcome prop side using an estimated overround, adjusted for long shots and favorites."""
@@ -138,10 +218,11 @@ class ExpectedValueAnalyzer:
         if side not in outcomes or len(outcomes[side]) < min_bookies:
             return
 
+        side_stats = None
         for bookie, odds in outcomes[side]:
             if odds is None or odds > self.odds_max:
                 continue
-            imp_prob = self.calculate_implied_probability(odds)
+            imp_prob = IMPLIED_PROBABILITY[odds]
             if imp_prob is None:
                 continue
             # Adjust overround based on odds
@@ -151,10 +232,11 @@ class ExpectedValueAnalyzer:
             elif odds < self.favorite_threshold:
                 adjusted_overround_est = max(1.0, adjusted_overround_est - self.favorite_deflate)  # Decrease for favorites, ensure > 1.0
             fair_prob = imp_prob / adjusted_overround_est
-            ev = self.calculate_expected_value(odds, fair_prob)
+            ev = expected_value(odds, fair_prob)
             if ev > self.ev_target:
-                imp_probs = [self.calculate_implied_probability(o) for _, o in outcomes[side] if o is not None]
-                z_score = self.calculate_z_score(imp_prob, imp_probs)
+                if side_stats is None:
+                    side_stats = SideStats(IMPLIED_PROBABILITY[o] for _, o in outcomes[side] if o is not None)
+                z_score = side_stats.z_score(imp_prob)
                 if z_score is not None and z_score <= z_score_limit:
                     if side in ["yes", "no"]:
                         unique_key = (data['game_ID'], data['Prop_Type'], data['Player_Name'], side)
@@ -177,21 +259,21 @@ class ExpectedValueAnalyzer:
         logger.debug("Starting moneyline analysis...")
         game_dict = {}
         for line in self.bet_lines:
-            game_id, bookie, matchup_type, team_1, odds_1, team_2, odds_2, event_timestamp, last_updated_timestamp, sport_type = line
-            logger.debug(f"Processing line for game_ID {game_id} from bookie {bookie}")
+            game_id = line.game_id
+            logger.debug(f"Processing line for game_ID {game_id} from bookie {line.bookie}")
             if game_id not in game_dict:
                 game_dict[game_id] = {
                     'game_ID': game_id,
-                    'teams': (team_1, team_2),
+                    'teams': (line.home_team, line.away_team),
                     'team1_odds': [],
                     'team2_odds': [],
-                    'Matchup_Type': matchup_type,
-                    'sport_type': sport_type,
-                    'event_timestamp': event_timestamp,
-                    'last_updated_timestamp': last_updated_timestamp
+                    'Matchup_Type': line.matchup_type,
+                    'sport_type': line.sport_type,
+                    'event_timestamp': line.event_timestamp,
+                    'last_updated_timestamp': line.last_updated_timestamp
                 }
-            game_dict[game_id]['team1_odds'].append((bookie, odds_1))
-            game_dict[game_id]['team2_odds'].append((bookie, odds_2))
+            game_dict[game_id]['team1_odds'].append((line.bookie, line.line_1))
+            game_dict[game_id]['team2_odds'].append((line.bookie, line.line_2))
 
         self.results = []
         logger.debug(f"Grouped {len(game_dict)} games for analysis")
@@ -209,8 +291,8 @@ class ExpectedValueAnalyzer:
                 if bookie1 != bookie2:
                     logger.warning(f"Mismatch in bookies for game_ID {game_id}")
                     continue
-                imp_prob1 = self.calculate_implied_probability(odds1)
-                imp_prob2 = self.calculate_implied_probability(odds2)
+                imp_prob1 = IMPLIED_PROBABILITY[odds1]
+                imp_prob2 = IMPLIED_PROBABILITY[odds2]
                 if imp_prob1 is None or imp_prob2 is None:
                     continue
                 overround = imp_prob1 + imp_prob2
@@ -224,133 +306,169 @@ class ExpectedValueAnalyzer:
 
             true_prob_team1 = median(no_vig_probs_team1)
             true_prob_team2 = 1 - true_prob_team1
+            median_no_vig_prob = round(true_prob_team1, 4)  # Reported in the Market_Overround column
 
             for bookie, odds in data['team1_odds']:
                 if odds is None:
                     continue
-                ev = self.calculate_expected_value(odds, true_prob_team1)
+                ev = expected_value(odds, true_prob_team1)
                 if ev > self.ev_target:
-                    imp_prob = self.calculate_implied_probability(odds)
+                    imp_prob = IMPLIED_PROBABILITY[odds]
                     self.results.append((
                         data['game_ID'], bookie, data['Matchup_Type'], data['teams'][0], odds,
                         round(ev, 2), round(true_prob_team1, 4), round(imp_prob, 4),
-                        round(median(no_vig_probs_team1), 4), data['sport_type'], data['event_timestamp'],
+                        median_no_vig_prob, data['sport_type'], data['event_timestamp'],
                         data['last_updated_timestamp']
                     ))
 
             for bookie, odds in data['team2_odds']:
                 if odds is None:
                     continue
-                ev = self.calculate_expected_value(odds, true_prob_team2)
+                ev = expected_value(odds, true_prob_team2)
                 if ev > self.ev_target:
-                    imp_prob = self.calculate_implied_probability(odds)
+                    imp_prob = IMPLIED_PROBABILITY[odds]
                     self.results.append((
                         data['game_ID'], bookie, data['Matchup_Type'], data['teams'][1], odds,
                         round(ev, 2), round(true_prob_team2, 4), round(imp_prob, 4),
-                        round(median(no_vig_probs_team1), 4), data['sport_type'], data['event_timestamp'],
+                        median_no_vig_prob, data['sport_type'], data['event_timestamp'],
                         data['last_updated_timestamp']
                     ))
 
         logger.info(f"Moneyline analysis completed. Found {len(self.results)} +EV opportunities")
         return self.results
 
+    def add_prop_lines(self, lines):
+        """Group a chunk of prop bet lines so props can be streamed in event by event.
+
+        Args:
+            lines: List of PropBet rows from Odds_API.
+        """
+        multi_outcome_dict = self.multi_outcome_dict
+        single_outcome_dict = self.single_outcome_dict
+        for line in lines:
+            game_id = line.game_id
+            prop_type = line.prop_type
+            player_name = line.player_name
+            bet_type = line.bet_type.lower()
+            if prop_type in self.multi_outcome_props and bet_type == "yes":
+                game_key = (game_id, prop_type)
+                if game_key not in multi_outcome_dict:
+                    multi_outcome_dict[game_key] = {
+                        'game_ID': game_id,
+                        'Prop_Type': prop_type,
+                        'sport_type': line.sport_type,
+                        'last_updated_timestamp': line.last_updated_timestamp,
+                        'players': {}
+                    }
+                if player_name not in multi_outcome_dict[game_key]['players']:
+                    multi_outcome_dict[game_key]['players'][player_name] = []
+                multi_outcome_dict[game_key]['players'][player_name].append((line.bookie, line.betting_line))
+            elif bet_type in ["yes", "no"]:
+                key = (game_id, prop_type, player_name)
+                if key not in single_outcome_dict:
+                    single_outcome_dict[key] = {
+                        'game_ID': game_id,
+                        'Prop_Type': prop_type,
+                        'Player_Name': player_name,
+                        'sport_type': line.sport_type,
+                        'last_updated_timestamp': line.last_updated_timestamp,
+                        'outcomes': {}
+                    }
+                if bet_type not in single_outcome_dict[key]['outcomes']:
+                    single_outcome_dict[key]['outcomes'][bet_type] = []
+                single_outcome_dict[key]['outcomes'][bet_type].append((line.bookie, line.betting_line))
+            elif bet_type in ["over", "under"]:
+                key = (game_id, prop_type, player_name, line.betting_point)
+                if key not in single_outcome_dict:
+                    single_outcome_dict[key] = {
+                        'game_ID': game_id,
+                        'Prop_Type': prop_type,
+                        'Player_Name': player_name,
+                        'Betting_Point': line.betting_point,
+                        'sport_type': line.sport_type,
+                        'last_updated_timestamp': line.last_updated_timestamp,
+                        'outcomes': {}
+                    }
+                if bet_type not in single_outcome_dict[key]['outcomes']:
+                    single_outcome_dict[key]['outcomes'][bet_type] = []
+                single_outcome_dict[key]['outcomes'][bet_type].append((line.bookie, line.betting_line))
+            else:
+                logger.debug(f"Skipping unknown bet_type {line.bet_type} for prop {line}")
+                continue
+        self.prop_lines_grouped += len(lines)
+
+    def prop_overrounds(self):
+        """Overrounds of every bookie quoting both sides of a grouped single-outcome prop.
+
+        Returns:
+            Dict mapping each single-outcome prop key to its list of overrounds; the global
+            median of all of them normalizes the yes/no props.
+        """
+        prop_overrounds = {}
+        for key, data in self.single_outcome_dict.items():
+            outcomes = data['outcomes']
+            overrounds = []
+            if "yes" in outcomes and "no" in outcomes:
+                first_yes = _first_odds_by_bookie(outcomes["yes"])
+                first_no = _first_odds_by_bookie(outcomes["no"])
+                bookies_both = first_yes.keys() & first_no.keys()
+                for bookie in bookies_both:
+                    odds_yes = first_yes[bookie]
+                    odds_no = first_no[bookie]
+                    imp_prob_yes = IMPLIED_PROBABILITY[odds_yes]
+                    imp_prob_no = IMPLIED_PROBABILITY[odds_no]
+                    if imp_prob_yes is not None and imp_prob_no is not None:
+                        overround = imp_prob_yes + imp_prob_no
+                        if overround > 0:
+                            overrounds.append(overround)
+            elif "over" in outcomes and "under" in outcomes:
+                first_over = _first_odds_by_bookie(outcomes["over"])
+                first_under = _first_odds_by_bookie(outcomes["under"])
+                bookies_both = first_over.keys() & first_under.keys()
+                for bookie in bookies_both:
+                    odds_over = first_over[bookie]
+                    odds_under = first_under[bookie]
+                    imp_prob_over = IMPLIED_PROBABILITY[odds_over]
+                    imp_prob_under = IMPLIED_PROBABILITY[odds_under]
+                    if imp_prob_over is not None and imp_prob_under is not None:
+                        overround = imp_prob_over + imp_prob_under
+                        if overround > 0:
+                            overrounds.append(overround)
+            if overrounds:
+                prop_overrounds[key] = overrounds
+        return prop_overrounds
+
     def analyze_prop(self):
             """Analyze prop bets to find the highest +EV bet for each unique player name, prop type, and betting point."""
-            logger.info(f"Number of bet lines loaded: {len(self.bet_lines)}")
-            if not self.bet_lines:
+            if self.bet_lines and not self.prop_lines_grouped:
+                self.add_prop_lines(self.bet_lines)
+
+            logger.info(f"Number of bet lines loaded: {self.prop_lines_grouped}")
+            if not self.prop_lines_grouped:
                 logger.error("No bet lines to analyze.")
                 return []
 
-            multi_outcome_dict = {}
-            single_outcome_dict = {}
+            multi_outcome_dict = self.multi_outcome_dict
+            single_outcome_dict = self.single_outcome_dict
             best_bets = {}
 
-            # Group prop bets
-            for line in self.bet_lines:
-                game_id, last_updated_timestamp, bookie, prop_type, bet_type, player_name, betting_line, betting_point, sport_type = line
-                if prop_type in self.multi_outcome_props and bet_type.lower() == "yes":
-                    game_key = (game_id, prop_type)
-                    if game_key not in multi_outcome_dict:
-                        multi_outcome_dict[game_key] = {
-                            'game_ID': game_id,
-                            'Prop_Type': prop_type,
-                            'sport_type': sport_type,
-                            'last_updated_timestamp': last_updated_timestamp,
-                            'players': {}
-                        }
-                    if player_name not in multi_outcome_dict[game_key]['players']:
-                        multi_outcome_dict[game_key]['players'][player_name] = []
-                    multi_outcome_dict[game_key]['players'][player_name].append((bookie, betting_line))
-                elif bet_type.lower() in ["yes", "no"]:
-                    key = (game_id, prop_type, player_name)
-                    if key not in single_outcome_dict:
-                        single_outcome_dict[key] = {
-                            'game_ID': game_id,
-                            'Prop_Type': prop_type,
-                            'Player_Name': player_name,
-                            'sport_type': sport_type,
-                            'last_updated_timestamp': last_updated_timestamp,
-                            'outcomes': {}
-                        }
-                    if bet_type.lower() not in single_outcome_dict[key]['outcomes']:
-                        single_outcome_dict[key]['outcomes'][bet_type.lower()] = []
-                    single_outcome_dict[key]['outcomes'][bet_type.lower()].append((bookie, betting_line))
-                elif bet_type.lower() in ["over", "under"]:
-                    key = (game_id, prop_type, player_name, betting_point)
-                    if key not in single_outcome_dict:
-                        single_outcome_dict[key] = {
-                            'game_ID': game_id,
-                            'Prop_Type': prop_type,
-                            'Player_Name': player_name,
-                            'Betting_Point': betting_point,
-                            'sport_type': sport_type,
-                            'last_updated_timestamp': last_updated_timestamp,
-                            'outcomes': {}
-                        }
-                    if bet_type.lower() not in single_outcome_dict[key]['outcomes']:
-                        single_outcome_dict[key]['outcomes'][bet_type.lower()] = []
-                    single_outcome_dict[key]['outcomes'][bet_type.lower()].append((bookie, betting_line))
-                else:
-                    logger.debug(f"Skipping unknown bet_type {bet_type} for prop {line}")
-                    continue
-
             logger.info(f"Grouped {len(multi_outcome_dict)} multi-outcome props and {len(single_outcome_dict)} single-outcome props")
 
-            # Collect overrounds for median vig calculation
-            all_overrounds = []
-            for key, data in single_outcome_dict.items():
-                outcomes = data['outcomes']
-                min_bookies = self.get_bookie_limit(data['Prop_Type'])
-                if "yes" in outcomes and "no" in outcomes:
-                    bookies_both = set(bookie for bookie, _ in outcomes["yes"]) & set(bookie for bookie, _ in outcomes["no"])
-                    for bookie in bookies_both:
-                        odds_yes = next(odds for b, odds in outcomes["yes"] if b == bookie)
-                        odds_no = next(odds for b, odds in outcomes["no"] if b == bookie)
-                        imp_prob_yes = self.calculate_implied_probability(odds_yes)
-                        imp_prob_no = self.calculate_implied_probability(odds_no)
-                        if imp_prob_yes is not None and imp_prob_no is not None:
-                            overround = imp_prob_yes + imp_prob_no
-                            if overround > 0:
-                                all_overrounds.append(overround)
-                elif "over" in outcomes and "under" in outcomes:
-                    bookies_both = set(bookie for bookie, _ in outcomes["over"]) & set(bookie for bookie, _ in outcomes["under"])
-                    for bookie in bookies_both:
-                        odds_over = next(odds for b, odds in outcomes["over"] if b == bookie)
-                        odds_under = next(odds for b, odds in outcomes["under"] if b == bookie)
-                        imp_prob_over = self.calculate_implied_probability(odds_over)
-                        imp_prob_under = self.calculate_implied_probability(odds_under)
-                        if imp_prob_over is not None and imp_prob_under is not None:
-                            overround = imp_prob_over + imp_prob_under
-                            if overround > 0:
-                                all_overrounds.append(overround)
-
-            # Compute estimated overround
-            if all_overrounds:
-                median_overround = median(all_overrounds)
+            if self.engine == 'numpy':
+                return self._analyze_prop_numpy()
+
+            # Compute estimated overround, unless the caller pinned the median
+            if self.median_overround is not None:
+                median_overround = self.median_overround
                 overround_est = median_overround + self.inflate_rate
             else:
-                logger.warning("No overrounds collected; using default overround_est")
-                overround_est = 1.15 + self.inflate_rate
+                all_overrounds = [overround for overrounds in self.prop_overrounds().values() for overround in overrounds]
+                if all_overrounds:
+                    median_overround = median(all_overrounds)
+                    overround_est = median_overround + self.inflate_rate
+                else:
+                    logger.warning("No overrounds collected; using default overround_est")
+                    overround_est = 1.15 + self.inflate_rate
 
             # Analyze multi-outcome props
             for game_key, game_data in multi_outcome_dict.items():
@@ -369,7 +487,7 @@ class ExpectedValueAnalyzer:
                     odds = [o for _, o in odds_list if o is not None]
                     if not odds:
                         continue
-                    imp_probs = [self.calculate_implied_probability(o) for o in odds if self.calculate_implied_probability(o) is not None]
+                    imp_probs = [IMPLIED_PROBABILITY[o] for o in odds if IMPLIED_PROBABILITY[o] is not None]
                     if imp_probs:
                         median_imp_prob = median(imp_probs)
                         player_median_probs[player_name] = (median_imp_prob, odds_list)
@@ -386,14 +504,16 @@ class ExpectedValueAnalyzer:
                     if len(bookies) < min_bookies:
                         continue
                     fair_prob = median_imp_prob / market_overround if market_overround > 0 else 0
-                    imp_probs = [self.calculate_implied_probability(o) for _, o in odds_list if o is not None]
+                    player_stats = None
                     for bookie, odds in odds_list:
                         if odds is None or odds > self.odds_max:
                             continue
-                        ev = self.calculate_expected_value(odds, fair_prob)
+                        ev = expected_value(odds, fair_prob)
                         if ev > self.ev_target:
-                            imp_prob = self.calculate_implied_probability(odds)
-                            z_score = self.calculate_z_score(imp_prob, imp_probs)
+                            imp_prob = IMPLIED_PROBABILITY[odds]
+                            if player_stats is None:
+                                player_stats = SideStats(IMPLIED_PROBABILITY[o] for _, o in odds_list if o is not None)
+                            z_score = player_stats.z_score(imp_prob)
                             if z_score is not None and z_score <= z_score_limit:
                                 unique_key = (game_data['game_ID'], game_data['Prop_Type'], player_name)
                                 bet_tuple = (
@@ -416,8 +536,8 @@ class ExpectedValueAnalyzer:
                         bookies_both = set(bookie for bookie, _ in outcomes["yes"]) & set(bookie for bookie, _ in outcomes["no"])
                         if len(bookies_both) >= min_bookies:
                             # Weighted average method
-                            imp_probs_yes = [self.calculate_implied_probability(odds) for _, odds in outcomes["yes"] if odds is not None and self.calculate_implied_probability(odds) is not None]
-                            imp_probs_no = [self.calculate_implied_probability(odds) for _, odds in outcomes["no"] if odds is not None and self.calculate_implied_probability(odds) is not None]
+                            imp_probs_yes = [IMPLIED_PROBABILITY[odds] for _, odds in outcomes["yes"] if odds is not None and IMPLIED_PROBABILITY[odds] is not None]
+                            imp_probs_no = [IMPLIED_PROBABILITY[odds] for _, odds in outcomes["no"] if odds is not None and IMPLIED_PROBABILITY[odds] is not None]
                             if imp_probs_yes and imp_probs_no:
                                 # Equal weights for simplicity
                                 avg_imp_prob_yes = sum(imp_probs_yes) / len(imp_probs_yes) if imp_probs_yes else 0
@@ -435,17 +555,19 @@ class ExpectedValueAnalyzer:
                                 logger.debug(f"Skipping {key}: No valid implied probabilities for yes or no")
                                 continue
 
+                            yes_stats = None
                             for bookie, odds in outcomes["yes"]:
                                 if odds is None or odds > self.odds_max:
                                     continue
                                 adjusted_true_prob_yes = true_prob_yes
                                 if odds > self.long_shot_threshold:
                                     adjusted_true_prob_yes *= (1 - self.long_shot_inflate)
-                                ev = self.calculate_expected_value(odds, adjusted_true_prob_yes)
+                                ev = expected_value(odds, adjusted_true_prob_yes)
                                 if (data['Prop_Type'] in self.high_ev_props and ev > self.high_ev_target) or (data['Prop_Type'] not in self.high_ev_props and ev > self.ev_target):
-                                    imp_prob = self.calculate_implied_probability(odds)
-                                    imp_probs_yes = [self.calculate_implied_probability(o) for _, o in outcomes["yes"] if o is not None]
-                                    z_score = self.calculate_z_score(imp_prob, imp_probs_yes)
+                                    imp_prob = IMPLIED_PROBABILITY[odds]
+                                    if yes_stats is None:
+                                        yes_stats = SideStats(IMPLIED_PROBABILITY[o] for _, o in outcomes["yes"] if o is not None)
+                                    z_score = yes_stats.z_score(imp_prob)
                                     if z_score is not None and z_score <= z_score_limit:
                                         unique_key = (data['game_ID'], data['Prop_Type'], data['Player_Name'], "yes")
                                         bet_tuple = (
@@ -459,17 +581,19 @@ class ExpectedValueAnalyzer:
                                         if unique_key not in best_bets or ev > best_bets[unique_key][7]:
                                             best_bets[unique_key] = bet_tuple
 
+                            no_stats = None
                             for bookie, odds in outcomes["no"]:
                                 if odds is None or odds > self.odds_max:
                                     continue
                                 adjusted_true_prob_no = true_prob_no
                                 if odds > self.long_shot_threshold:
                                     adjusted_true_prob_no *= (1 - self.long_shot_inflate)
-                                ev = self.calculate_expected_value(odds, adjusted_true_prob_no)
+                                ev = expected_value(odds, adjusted_true_prob_no)
                                 if ev > self.ev_target:
-                                    imp_prob = self.calculate_implied_probability(odds)
-                                    imp_probs_no = [self.calculate_implied_probability(o) for _, o in outcomes["no"] if o is not None]
-                                    z_score = self.calculate_z_score(imp_prob, imp_probs_no)
+                                    imp_prob = IMPLIED_PROBABILITY[odds]
+                                    if no_stats is None:
+                                        no_stats = SideStats(IMPLIED_PROBABILITY[o] for _, o in outcomes["no"] if o is not None)
+                                    z_score = no_stats.z_score(imp_prob)
                                     if z_score is not None and z_score <= z_score_limit:
                                         unique_key = (data['game_ID'], data['Prop_Type'], data['Player_Name'], "no")
                                         bet_tuple = (
@@ -493,15 +617,17 @@ class ExpectedValueAnalyzer:
 
                 elif "over" in outcomes or "under" in outcomes:
                     if "over" in outcomes and "under" in outcomes:
-                        bookies_both = set(bookie for bookie, _ in outcomes["over"]) & set(bookie for bookie, _ in outcomes["under"])
+                        first_over = _first_odds_by_bookie(outcomes["over"])
+                        first_under = _first_odds_by_bookie(outcomes["under"])
+                        bookies_both = first_over.keys() & first_under.keys()
                         if len(bookies_both) >= min_bookies:
                             # Accurate method for over/under
                             no_vig_probs_over = []
                             for bookie in bookies_both:
-                                odds_over = next(odds for b, odds in outcomes["over"] if b == bookie)
-                                odds_under = next(odds for b, odds in outcomes["under"] if b == bookie)
-                                imp_prob_over = self.calculate_implied_probability(odds_over)
-                                imp_prob_under = self.calculate_implied_probability(odds_under)
+                                odds_over = first_over[bookie]
+                                odds_under = first_under[bookie]
+                                imp_prob_over = IMPLIED_PROBABILITY[odds_over]
+                                imp_prob_under = IMPLIED_PROBABILITY[odds_under]
                                 if imp_prob_over is None or imp_prob_under is None:
                                     continue
                                 overround = imp_prob_over + imp_prob_under
@@ -513,49 +639,54 @@ class ExpectedValueAnalyzer:
                                 continue
                             true_prob_over = median(no_vig_probs_over)
                             true_prob_under = 1 - true_prob_over
+                            median_no_vig_prob = round(true_prob_over, 4)  # Reported in the Market_Overround column
 
+                            over_stats = None
                             for bookie, odds in outcomes["over"]:
                                 if odds is None or odds > self.odds_max:
                                     continue
                                 adjusted_true_prob_over = true_prob_over
                                 if odds > self.long_shot_threshold:
                                     adjusted_true_prob_over *= (1 - self.long_shot_inflate)
-                                ev = self.calculate_expected_value(odds, adjusted_true_prob_over)
+                                ev = expected_value(odds, adjusted_true_prob_over)
                                 if ev > self.ev_target:
-                                    imp_prob = self.calculate_implied_probability(odds)
-                                    imp_probs_over = [self.calculate_implied_probability(o) for _, o in outcomes["over"] if o is not None]
-                                    z_score = self.calculate_z_score(imp_prob, imp_probs_over)
+                                    imp_prob = IMPLIED_PROBABILITY[odds]
+                                    if over_stats is None:
+                                        over_stats = SideStats(IMPLIED_PROBABILITY[o] for _, o in outcomes["over"] if o is not None)
+                                    z_score = over_stats.z_score(imp_prob)
                                     if z_score is not None and z_score <= z_score_limit:
                                         unique_key = (data['game_ID'], data['Prop_Type'], data['Player_Name'], data['Betting_Point'], "over")
                                         bet_tuple = (
                                             data['game_ID'], bookie, data['Prop_Type'], "over",
                                             data['Player_Name'], data['Betting_Point'], odds,
                                             round(ev, 2), round(adjusted_true_prob_over, 4), round(imp_prob, 4),
-                                            round(median(no_vig_probs_over), 4), data['sport_type'],
+                                            median_no_vig_prob, data['sport_type'],
                                             data['last_updated_timestamp'], len(outcomes["over"]),
                                             round(z_score, 2) if z_score is not None else None
                                         )
                                         if unique_key not in best_bets or ev > best_bets[unique_key][7]:
                                             best_bets[unique_key] = bet_tuple
 
+                            under_stats = None
                             for bookie, odds in outcomes["under"]:
                                 if odds is None or odds > self.odds_max:
                                     continue
                                 adjusted_true_prob_under = true_prob_under
                                 if odds > self.long_shot_threshold:
                                     adjusted_true_prob_under *= (1 - self.long_shot_inflate)
-                                ev = self.calculate_expected_value(odds, adjusted_true_prob_under)
+                                ev = expected_value(odds, adjusted_true_prob_under)
                                 if ev > self.ev_target:
-                                    imp_prob = self.calculate_implied_probability(odds)
-                                    imp_probs_under = [self.calculate_implied_probability(o) for _, o in outcomes["under"] if o is not None]
-                                    z_score = self.calculate_z_score(imp_prob, imp_probs_under)
+                                    imp_prob = IMPLIED_PROBABILITY[odds]
+                                    if under_stats is None:
+                                        under_stats = SideStats(IMPLIED_PROBABILITY[o] for _, o in outcomes["under"] if o is not None)
+                                    z_score = under_stats.z_score(imp_prob)
                                     if z_score is not None and z_score <= z_score_limit:
                                         unique_key = (data['game_ID'], data['Prop_Type'], data['Player_Name'], data['Betting_Point'], "under")
                                         bet_tuple = (
                                             data['game_ID'], bookie, data['Prop_Type'], "under",
                                             data['Player_Name'], data['Betting_Point'], odds,
                                             round(ev, 2), round(adjusted_true_prob_under, 4), round(imp_prob, 4),
-                                            round(median(no_vig_probs_over), 4), data['sport_type'],
+                                            median_no_vig_prob, data['sport_type'],
                                             data['last_updated_timestamp'], len(outcomes["under"]),
                                             round(z_score, 2) if z_score is not None else None
                                         )
@@ -575,4 +706,290 @@ class ExpectedValueAnalyzer:
 
             logger.info(f"Found {len(self.results)} +EV bets" if self.results else "No +EV bets found")
             return self.results
-            
\ No newline at end of file
+            
+    def _encode_prop_groups(self):
+        """Flatten the grouped props into one entry per side and one per line for the numpy engine.
+
+        A side is one player of a multi-outcome prop or one outcome of a single-outcome prop.
+        Sides are laid out in the order the python engine visits them (multi-outcome props first,
+        then yes before no and over before under) and each side's lines are contiguous, so
+        walking the lines in order reproduces the python engine's order of best_bets updates.
+        """
+        groups = []  # (kind, data); kind is 'multi', 'yes_no' or 'over_under'
+        side_groups, side_labels, side_starts = [], [], []
+        line_sides, line_odds, line_bookies = [], [], []
+
+        def add_side(group, label, odds_list):
+            side = len(side_labels)
+            side_groups.append(group)
+            side_labels.append(label)
+            side_starts.append(len(line_odds))
+            bookies, odds = zip(*odds_list)
+            line_sides.extend([side] * len(odds_list))
+            line_odds.extend(odds)
+            line_bookies.extend(bookies)
+
+        for game_data in self.multi_outcome_dict.values():
+            group = len(groups)
+            groups.append(('multi', game_data))
+            for player_name, odds_list in game_data['players'].items():
+                add_side(group, player_name, odds_list)
+
+        for data in self.single_outcome_dict.values():
+            outcomes = data['outcomes']
+            group = len(groups)
+            if "yes" in outcomes or "no" in outcomes:
+                groups.append(('yes_no', data))
+                labels = ("yes", "no")
+            else:
+                groups.append(('over_under', data))
+                labels = ("over", "under")
+            for label in labels:
+                if label in outcomes:
+                    add_side(group, label, outcomes[label])
+
+        return groups, side_groups, side_labels, side_starts, line_sides, line_odds, line_bookies
+
+    @staticmethod
+    def _segment_medians(values, segments, segment_count):
+        """Median of values per segment, NaN for empty segments; matches statistics.median."""
+        medians = np.full(segment_count, np.nan)
+        if not len(values):
+            return medians
+        order = np.lexsort((values, segments))
+        sorted_values = values[order]
+        counts = np.bincount(segments, minlength=segment_count)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        present = np.flatnonzero(counts)
+        low = sorted_values[starts[present] + (counts[present] - 1) // 2]
+        high = sorted_values[starts[present] + counts[present] // 2]
+        medians[present] = np.where(counts[present] % 2 == 1, low, (low + high) / 2)
+        return medians
+
+    def _analyze_prop_numpy(self):
+        """Score every grouped prop line at once on arrays, returning the same rows as the python engine.
+
+        Implied probabilities, no-vig probabilities, medians and EV are computed for all lines
+        together; bookies quoting both sides are paired with a sorted join instead of a scan per
+        bookie. The few sums whose order matters (averages, market overrounds) and the z-scores
+        of the lines that clear the EV target stay in Python so every float matches the python
+        engine. Lines priced at 0 are skipped; the python engine raises on them.
+        """
+        groups, side_groups, side_labels, side_starts, line_sides, line_odds, line_bookies = self._encode_prop_groups()
+        group_count, side_count, line_count = len(groups), len(side_labels), len(line_odds)
+        best_bets = {}
+        if not line_count:
+            self.results = []
+            logger.info("No +EV bets found")
+            return self.results
+
+        odds = np.array(line_odds, dtype=np.float64)  # None becomes NaN
+        sides = np.array(line_sides, dtype=np.int64)
+        side_group = np.array(side_groups, dtype=np.int64)
+        side_start = np.array(side_starts + [line_count], dtype=np.int64)
+        side_lines = np.diff(side_start)
+        line_group = side_group[sides]
+        bookie_codes = {bookie: code for code, bookie in enumerate(set(line_bookies))}
+        bookies = np.fromiter(map(bookie_codes.__getitem__, line_bookies), dtype=np.int64, count=line_count)
+        bookie_count = max(len(bookie_codes), 1)
+
+        priced = ~np.isnan(odds) & (odds != 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            imp = np.where(odds > 0, 100 / (odds + 100), -odds / (-odds + 100))
+        imp[~priced] = np.nan
+
+        group_kinds = np.array([{'multi': 0, 'yes_no': 1, 'over_under': 2}[kind] for kind, _ in groups], dtype=np.int8)
+        is_multi_group = group_kinds == 0
+        group_min_bookies = np.array([self.get_bookie_limit(data['Prop_Type']) for _, data in groups], dtype=np.int64)
+
+        # Distinct bookies per side, and the first line of each (side, bookie) for pairing
+        _, first_lines = np.unique(sides * bookie_count + bookies, return_index=True)
+        side_bookies = np.bincount(sides[first_lines], minlength=side_count)
+
+        # Pair both sides of single-outcome props on the first line each bookie quotes
+        is_second_side = np.array([label in ("no", "under") for label in side_labels], dtype=bool)
+        single_first = first_lines[~is_multi_group[line_group[first_lines]]]
+        side_one = single_first[~is_second_side[sides[single_first]]]
+        side_two = single_first[is_second_side[sides[single_first]]]
+        _, pair_one, pair_two = np.intersect1d(
+            line_group[side_one] * bookie_count + bookies[side_one],
+            line_group[side_two] * bookie_count + bookies[side_two],
+            return_indices=True
+        )
+        pair_one, pair_two = side_one[pair_one], side_two[pair_two]
+        pair_group = line_group[pair_one]
+        group_pairs = np.bincount(pair_group, minlength=group_count)
+        valid_pairs = priced[pair_one] & priced[pair_two]
+        pair_overround = imp[pair_one] + imp[pair_two]
+        valid_pairs &= pair_overround > 0
+
+        # Global median overround across single-outcome props, unless the caller pinned it
+        all_overrounds = pair_overround[valid_pairs]
+        if self.median_overround is not None:
+            median_overround = self.median_overround
+            overround_est = median_overround + self.inflate_rate
+        elif len(all_overrounds):
+            median_overround = float(np.median(all_overrounds))
+            overround_est = median_overround + self.inflate_rate
+        else:
+            logger.warning("No overrounds collected; using default overround_est")
+            median_overround = None
+            overround_est = 1.15 + self.inflate_rate
+
+        # Over/under no-vig median per prop
+        no_vig_medians = self._segment_medians(
+            imp[pair_one][valid_pairs] / pair_overround[valid_pairs], pair_group[valid_pairs], group_count
+        )
+
+        # Multi-outcome player medians and distinct bookies per prop
+        priced_lines = np.flatnonzero(priced)
+        side_medians = self._segment_medians(imp[priced_lines], sides[priced_lines], side_count)
+        group_bookie_keys = np.unique(line_group * bookie_count + bookies)
+        group_bookies = np.bincount(group_bookie_keys // bookie_count, minlength=group_count)
+
+        # Per-side probability and reporting values; mode 1 = multi-outcome, 2 = two-sided with
+        # enough bookies (long-shot adjusted), 3 = estimated from overround_est, 0 = not scored
+        side_mode = np.zeros(side_count, dtype=np.int8)
+        side_prob = np.full(side_count, np.nan)
+        side_overround = np.full(side_count, np.nan)
+        side_reported_count = side_lines.copy()
+        side_ev_target = np.full(side_count, float(self.ev_target))
+
+        # Single-outcome props with both sides quoted by enough bookies use the accurate method,
+        # the rest are estimated side by side from overround_est
+        group_side_count = np.bincount(side_group, minlength=group_count)
+        accurate = ~is_multi_group & (group_side_count == 2) & (group_pairs >= group_min_bookies)
+        group_first_side = np.searchsorted(side_group, np.arange(group_count))  # Sides are laid out group by group
+
+        estimated_sides = ~is_multi_group[side_group] & ~accurate[side_group] & (side_lines >= group_min_bookies[side_group])
+        side_mode[estimated_sides] = 3
+
+        over_under = np.flatnonzero(accurate & (group_kinds == 2) & ~np.isnan(no_vig_medians))
+        for offset, true_prob in ((0, no_vig_medians[over_under]), (1, 1 - no_vig_medians[over_under])):
+            side_ids = group_first_side[over_under] + offset
+            side_mode[side_ids] = 2
+            side_prob[side_ids] = true_prob
+            side_overround[side_ids] = no_vig_medians[over_under]
+
+        # Averages and market overrounds are order-dependent sums, kept in Python to match exactly
+        for group in np.flatnonzero(accurate & (group_kinds == 1)).tolist():
+            data = groups[group][1]
+            if median_overround is None:
+                continue
+            side_one_id = int(group_first_side[group])
+            side_two_id = side_one_id + 1
+            imp_probs_yes = imp[side_start[side_one_id]:side_start[side_one_id + 1]]
+            imp_probs_no = imp[side_start[side_two_id]:side_start[side_two_id + 1]]
+            imp_probs_yes = imp_probs_yes[~np.isnan(imp_probs_yes)].tolist()
+            imp_probs_no = imp_probs_no[~np.isnan(imp_probs_no)].tolist()
+            if not imp_probs_yes or not imp_probs_no:
+                logger.debug(f"Skipping {(data['game_ID'], data['Prop_Type'], data['Player_Name'])}: No valid implied probabilities for yes or no")
+                continue
+            avg_imp_prob_yes = sum(imp_probs_yes) / len(imp_probs_yes)
+            avg_imp_prob_no = sum(imp_probs_no) / len(imp_probs_no)
+            true_prob_yes = avg_imp_prob_yes / median_overround if median_overround > 0 else 0
+            true_prob_no = avg_imp_prob_no / median_overround if median_overround > 0 else 0
+            prob_sum = true_prob_yes + true_prob_no
+            if prob_sum > 0:
+                true_prob_yes /= prob_sum
+                true_prob_no /= prob_sum
+            side_mode[[side_one_id, side_two_id]] = 2
+            side_prob[side_one_id] = true_prob_yes
+            side_prob[side_two_id] = true_prob_no
+            side_overround[[side_one_id, side_two_id]] = median_overround
+            if data['Prop_Type'] in self.high_ev_props:
+                side_ev_target[side_one_id] = self.high_ev_target
+
+        for group in np.flatnonzero(is_multi_group & (group_bookies >= group_min_bookies)).tolist():
+            data = groups[group][1]
+            min_bookies = group_min_bookies[group]
+            first = int(group_first_side[group])
+            scored = [side for side in range(first, first + int(group_side_count[group])) if not np.isnan(side_medians[side])]
+            market_overround = sum(float(side_medians[side]) for side in scored)
+            if data['Prop_Type'] in self.inflate_prop:
+                market_overround *= (1 + self.inflate_rate)
+            if market_overround <= 0:
+                logger.warning(f"Invalid market overround {market_overround} for {(data['game_ID'], data['Prop_Type'])}")
+                continue
+            for side in scored:
+                if side_bookies[side] < min_bookies:
+                    continue
+                side_mode[side] = 1
+                side_prob[side] = float(side_medians[side]) / market_overround
+                side_overround[side] = market_overround
+                side_reported_count[side] = side_bookies[side]
+
+        # Fair probability and EV for every line at once
+        line_mode = side_mode[sides]
+        long_shot = odds > self.long_shot_threshold
+        with np.errstate(divide='ignore', invalid='ignore'):
+            adjusted_overround = np.where(
+                long_shot, overround_est + self.long_shot_inflate,
+                np.where(odds < self.favorite_threshold, np.maximum(1.0, overround_est - self.favorite_deflate), overround_est)
+            )
+            fair_prob = side_prob[sides]
+            fair_prob = np.where((line_mode == 2) & long_shot, fair_prob * (1 - self.long_shot_inflate), fair_prob)
+            fair_prob = np.where(line_mode == 3, imp / adjusted_overround, fair_prob)
+            payout = np.where(odds > 0, (odds / 100) * 100, (100 / np.abs(odds)) * 100)
+            ev = (fair_prob * payout) - ((1 - fair_prob) * 100)
+        reported_overround = np.where(line_mode == 3, adjusted_overround, side_overround[sides])
+        scored = (line_mode > 0) & priced & (odds <= self.odds_max)
+        candidates = np.flatnonzero(scored & (ev > side_ev_target[sides]))
+
+        # z-scores and best bet per key, walking the candidates in the python engine's order
+        side_z_stats = {}
+        for line in candidates.tolist():
+            side = line_sides[line]
+            kind, data = groups[side_groups[side]]
+            if side not in side_z_stats:
+                side_imp = imp[side_start[side]:side_start[side + 1]]
+                side_z_stats[side] = self.z_score_stats(side_imp[~np.isnan(side_imp)].tolist())
+            if side_z_stats[side] is None:
+                continue
+            imp_prob = float(imp[line])
+            mean_imp, std_imp = side_z_stats[side]
+            z_score = 0 if std_imp == 0 else (imp_prob - mean_imp) / std_imp
+            if z_score > self.get_z_score_limit(data['Prop_Type']):
+                continue
+
+            label = side_labels[side]
+            line_ev = float(ev[line])
+            if kind == 'multi':
+                unique_key = (data['game_ID'], data['Prop_Type'], label)
+                player_name, outcome, betting_point = label, "yes", "N/A"
+            elif kind == 'yes_no':
+                unique_key = (data['game_ID'], data['Prop_Type'], data['Player_Name'], label)
+                player_name, outcome, betting_point = data['Player_Name'], label, "N/A"
+            else:
+                unique_key = (data['game_ID'], data['Prop_Type'], data['Player_Name'], data['Betting_Point'], label)
+                player_name, outcome, betting_point = data['Player_Name'], label, data['Betting_Point']
+
+            if unique_key in best_bets and not line_ev > best_bets[unique_key][7]:
+                continue
+            best_bets[unique_key] = (
+                data['game_ID'], line_bookies[line], data['Prop_Type'], outcome,
+                player_name, betting_point, line_odds[line], round(line_ev, 2),
+                round(float(fair_prob[line]), 4), round(imp_prob, 4), round(float(reported_overround[line]), 4),
+                data['sport_type'], data['last_updated_timestamp'], int(side_reported_count[side]),
+                round(z_score, 2)
+            )
+
+        self.results = sorted(best_bets.values(), key=lambda x: x[7], reverse=True)
+        self.results = self.filter_prop_bets(self.results)
+
+        logger.info(f"Found {len(self.results)} +EV bets" if self.results else "No +EV bets found")
+        return self.results
+
+    def _filter_prop_bets_numpy(self, bets):
+        """filter_prop_bets with the criteria applied as array masks."""
+        criteria = [PROP_BET_CRITERIA.get(row[2]) for row in bets]
+        has_criteria = np.array([crit is not None for crit in criteria], dtype=bool)
+        min_ev = np.array([crit['min_ev'] if crit else np.nan for crit in criteria], dtype=np.float64)
+        max_odds = np.array([crit['max_odds'] if crit else np.nan for crit in criteria], dtype=np.float64)
+        min_z_score = np.array([crit['min_z_score'] if crit else np.nan for crit in criteria], dtype=np.float64)
+        ev = np.array([row[7] for row in bets], dtype=np.float64)
+        odds = np.array([row[6] for row in bets], dtype=np.float64)
+        z_score = np.array([row[14] if len(row) > 14 and row[14] is not None else np.nan for row in bets], dtype=np.float64)
+
+        keep = ~has_criteria | ((ev >= min_ev) & (odds <= max_odds) & (np.isnan(z_score) | (z_score <= min_z_score)))
+        return [row for row, kept in zip(bets, keep.tolist()) if kept]
@@ -0,0 +1,105 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+FIXTURE_MODES = ('record', 'replay')
+
+
+class FixtureStore:
+    """Records Odds API responses to gzip JSON fixtures and serves them back without the network.
+
+    Each response is stored under a key built from the endpoint and its query parameters (the API
+    key is left out), so a replay run asks for exactly what the recording run fetched. The quota
+    headers and the observed latency are kept alongside the body so QuotaTracker and timing runs
+    behave like they did live.
+    """
+
+    def __init__(self, mode, fixture_dir=None, latency=None):
+        """Initialize the store.
+
+        Args:
+            mode: 'record' to save every response, 'replay' to serve responses from disk.
+            fixture_dir: Directory holding the fixtures (default: ODDS_FIXTURE_DIR env var, or fixtures/odds_api).
+            latency: Seconds to sleep before serving a replayed response, or 'recorded' to replay
+                each response's recorded latency (default: ODDS_FIXTURE_LATENCY env var, or 0).
+        """
+        if mode not in FIXTURE_MODES:
+            raise ValueError(f"Unknown fixture mode {mode!r}, expected one of {FIXTURE_MODES}")
+        self.mode = mode
+        self.fixture_dir = fixture_dir or os.getenv('ODDS_FIXTURE_DIR', os.path.join('fixtures', 'odds_api'))
+        latency = latency if latency is not None else os.getenv('ODDS_FIXTURE_LATENCY', 0)
+        self.latency = latency if latency == 'recorded' else float(latency)
+        self.hits = 0
+        self.misses = 0
+        if mode == 'record':
+            os.makedirs(self.fixture_dir, exist_ok=True)
+
+    @staticmethod
+    def key(endpoint, params=None):
+        """Build the fixture key for a request, ignoring the API key."""
+        query = {name: value for name, value in (params or {}).items() if name != 'apiKey'}
+        digest = hashlib.sha1(json.dumps([endpoint, query], sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', endpoint).strip('_')
+        return f"{slug}_{digest}"
+
+    def path(self, endpoint, params=None):
+        """Return the fixture file path for a request."""
+        return os.path.join(self.fixture_dir, f"{self.key(endpoint, params)}.json.gz")
+
+    def save(self, endpoint, params, status, headers, body, latency=0.0):
+        """Write one response to its fixture file.
+
+        Args:
+            endpoint: Request path, e.g. '/v4/sports/basketball_nba/odds/'.
+            params: Query parameters sent with the request.
+            status: HTTP status code of the response.
+            headers: Response headers; only the x-requests-* quota headers are kept.
+            body: Parsed JSON body.
+            latency: Observed wall time of the request in seconds.
+        """
+        fixture = {
+            'endpoint': endpoint,
+            'params': {name: value for name, value in (params or {}).items() if name != 'apiKey'},
+            'status': status,
+            'headers': {name.lower(): value for name, value in (headers or {}).items() if name.lower().startswith('x-requests-')},
+            'latency': latency,
+            'body': body
+        }
+        try:
+            with gzip.open(self.path(endpoint, params), 'wt', encoding='utf-8') as f:
+                json.dump(fixture, f)
+        except Exception as e:
+            logger.error(f"Failed to record fixture for {endpoint}. Error: {e}")
+
+    def load(self, endpoint, params=None):
+        """Read a recorded response, sleeping for the configured latency first.
+
+        Returns:
+            Fixture dict with 'status', 'headers', 'latency' and 'body', or None when the
+            request was never recorded.
+        """
+        fixture_path = self.path(endpoint, params)
+        if not os.path.exists(fixture_path):
+            self.misses += 1
+            logger.warning(f"No recorded fixture for {endpoint} at {fixture_path}")
+            return None
+
+        try:
+            with gzip.open(fixture_path, 'rt', encoding='utf-8') as f:
+                fixture = json.load(f)
+        except Exception as e:
+            self.misses += 1
+            logger.error(f"Failed to read fixture {fixture_path}. Error: {e}")
+            return None
+
+        delay = fixture.get('latency', 0) if self.latency == 'recorded' else self.latency
+        if delay:
+            time.sleep(delay)
+        self.hits += 1
+        return fixture
@@ -0,0 +1,287 @@
+import gzip
+import json
+import logging
+import os
+import tempfile
+from statistics import median
+
+from src.data.arbitrage import ArbitrageAnalyzer
+from src.data.delta import KEY_FUNCTIONS
+from src.data.expected_value import ExpectedValueAnalyzer, MULTI_OUTCOME_PROPS
+from src.data.rows import PropBet
+
+logger = logging.getLogger(__name__)
+
+# Positions of each result table's unique key in the analyzer result tuples; DB.apply_result_changes
+# expects deleted keys in this order
+RESULT_KEYS = {
+    # (game_ID, Prop_Type, Player_Name, Betting_Point, bookie_one, outcome_one, bookie_two, outcome_two)
+    'arbitrage': (0, 1, 2, 3, 5, 6, 9, 10),
+    # (game_ID, Bookie, Prop_Type, Bet_Type, Player_Name, Betting_Line)
+    'expected_value_props': (0, 1, 2, 3, 4, 6),
+    # (game_ID, Bookie, Team, Line)
+    'expected_value_moneyline': (0, 1, 3, 4),
+}
+
+
+def prop_group_key(game_id, prop_type, player_name, point='N/A'):
+    """Key of the smallest set of prop lines that both analyzers evaluate together.
+
+    Multi-outcome props are compared across every player of a game, so the whole (game, prop)
+    market is one group; every other prop is a (game, prop, player, point) group, with 'N/A'
+    as the point of yes/no props. The point is compared as text because arbitrage rows carry it
+    as a string.
+    """
+    if prop_type in MULTI_OUTCOME_PROPS:
+        return (game_id, prop_type)
+    return (game_id, prop_type, player_name, str(point))
+
+
+def _row_group_key(row):
+    point = row.betting_point if row.bet_type.lower() in ("over", "under") else "N/A"
+    return prop_group_key(row.game_id, row.prop_type, row.player_name, point)
+
+
+def _result_row(row):
+    """Rebuild a result tuple loaded from JSON, including the legs tuple of multi-way arbitrage."""
+    return tuple(tuple(map(tuple, value)) if isinstance(value, list) else value for value in row)
+
+
+def _diff_results(table, old_results, new_results):
+    """Compare two result sets of a table by its unique key.
+
+    Rows sharing a key keep the first one, like the INSERT ... ON CONFLICT DO NOTHING of a full load.
+
+    Returns:
+        Tuple of (upserts, deleted_keys): new or changed rows, and keys that are no longer produced.
+    """
+    key_indexes = RESULT_KEYS[table]
+    old_by_key = {}
+    for row in old_results:
+        old_by_key.setdefault(tuple(row[i] for i in key_indexes), row)
+    new_by_key = {}
+    for row in new_results:
+        new_by_key.setdefault(tuple(row[i] for i in key_indexes), row)
+    upserts = [row for key, row in new_by_key.items() if old_by_key.get(key) != row]
+    deleted_keys = [key for key in old_by_key if key not in new_by_key]
+    return upserts, deleted_keys
+
+
+class IncrementalPropAnalyzer:
+    """Keeps every prop group's lines and arbitrage/EV results between runs so that only the groups
+    touched by changed or removed rows are re-analyzed, and the result tables get upserts and
+    deletes instead of being truncated and reloaded.
+
+    The state is a gzip JSON file in the temp dir next to the delta cache. It is only valid for the
+    delta cache generation it was saved with; when the two disagree (cold start, a failed save or a
+    failed DB write) the next run rebuilds the state from every row and replaces the tables.
+
+    The yes/no props are normalized by the median overround of all props, so when a run moves that
+    median every EV group is recomputed; arbitrage groups are independent and only the touched ones
+    are. Lines keep the position they were first seen at, so on ties between bookies the chosen
+    bookie can differ from a full run over the API's order.
+    """
+
+    def __init__(self, state_path=None, engine='auto'):
+        """Initialize the analyzer and load the previous run's state.
+
+        Args:
+            state_path: Path of the state file (default: PROP_ANALYSIS_STATE_PATH env var, or the temp dir).
+            engine: Engine passed to ArbitrageAnalyzer and ExpectedValueAnalyzer (default: 'auto').
+        """
+        self.state_path = state_path or os.getenv(
+            'PROP_ANALYSIS_STATE_PATH', os.path.join(tempfile.gettempdir(), 'prop_analysis_state.json.gz')
+        )
+        self.engine = engine
+        self.rebuild = True
+        self.dirty = set()
+        self._reset()
+        self.load()
+
+    def _reset(self):
+        self.generation = None
+        self.groups = {}  # group key -> {row key: PropBet}
+        self.overrounds = {}  # group key -> overrounds of its two-sided props
+        self.median_overround = None
+        self.results = {table: {} for table in ('arbitrage', 'expected_value_props')}  # table -> group key -> rows
+        self.moneyline_results = []
+        self.game_arbitrage_results = []
+
+    def load(self):
+        """Load the saved state, starting empty if the file is missing or unreadable."""
+        try:
+            with gzip.open(self.state_path, 'rt', encoding='utf-8') as f:
+                saved = json.load(f)
+            # JSON has no tuples, so keys and rows come back as lists
+            props_key = KEY_FUNCTIONS['props']
+            for group_key, rows in saved['groups']:
+                rows = [PropBet(*row) for row in rows]
+                self.groups[tuple(group_key)] = {props_key(row)[0]: row for row in rows}
+            self.overrounds = {tuple(group_key): overrounds for group_key, overrounds in saved['overrounds']}
+            for table in self.results:
+                self.results[table] = {tuple(group_key): [_result_row(row) for row in rows]
+                                       for group_key, rows in saved['results'][table]}
+            self.moneyline_results = [tuple(row) for row in saved['moneyline_results']]
+            self.game_arbitrage_results = [tuple(row) for row in saved['game_arbitrage_results']]
+            self.median_overround = saved['median_overround']
+            self.generation = saved['generation']
+            logger.info(f"Loaded incremental prop state with {len(self.groups)} groups from {self.state_path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not read incremental prop state from {self.state_path}, starting fresh. Error: {e}")
+            self._reset()
+
+    def save(self, generation):
+        """Persist the state for the next run.
+
+        Args:
+            generation: Generation of the saved delta cache this state matches.
+        """
+        self.generation = generation
+        try:
+            with gzip.open(self.state_path, 'wt', encoding='utf-8') as f:
+                json.dump({
+                    'generation': generation,
+                    'median_overround': self.median_overround,
+                    'groups': [[list(group_key), [list(row) for row in rows.values()]]
+                               for group_key, rows in self.groups.items()],
+                    'overrounds': [[list(group_key), overrounds] for group_key, overrounds in self.overrounds.items()],
+                    'results': {table: [[list(group_key), rows] for group_key, rows in results.items()]
+                                for table, results in self.results.items()},
+                    'moneyline_results': self.moneyline_results,
+                    'game_arbitrage_results': self.game_arbitrage_results,
+                }, f)
+        except Exception as e:
+            logger.error(f"Failed to save incremental prop state to {self.state_path}. Error: {e}")
+
+    def begin(self, generation):
+        """Start a run against the delta cache generation that was loaded.
+
+        Args:
+            generation: OddsDeltaCache.generation; the saved state is only reused if it matches.
+        """
+        self.rebuild = self.generation is None or self.generation != generation
+        if self.rebuild:
+            if self.groups:
+                logger.info("Incremental prop state does not match the delta cache, rebuilding it")
+            self._reset()
+        self.dirty = set()
+
+    def feed(self, rows, changed_rows):
+        """Apply one streamed chunk of props.
+
+        Args:
+            rows: Every row of the chunk, used while rebuilding.
+            changed_rows: The rows of the chunk whose price moved, from OddsDeltaCache.check.
+        """
+        props_key = KEY_FUNCTIONS['props']
+        groups = self.groups
+        dirty = self.dirty
+        for row in (rows if self.rebuild else changed_rows):
+            group_key = _row_group_key(row)
+            if group_key not in groups:
+                groups[group_key] = {}
+            groups[group_key][props_key(row)[0]] = row
+            dirty.add(group_key)
+
+    def remove(self, removed_keys):
+        """Drop the lines no longer offered, as returned by OddsDeltaCache.finish."""
+        if self.rebuild:
+            return
+        for key in removed_keys:
+            game_id, _, prop_type, bet_type, player_name, point = key
+            point = point if bet_type.lower() in ("over", "under") else "N/A"
+            group_key = prop_group_key(game_id, prop_type, player_name, point)
+            rows = self.groups.get(group_key)
+            if rows and rows.pop(key, None) is not None:
+                self.dirty.add(group_key)
+
+    def _table_rows(self, table):
+        rows = [row for rows in self.results[table].values() for row in rows]
+        if table == 'expected_value_props':
+            rows.sort(key=lambda row: row[7], reverse=True)  # Best EV first, like analyze_prop
+        return rows
+
+    def _group_rows(self, group_keys):
+        return [row for group_key in group_keys for row in self.groups[group_key].values()]
+
+    def analyze(self, game_lines=None, game_spreads=None, game_totals=None):
+        """Re-analyze the touched groups and work out what changed in each result table.
+
+        Game markets are few enough that their moneyline EV and arbitrage are redone every run.
+
+        Args:
+            game_lines: GameLine rows.
+            game_spreads: GameSpread rows.
+            game_totals: GameTotal rows.
+
+        Returns:
+            Dict mapping 'arbitrage', 'expected_value_props' and 'expected_value_moneyline' to
+            (upserts, deleted_keys). When self.rebuild is set the upserts are the full tables.
+        """
+        old_results = {table: self._table_rows(table) for table in self.results}
+        old_results['arbitrage'] += self.game_arbitrage_results
+
+        for group_key in self.dirty:
+            if not self.groups.get(group_key):
+                self.groups.pop(group_key, None)
+                self.overrounds.pop(group_key, None)
+                for results in self.results.values():
+                    results.pop(group_key, None)
+        dirty = [group_key for group_key in self.dirty if group_key in self.groups]
+        logger.info(f"Re-analyzing {len(dirty)} of {len(self.groups)} prop groups")
+
+        # Refresh the touched groups' overrounds, then the global median they feed
+        ev_props = ExpectedValueAnalyzer(engine=self.engine)
+        ev_props.add_prop_lines(self._group_rows(dirty))
+        for group_key in dirty:
+            self.overrounds.pop(group_key, None)
+        for key, overrounds in ev_props.prop_overrounds().items():
+            group_key = prop_group_key(*key)
+            self.overrounds[group_key] = self.overrounds.get(group_key, []) + overrounds
+        all_overrounds = [overround for overrounds in self.overrounds.values() for overround in overrounds]
+        median_overround = median(all_overrounds) if all_overrounds else None
+
+        ev_groups = dirty
+        if median_overround != self.median_overround and not self.rebuild:
+            logger.info(f"Median overround moved from {self.median_overround} to {median_overround}, re-analyzing every EV group")
+            ev_groups = list(self.groups)
+            ev_props = ExpectedValueAnalyzer(engine=self.engine)
+            ev_props.add_prop_lines(self._group_rows(ev_groups))
+        self.median_overround = median_overround
+        ev_props.median_overround = median_overround
+
+        arbitrage = ArbitrageAnalyzer(engine=self.engine)
+        arbitrage.add_lines(self._group_rows(dirty))
+        self._store_results('arbitrage', dirty, arbitrage.analyze() + arbitrage.analyze_multiway() if dirty else [], (0, 1, 2, 3))
+        self._store_results('expected_value_props', ev_groups,
+                            ev_props.analyze_prop() if ev_groups else [], (0, 2, 4, 5))
+
+        self.game_arbitrage_results = arbitrage.analyze_game_markets(game_lines, game_spreads, game_totals)
+
+        changes = {
+            'arbitrage': _diff_results('arbitrage', old_results['arbitrage'],
+                                       self._table_rows('arbitrage') + self.game_arbitrage_results),
+            'expected_value_props': _diff_results('expected_value_props', old_results['expected_value_props'],
+                                                  self._table_rows('expected_value_props')),
+        }
+
+        moneyline_results = ExpectedValueAnalyzer(game_lines).analyze_ml() if game_lines else []
+        changes['expected_value_moneyline'] = _diff_results('expected_value_moneyline', self.moneyline_results, moneyline_results)
+        self.moneyline_results = moneyline_results
+
+        for table, (upserts, deleted_keys) in changes.items():
+            logger.info(f"Incremental {table}: {len(upserts)} upserts, {len(deleted_keys)} deletes")
+        return changes
+
+    def _store_results(self, table, group_keys, rows, group_fields):
+        """Replace the stored results of the re-analyzed groups; group_fields locate the group in a row."""
+        results = self.results[table]
+        for group_key in group_keys:
+            results.pop(group_key, None)
+        for row in rows:
+            group_key = prop_group_key(*(row[i] for i in group_fields))
+            if group_key not in results:
+                results[group_key] = []
+            results[group_key].append(row)
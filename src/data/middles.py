@@ -0,0 +1,151 @@
+import logging
+from numbers import Number
+
+from src.utils.odds_math import DECIMAL_ODDS
+
+logger = logging.getLogger(__name__)
+
+
+class MiddleDetector:
+    def __init__(self, max_cost_percentage=2, max_odds=50000):
+        """Initialize the detector for middles between an Over at one point and an Under at a higher one.
+
+        A middle stakes both sides so each pays the same; if the result lands between the two
+        points both win, otherwise one does. Groups are (game, prop_type, player) for props and
+        (game, 'totals') for game totals, across every alternate point offered.
+
+        Args:
+            max_cost_percentage: Largest worst-case loss, as a percentage of the total stake, for a
+                near-profitable middle to be kept (default: 2).
+            max_odds: Maximum odds to consider (default: 50000).
+        """
+        self.max_cost_percentage = max_cost_percentage
+        self.max_odds = max_odds
+        self.groups = {}
+
+    def _group(self, group_key, game_id, prop_type, player_name, row):
+        group = self.groups.get(group_key)
+        if group is None:
+            group = self.groups[group_key] = {
+                "game_ID": game_id,
+                "Prop_Type": prop_type,
+                "Player_Name": player_name,
+                "sport_type": row.sport_type,
+                "last_updated_timestamp": row.last_updated_timestamp,
+                "over": {},
+                "under": {}
+            }
+        return group
+
+    def _add_price(self, group, side, point, odds, bookie):
+        """Keep the best price per (group, side, point), first bookie on ties."""
+        if odds is None or odds == 0 or odds > self.max_odds or not isinstance(point, Number):
+            return
+        best = group[side].get(point)
+        if best is None or odds > best[0]:
+            group[side][point] = (odds, bookie)
+
+    def add_prop_lines(self, lines):
+        """Group a chunk of over/under prop lines; other bet types are ignored.
+
+        Args:
+            lines: List of PropBet rows from Odds_API.
+        """
+        for line in lines:
+            side = line.bet_type.lower()
+            if side not in ("over", "under"):
+                continue
+            group = self._group((line.game_id, line.prop_type, line.player_name),
+                                line.game_id, line.prop_type, line.player_name, line)
+            self._add_price(group, side, line.betting_point, line.betting_line, line.bookie)
+
+    def add_game_totals(self, game_totals):
+        """Group game totals, one Over and one Under per row.
+
+        Args:
+            game_totals: List of GameTotal rows from Odds_API.bookies_and_odds.
+        """
+        for row in game_totals:
+            group = self._group((row.game_id, "totals"), row.game_id, "totals", "N/A", row)
+            for side, point, odds in ((row.over_or_under_1, row.over_under_total_1, row.over_under_line_1),
+                                      (row.over_or_under_2, row.over_under_total_2, row.over_under_line_2)):
+                side = side.lower()
+                if side in ("over", "under"):
+                    self._add_price(group, side, point, odds, row.bookie)
+
+    def _candidate_pairs(self, overs, unders):
+        """Sweep the sorted points for the (over point, under point) pairs worth pricing.
+
+        Each Under is paired with the best-priced Over below its point and each Over with the
+        best-priced Under above its point, so every point gets its cheapest middle in
+        O(n log n) rather than pricing all pairs.
+        """
+        over_points = sorted(overs)
+        under_points = sorted(unders)
+        pairs = set()
+
+        # Unders ascending: the Overs below the point form a growing prefix
+        best_over = None
+        index = 0
+        for under_point in under_points:
+            while index < len(over_points) and over_points[index] < under_point:
+                point = over_points[index]
+                if best_over is None or overs[point][0] > overs[best_over][0]:
+                    best_over = point
+                index += 1
+            if best_over is not None:
+                pairs.add((best_over, under_point))
+
+        # Overs descending: the Unders above the point form a growing suffix
+        best_under = None
+        index = len(under_points) - 1
+        for over_point in reversed(over_points):
+            while index >= 0 and under_points[index] > over_point:
+                point = under_points[index]
+                if best_under is None or unders[point][0] > unders[best_under][0]:
+                    best_under = point
+                index -= 1
+            if best_under is not None:
+                pairs.add((over_point, best_under))
+        return pairs
+
+    def analyze(self):
+        """Find profitable and near-profitable middles across every group.
+
+        Returns:
+            List of tuples ranked by gap (widest first), then by worst-case return, in the order:
+            (game_ID, Prop_Type, Player_Name, sport_type,
+             bookie_over, over_point, over_odds, over_bet_amount,
+             bookie_under, under_point, under_odds, under_bet_amount,
+             gap, worst_case_percentage, middle_percentage, last_updated_timestamp)
+            where worst_case_percentage is the return when only one side wins and
+            middle_percentage the return when both do, per $100 staked.
+        """
+        logger.info(f"Grouped {len(self.groups)} markets for middle detection")
+        middles = []
+        total_stake = 100
+
+        for data in self.groups.values():
+            overs, unders = data["over"], data["under"]
+            if not overs or not unders:
+                continue
+            for over_point, under_point in self._candidate_pairs(overs, unders):
+                over_odds, over_bookie = overs[over_point]
+                under_odds, under_bookie = unders[under_point]
+                d1 = DECIMAL_ODDS[over_odds]
+                d2 = DECIMAL_ODDS[under_odds]
+                S = 1 / d1 + 1 / d2
+                worst_case_percentage = (1 / S - 1) * 100
+                if worst_case_percentage < -self.max_cost_percentage:
+                    continue
+                middles.append((
+                    data["game_ID"], data["Prop_Type"], data["Player_Name"], data["sport_type"],
+                    over_bookie, over_point, over_odds, round(total_stake * d2 / (d1 + d2), 2),
+                    under_bookie, under_point, under_odds, round(total_stake * d1 / (d1 + d2), 2),
+                    round(under_point - over_point, 2), round(worst_case_percentage, 2),
+                    round((2 / S - 1) * 100, 2), data["last_updated_timestamp"]
+                ))
+
+        middles.sort(key=lambda x: (x[12], x[13]), reverse=True)  # Gap, then worst-case return
+        logger.info(f"Found {len(middles)} middles" if middles else "No middles found")
+        return middles
@@ -1,48 +1,172 @@
 import requests
+from requests.adapters import HTTPAdapter
 import os
 from pathlib import Path
 import json
 import logging
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from src.data.quota import QuotaTracker
+from src.data.fixtures import FixtureStore
+from src.data.rows import PropBet, GameLine, GameSpread, GameTotal, intern_str
 
 logger = logging.getLogger(__name__)
 
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Exotic props dropped first when the remaining quota runs low
+LOW_PRIORITY_MARKETS = {
+    'player_1st_td', 'player_last_td', 'player_first_basket', 'player_double_double',
+    'player_triple_double', 'player_goal_scorer_first', 'batter_first_home_run',
+    'player_reception_longest', 'player_rush_longest', 'player_pass_longest_completion',
+    'player_pass_yds_q1', 'player_defensive_interceptions', 'player_kicking_points', 'player_pats'
+}
+
+# Outcome names that are not players when a market puts the player in 'description'
+NON_PLAYER_NAMES = {'Over', 'Under', 'Yes', 'No'}
+
+# Regions requested for props, each market costs one request per region
+PROPS_REGIONS = 'us,us2,eu,au,uk'
+
 class Odds_API:
-    def __init__(self):
-        self.link = os.getenv('ODDS_LINK')
-        self.odds_apikey = os.getenv('API_KEY_ODDS_API')
+    def __init__(self, link=None, api_key=None, max_workers=None, pool_size=None, timeout=10,
+                 max_retries=3, backoff_factor=0.5, backoff_max=30, quota_reserve=None,
+                 fixture_mode=None, fixture_dir=None, fixture_latency=None):
+        """Initialize the Odds API client.
+
+        Args:
+            link: Base URL of the Odds API (default: ODDS_LINK env var).
+            api_key: Odds API key (default: API_KEY_ODDS_API env var).
+            max_workers: Maximum number of per-event props requests in flight at once
+                (default: ODDS_MAX_WORKERS env var, or 8). 1 fetches events serially.
+            pool_size: Number of keep-alive connections kept open to the API host
+                (default: max_workers, so every worker can reuse a connection).
+            timeout: Per-request timeout in seconds (default: 10).
+            max_retries: Retries for 429/5xx responses and connection errors (default: 3).
+            backoff_factor: Base delay in seconds for exponential backoff (default: 0.5).
+            backoff_max: Upper bound in seconds for a single backoff delay (default: 30).
+            quota_reserve: Requests to keep in hand; low-priority props markets are skipped when a
+                run would dip below it (default: ODDS_QUOTA_RESERVE env var, or 0 to never skip).
+            fixture_mode: 'record' to save every response to disk, 'replay' to serve responses from
+                disk with no network calls (default: ODDS_FIXTURE_MODE env var, or live only).
+            fixture_dir: Directory for recorded fixtures (default: ODDS_FIXTURE_DIR env var, or fixtures/odds_api).
+            fixture_latency: Seconds of simulated latency per replayed request, or 'recorded'
+                (default: ODDS_FIXTURE_LATENCY env var, or 0).
+        """
+        self.link = link or os.getenv('ODDS_LINK')
+        self.odds_apikey = api_key or os.getenv('API_KEY_ODDS_API')
         self.all_sports = ['americanfootball_nfl', 'icehockey_nhl', 'basketball_nba', 'baseball_mlb']
         self.active_sports = []  # To store active sports
+        self.max_workers = max(1, int(max_workers or os.getenv('ODDS_MAX_WORKERS', 8)))
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.quota = QuotaTracker(reserve=int(quota_reserve if quota_reserve is not None else os.getenv('ODDS_QUOTA_RESERVE', 0)))
+        fixture_mode = fixture_mode or os.getenv('ODDS_FIXTURE_MODE')
+        self.fixtures = FixtureStore(fixture_mode, fixture_dir, fixture_latency) if fixture_mode else None
+        if self.fixtures is not None:
+            logger.info(f"Odds API running in {fixture_mode} mode with fixtures in {self.fixtures.fixture_dir}")
+
+        # One pooled session per client so repeated calls reuse TCP/TLS connections
+        pool_size = pool_size or self.max_workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def close(self):
+        """Close the pooled HTTP session."""
+        self.session.close()
 
     #### START OF API CALLS
 
     # Helper function to make API Call
     def _make_request(self, endpoint: str, params: dict = None) -> dict:
-        """Helper function to make API requests."""
+        """Helper function to make API requests, retrying 429/5xx responses with backoff."""
         url = f"{self.link}{endpoint}"
         if params is None:
             params = {}
         params['apiKey'] = self.odds_apikey  # Add API key to parameters
 
-        try:
-            response = requests.get(url, params=params)  # Use params to manage query parameters
+        if self.fixtures is not None and self.fixtures.mode == 'replay':
+            return self._replay_request(endpoint, params)
 
-            # Check for 401 Unauthorized
-            if response.status_code == 401:
-                logger.error("Unauthorized access (401) - breaking the loop.")
-                raise Exception("401 Unauthorized")  # Raise a specific exception for 401
-            
-            response.raise_for_status()  # Raise an error for bad responses
-            return response.json()
-        except requests.exceptions.HTTPError as err:
-            logger.error(f"HTTP error occurred: {err}")
-            return {}
-        except Exception as err:
-            logger.error(f"Other error occurred: {err}")
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)  # Use params to manage query parameters
+                self.quota.record(endpoint, response.status_code, time.perf_counter() - start, response.headers)
+
+                # Check for 401 Unauthorized
+                if response.status_code == 401:
+                    logger.error("Unauthorized access (401) - breaking the loop.")
+                    raise Exception("401 Unauthorized")  # Raise a specific exception for 401
+
+                if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                    delay = self._retry_delay(attempt, response.headers.get('Retry-After'))
+                    logger.warning(f"Received {response.status_code} for {endpoint}. Retrying in {delay:.2f}s "
+                                   f"(attempt {attempt + 1}/{self.max_retries}).")
+                    time.sleep(delay)
+                    continue
+
+                response.raise_for_status()  # Raise an error for bad responses
+                data = response.json()
+                if self.fixtures is not None:
+                    self.fixtures.save(endpoint, params, response.status_code, response.headers, data,
+                                       time.perf_counter() - start)
+                return data
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as err:
+                self.quota.record(endpoint, None, time.perf_counter() - start)
+                if attempt < self.max_retries:
+                    delay = self._retry_delay(attempt)
+                    logger.warning(f"Connection error for {endpoint}: {err}. Retrying in {delay:.2f}s "
+                                   f"(attempt {attempt + 1}/{self.max_retries}).")
+                    time.sleep(delay)
+                    continue
+                logger.error(f"Connection error occurred after {self.max_retries} retries: {err}")
+                return {}
+            except requests.exceptions.HTTPError as err:
+                logger.error(f"HTTP error occurred: {err}")
+                return {}
+            except Exception as err:
+                logger.error(f"Other error occurred: {err}")
+                return {}
+        return {}
+
+    def _replay_request(self, endpoint, params):
+        """Serve a request from the recorded fixtures instead of the network."""
+        start = time.perf_counter()
+        fixture = self.fixtures.load(endpoint, params)
+        if fixture is None:
+            self.quota.record(endpoint, None, time.perf_counter() - start)
             return {}
+        self.quota.record(endpoint, fixture.get('status'), time.perf_counter() - start, fixture.get('headers'))
+        return fixture.get('body')
+
+    def _retry_delay(self, attempt, retry_after=None):
+        """Exponential backoff with full jitter, never shorter than the server's Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_factor * (2 ** attempt)))
+        if retry_after:
+            try:
+                wait = float(retry_after)
+            except ValueError:
+                # Retry-After may also be an HTTP date
+                try:
+                    wait = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    wait = 0
+            delay = max(delay, min(wait, self.backoff_max))
+        return delay
 
     # Get all active sports that Odds API offers but filter based off sports we care about
     def fetch_active_sports(self):
-        """Fetch a list of active sports from the API."""
+        """Fetch a list of active sports from the API and return the raw payload."""
         data = self._make_request('/v4/sports')
         if data:
             # Filter active sports to only include the sports of interest
@@ -53,6 +177,7 @@ class Odds_API:
             logger.info(f"Active sports: {self.active_sports}")
         else:
             logger.error("Failed to fetch active sports.")
+        return data or []
 
     def get_team_odds(self):
         """Get odds for each team in a league."""
@@ -95,36 +220,47 @@ class Odds_API:
         return all_scores
 
 
-    def get_events(self):
-        """Get events for active sports only."""
+    def fetch_events(self):
+        """Fetch the raw event payloads for active sports only."""
         # Ensure active sports are up-to-date
         if not self.active_sports:
             self.fetch_active_sports()
 
+        all_events = []
+        for sport in self.active_sports:
+            data = self._make_request(f'/v4/sports/{sport}/events')
+            if data:
+                all_events.extend(data)
+                logger.info(f"Events successfully fetched for sport: {sport}.")
+            else:
+                logger.warning(f"No events found for sport: {sport}.")
+        return all_events
+
+    def get_events(self, snapshot=None):
+        """Get events for active sports only.
+
+        Args:
+            snapshot: Optional IngestionSnapshot to read events from instead of calling the API.
+        """
         all_event_ids = []
         all_event_details = []
 
         try:
-            for sport in self.active_sports:
-                data = self._make_request(f'/v4/sports/{sport}/events')
-                if data:
-                    for info in data:
-                        all_event_ids.append(info['id'])
-                        event_id = info['id']
-                        sport_name = info['sport_title']
-                        game_time = info['commence_time']
-                        home_team = info['home_team']
-                        away_team = info['away_team']
-                        all_event_details.append((
-                            event_id,
-                            sport_name,
-                            game_time,
-                            home_team,
-                            away_team
-                        ))
-                    logger.info(f"Events successfully fetched for sport: {sport}.")
-                else:
-                    logger.warning(f"No events found for sport: {sport}.")
+            events = snapshot.events if snapshot is not None else self.fetch_events()
+            for info in events:
+                all_event_ids.append(info['id'])
+                event_id = info['id']
+                sport_name = info['sport_title']
+                game_time = info['commence_time']
+                home_team = info['home_team']
+                away_team = info['away_team']
+                all_event_details.append((
+                    event_id,
+                    sport_name,
+                    game_time,
+                    home_team,
+                    away_team
+                ))
             return all_event_ids, all_event_details
         except Exception as e:
             logger.error(f"Failed to fetch events for active sports. Error: {e}")
@@ -133,11 +269,51 @@ class Odds_API:
 
 
     # Below done
-    def get_props(self):
-        """Get player props for all active sports."""
-
-        event_id_list, all_event_details = self.get_events()
+    def get_props(self, all_event_details=None):
+        """Get player props for all active sports.
+
+        Args:
+            all_event_details: Optional event detail tuples from get_events; fetched when omitted.
+        """
+        return list(self.iter_props(all_event_details))
+
+    def iter_props(self, all_event_details=None):
+        """Yield each event's props payload as soon as it is fetched, in event order.
+
+        Only a small window of requests is in flight at once, so the caller can flatten and drop
+        each payload before the rest of the slate has been downloaded.
+
+        Args:
+            all_event_details: Optional event detail tuples from get_events; fetched when omitted.
+        """
+        if all_event_details is None:
+            _, all_event_details = self.get_events()
+
+        jobs = self._props_jobs(all_event_details)
+
+        if self.max_workers > 1 and len(jobs) > 1:
+            # Keep up to two requests per worker queued and hand results back in submission order
+            window = self.max_workers * 2
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as executor:
+                pending = deque()
+                for job in jobs:
+                    pending.append(executor.submit(self._fetch_event_props, *job))
+                    if len(pending) >= window:
+                        data = pending.popleft().result()
+                        if data:
+                            yield data
+                while pending:
+                    data = pending.popleft().result()
+                    if data:
+                        yield data
+        else:
+            for job in jobs:
+                data = self._fetch_event_props(*job)
+                if data:
+                    yield data
 
+    def _props_jobs(self, all_event_details):
+        """Build the (event_id, sport_name, sport, markets_joined) request for every event we have markets for."""
         # Define market groups by sport_name
         market_groups = {
             'NFL': [
@@ -178,8 +354,8 @@ class Odds_API:
             'MLB': 'baseball_mlb'
         }
 
-        all_props = []
-
+        # Build one request per event, skipping events we have no markets for
+        jobs = []
         for event_id, sport_name, _, _, _ in all_event_details:
             # Map sport_name to the correct sport key for API call
             sport = sport_mapping.get(sport_name)
@@ -193,27 +369,43 @@ class Odds_API:
                 logger.warning(f"No markets defined for sport: {sport_name}. Skipping event {event_id}.")
                 continue
 
-            markets_joined = ",".join(markets)
+            jobs.append((event_id, sport_name, sport, markets))
+
+        # Each market costs one request per region, drop the exotic markets if that would eat the reserve
+        regions = len(PROPS_REGIONS.split(','))
+        estimated_cost = sum(len(markets) * regions for _, _, _, markets in jobs)
+        if self.quota.is_low(estimated_cost):
+            logger.warning(f"Props would cost ~{estimated_cost} requests with {self.quota.remaining} remaining; "
+                           f"skipping low-priority markets to keep the reserve of {self.quota.reserve}.")
+            jobs = [
+                (event_id, sport_name, sport, [m for m in markets if m not in LOW_PRIORITY_MARKETS])
+                for event_id, sport_name, sport, markets in jobs
+            ]
+        jobs = [
+            (event_id, sport_name, sport, ",".join(markets))
+            for event_id, sport_name, sport, markets in jobs if markets
+        ]
 
-            try:
-                # Fetch props for the event
-                data = self._make_request(f'/v4/sports/{sport}/events/{event_id}/odds/', params={
-                    'regions': 'us,us2,eu,au,uk',
-                    'markets': markets_joined,
-                    'oddsFormat': 'american'
-                })
+        return jobs
 
-                if data:
-                    # Collect the props data
-                    all_props.append(data)
-                    logger.info(f"Props for {event_id} (sport: {sport_name}) successfully fetched.")
-                else:
-                    logger.info(f"No data found for event {event_id} (sport: {sport_name}).")
+    def _fetch_event_props(self, event_id, sport_name, sport, markets_joined):
+        """Fetch the props payload for a single event, isolating any failure to that event."""
+        try:
+            # Fetch props for the event
+            data = self._make_request(f'/v4/sports/{sport}/events/{event_id}/odds/', params={
+                'regions': PROPS_REGIONS,
+                'markets': markets_joined,
+                'oddsFormat': 'american'
+            })
 
-            except Exception as e:
-                logger.error(f"Failed to fetch props for event {event_id} (sport: {sport_name}): {e}")
+            if data:
+                logger.info(f"Props for {event_id} (sport: {sport_name}) successfully fetched.")
+                return data
+            logger.info(f"No data found for event {event_id} (sport: {sport_name}).")
 
-        return all_props
+        except Exception as e:
+            logger.error(f"Failed to fetch props for event {event_id} (sport: {sport_name}): {e}")
+        return None
 
 
 
@@ -229,10 +421,14 @@ class Odds_API:
 
 
 # below done
-    def bookies_and_odds(self):
-        """Show bookies' odds across all upcoming games."""
+    def bookies_and_odds(self, snapshot=None):
+        """Show bookies' odds across all upcoming games.
+
+        Args:
+            snapshot: Optional IngestionSnapshot to read team odds from instead of calling the API.
+        """
 
-        data = self.get_team_odds()
+        data = snapshot.team_odds if snapshot is not None else self.get_team_odds()
         game_lines = []
         game_spreads = []
         game_totals = []
@@ -240,17 +436,17 @@ class Odds_API:
         try:
             for sport in data:
                 game_time = sport['commence_time']
-                game_ID = sport['id']
+                game_ID = intern_str(sport['id'])
                 home_team = sport['home_team']
                 away_team = sport['away_team']
-                sport_type = sport['sport_key']
+                sport_type = intern_str(sport['sport_key'])
 
                 for bookmaker in sport['bookmakers']:
-                    bookie = bookmaker['title']
+                    bookie = intern_str(bookmaker['title'])
                     last_updated = bookmaker['last_update']
 
                     for market in bookmaker['markets']:
-                        matchup_type = market['key']
+                        matchup_type = intern_str(market['key'])
                         if matchup_type == 'spreads':
                             spread_outcomes = market['outcomes']
                             if len(spread_outcomes) == 2:
@@ -261,7 +457,7 @@ class Odds_API:
                                 spd_point2 = spread_outcomes[1]['point']
                                 spd_line2 = spread_outcomes[1]['price']
                                 logger.info(f"game_spreads for {game_ID} successfully fetched")
-                                game_spreads.append((
+                                game_spreads.append(GameSpread(
                                     game_ID, bookie, matchup_type, spd_team1, spd_point1, spd_line1,
                                     spd_team2, spd_point2, spd_line2, game_time, last_updated, sport_type
                                 ))
@@ -273,7 +469,7 @@ class Odds_API:
                                 h2h_team2 = line_outcomes[1]['name']
                                 h2h_line2 = line_outcomes[1]['price']
                                 logger.info(f"game_lines for {game_ID} successfully fetched")
-                                game_lines.append((
+                                game_lines.append(GameLine(
                                     game_ID, bookie, matchup_type, h2h_team1, h2h_line1,
                                     h2h_team2, h2h_line2, game_time, last_updated, sport_type
                                 ))
@@ -287,7 +483,7 @@ class Odds_API:
                                 over_under_total2 = totals_outcomes[1]['point']
                                 over_under_line2 = totals_outcomes[1]['price']
                                 logger.info(f"game_totals for {game_ID} successfully fetched")
-                                game_totals.append((
+                                game_totals.append(GameTotal(
                                     game_ID, bookie, matchup_type, home_team, away_team,
                                     over_or_under1, over_under_total1, over_under_line1,
                                     over_or_under2, over_under_total2, over_under_line2,
@@ -301,68 +497,155 @@ class Odds_API:
 
 # above done
 
-    def prop_bets_filters(self):
-        """Collect all prop bets and unique player prop data for database insertion."""
+    def prop_bets_filters(self, snapshot=None):
+        """Collect all prop bets and unique player prop data for database insertion.
+
+        Args:
+            snapshot: Optional IngestionSnapshot to read props from instead of calling the API.
+        """
         
-        props_data = self.get_props()
+        props_data = snapshot.props if snapshot is not None else self.get_props()
         all_prop_bets = []
-        unique_player_props = []
+        # (player_name, game_id) -> row; dicts keep first-seen order and make the membership check O(1)
+        unique_player_props = {}
         
-        try:
-            for data in props_data:
-                if not data.get('bookmakers'):
+        for data in props_data:
+            all_prop_bets.extend(self.flatten_event_props(data, unique_player_props))
+        if snapshot is not None and snapshot.saved_prop_rows:
+            # Events the scheduler skipped, as of their last fetch
+            self.add_unique_player_props(snapshot.saved_prop_rows, unique_player_props)
+            all_prop_bets.extend(snapshot.saved_prop_rows)
+        
+        logger.info(f"Collected {len(all_prop_bets)} prop bets and {len(unique_player_props)} unique player props")
+        return all_prop_bets, list(unique_player_props.values())
+
+    def iter_prop_bets(self, all_event_details=None, unique_player_props=None, scheduler=None):
+        """Stream prop bets one event at a time instead of building the full list.
+
+        Each event's payload is fetched, flattened and dropped before the next one is requested,
+        so peak memory holds a handful of payloads and one event's rows rather than the whole slate.
+
+        Args:
+            all_event_details: Optional event detail tuples from get_events; fetched when omitted.
+            unique_player_props: Optional dict filled with (player_name, game_id) -> unique player prop row.
+            scheduler: Optional PollingScheduler; only due events are fetched, the rest (and due
+                events whose fetch failed) yield the rows saved from their last fetch.
+
+        Yields:
+            List of PropBet rows for one event.
+        """
+        if unique_player_props is None:
+            unique_player_props = {}
+        if all_event_details is None:
+            _, all_event_details = self.get_events()
+
+        total_rows = 0
+        if scheduler is not None:
+            fetched = set()
+            for data in self.iter_props(scheduler.due_events(all_event_details)):
+                # The payload is dropped once flattened; its rows are saved for the runs that skip it
+                rows = self.flatten_event_props(data, unique_player_props)
+                scheduler.record(data.get('id'), scheduler.latest_update(data))
+                scheduler.store_rows(data.get('id'), rows)
+                fetched.add(data.get('id'))
+                total_rows += len(rows)
+                if rows:
+                    yield rows
+            replayed_rows = 0
+            for details in all_event_details:
+                if details[0] in fetched:
                     continue
+                rows = scheduler.load_rows(details[0])
+                if rows:
+                    self.add_unique_player_props(rows, unique_player_props)
+                    replayed_rows += len(rows)
+                    yield rows
+            logger.info(f"Replayed {replayed_rows} saved prop bets of events that were not fetched this run")
+            total_rows += replayed_rows
+            scheduler.prune(all_event_details)
+            scheduler.save()
+        else:
+            for data in self.iter_props(all_event_details):
+                rows = self.flatten_event_props(data, unique_player_props)
+                total_rows += len(rows)
+                if rows:
+                    yield rows
+
+        logger.info(f"Streamed {total_rows} prop bets and {len(unique_player_props)} unique player props")
+
+    def flatten_event_props(self, data, unique_player_props):
+        """Flatten one event's props payload into prop bet rows.
+
+        Args:
+            data: Props payload from /v4/sports/{sport}/events/{event_id}/odds/.
+            unique_player_props: Dict of (player_name, game_id) -> unique player prop row, updated in place.
+
+        Returns:
+            List of PropBet rows; the repeated strings are interned so rows share them.
+        """
+        prop_bets = []
+        if not data.get('bookmakers'):
+            return prop_bets
+
+        try:
+            game_id = intern_str(data['id'])
+            sport_type = intern_str(data['sport_key'])
+            
+            for bookie_type in data['bookmakers']:
+                bookie = intern_str(bookie_type['key'])
+                for prop in bookie_type['markets']:
+                    prop_type = intern_str(prop['key'])
+                    last_update = intern_str(prop.get('last_update', ''))
                     
-                game_id = data['id']
-                sport_type = data['sport_key']
-                
-                for bookie_type in data['bookmakers']:
-                    bookie = bookie_type['key']
-                    for prop in bookie_type['markets']:
-                        prop_type = prop['key']
-                        last_update = prop.get('last_update', '')
+                    for betting_line in prop['outcomes']:
+                        name = intern_str(betting_line.get('name'))
+                        description = intern_str(betting_line.get('description'))
+                        price = betting_line.get('price')
+                        point = betting_line.get('point', 'N/A')
                         
-                        for betting_line in prop['outcomes']:
-                            name = betting_line.get('name')
-                            description = betting_line.get('description')
-                            price = betting_line.get('price')
-                            point = betting_line.get('point', 'N/A')
-                            
-                            # Collect all prop bets
-                            all_prop_bets.append((
-                                game_id,
-                                last_update,
-                                bookie,
-                                prop_type,
-                                name,
-                                description,
-                                price,
-                                point,
-                                sport_type
-                            ))
-                            
-                            # Collect unique player props
-                            # Use description for player name, except for specific markets
-                            player_name = name if prop_type in ['first_goal_scorer', 'anytime_goal'] else description
-                            
-                            # Validate player_name and ensure uniqueness
-                            if player_name and player_name not in ['Over', 'Under', 'Yes', 'No'] and (player_name, game_id) not in [(p[0], p[1]) for p in unique_player_props]:
-                                unique_player_props.append((
-                                    player_name,   # Player name
-                                    game_id,       # Game ID
-                                    sport_type,    # Sport type
-                                    last_update    # Market's last_update timestamp
-                                ))
-            
-            logger.info(f"Collected {len(all_prop_bets)} prop bets and {len(unique_player_props)} unique player props")
+                        # Collect all prop bets
+                        prop_bets.append(PropBet(
+                            game_id,
+                            last_update,
+                            bookie,
+                            prop_type,
+                            name,
+                            description,
+                            price,
+                            point,
+                            sport_type
+                        ))
             
         except Exception as e:
-            logger.error(f"Failed to filter prop bets or player props. Error: {e}")
+            logger.error(f"Failed to filter prop bets or player props for event {data.get('id')}. Error: {e}")
         
-        return all_prop_bets, unique_player_props
-
-    def filter_scores(self):
-        scores = self.get_scores()  # Assume this gets your API scores
+        self.add_unique_player_props(prop_bets, unique_player_props)
+        return prop_bets
+
+    @staticmethod
+    def add_unique_player_props(prop_bets, unique_player_props):
+        """Collect the unique (player_name, game_id) props of PropBet rows.
+
+        Args:
+            prop_bets: PropBet rows of one event.
+            unique_player_props: Dict of (player_name, game_id) -> unique player prop row, updated in place.
+        """
+        for row in prop_bets:
+            # Use description for player name, except for specific markets
+            player_name = row.bet_type if row.prop_type in ['first_goal_scorer', 'anytime_goal'] else row.player_name
+
+            # Validate player_name and ensure uniqueness, keeping the first last_update seen
+            if player_name and player_name not in NON_PLAYER_NAMES and (player_name, row.game_id) not in unique_player_props:
+                unique_player_props[(player_name, row.game_id)] = (
+                    player_name,                 # Player name
+                    row.game_id,                 # Game ID
+                    row.sport_type,              # Sport type
+                    row.last_updated_timestamp   # Market's last_update timestamp
+                )
+
+    def filter_scores(self, snapshot=None):
+        """Flatten game scores, reading them from the snapshot when one is given."""
+        scores = snapshot.scores if snapshot is not None else self.get_scores()  # Assume this gets your API scores
         all_game_results = []
         try:
             for game in scores:
@@ -0,0 +1,190 @@
+import logging
+import multiprocessing
+import os
+from statistics import median
+
+from src.data.arbitrage import ArbitrageAnalyzer
+from src.data.expected_value import ExpectedValueAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+def available_cpus():
+    """Number of CPUs this process may run on (Lambda reports its vCPU share here)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS or Windows
+        return os.cpu_count() or 1
+
+
+def _shard_worker(conn, engine, arbitrage_options, ev_options):
+    """Group one shard's lines as they arrive, then analyze them when asked.
+
+    Commands received on the pipe are ('lines', rows), ('overrounds', None), which replies with the
+    shard's prop overrounds, and ('analyze', median_overround), which replies with the shard's
+    (arbitrage, multiway arbitrage, expected value) results and ends the worker.
+    """
+    try:
+        arbitrage = ArbitrageAnalyzer(engine=engine, **arbitrage_options)
+        ev_props = ExpectedValueAnalyzer(engine=engine, **ev_options)
+        while True:
+            command, payload = conn.recv()
+            if command == 'lines':
+                arbitrage.add_lines(payload)
+                ev_props.add_prop_lines(payload)
+            elif command == 'overrounds':
+                conn.send(('ok', [overround for overrounds in ev_props.prop_overrounds().values() for overround in overrounds]))
+            elif command == 'analyze':
+                ev_props.median_overround = payload
+                ev_results = ev_props.analyze_prop() if ev_props.prop_lines_grouped else []  # A shard can end up without games
+                conn.send(('ok', (arbitrage.analyze(), arbitrage.analyze_multiway(), ev_results)))
+                break
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+class ParallelPropAnalyzer:
+    """Runs ArbitrageAnalyzer and ExpectedValueAnalyzer over prop lines sharded by game_ID.
+
+    Neither analyzer compares lines across games, so each game's lines go to one worker process
+    that groups them while the rest of the slate is still streaming in. The only slate-wide input,
+    the median overround used to normalize one-sided props, is collected from every shard and
+    pinned on each of them before they analyze. Results are merged back in the order a single
+    analyzer returns them, with ties in order of each game's first line.
+
+    Workers are plain processes talking over pipes, since Lambda has no /dev/shm for the
+    semaphores multiprocessing.Pool needs. They are spawned rather than forked: the pool starts
+    while Odds_API's fetch threads and pooled session are still live, and a forked child could
+    inherit a lock one of those threads held. The pool starts once min_lines_per_worker * 2 lines
+    are queued; smaller slates, and machines with one CPU, are analyzed in-process.
+    """
+
+    def __init__(self, workers=None, min_lines_per_worker=25000, engine='auto', arbitrage_options=None, ev_options=None):
+        """Initialize the driver.
+
+        Args:
+            workers: Number of worker processes (default: ANALYSIS_WORKERS env var, or the available CPUs).
+            min_lines_per_worker: Slate size per worker; the pool starts once twice this many lines are queued (default: 25000).
+            engine: Engine passed to both analyzers (default: 'auto').
+            arbitrage_options: Extra keyword arguments for ArbitrageAnalyzer.
+            ev_options: Extra keyword arguments for ExpectedValueAnalyzer.
+        """
+        self.workers = int(workers or os.getenv('ANALYSIS_WORKERS', 0) or available_cpus())
+        if self.workers > 1 and available_cpus() < 2:
+            # Workers would only take turns on the one CPU, on top of pickling every line to them
+            logger.info("Only one CPU available, analyzing props in-process")
+            self.workers = 1
+        self.min_lines_per_worker = min_lines_per_worker
+        self.engine = engine
+        self.arbitrage_options = arbitrage_options or {}
+        self.ev_options = ev_options or {}
+        self.buffer = []
+        self.game_rank = {}  # game_ID -> order of its first line
+        self.game_shards = {}  # game_ID -> worker index
+        self.processes = []
+        self.connections = []
+
+    def add_lines(self, lines):
+        """Queue a streamed chunk of PropBet rows, starting the workers once the slate is big enough."""
+        game_rank = self.game_rank
+        for line in lines:
+            if line.game_id not in game_rank:
+                game_rank[line.game_id] = len(game_rank)
+
+        if self.connections:
+            self._send(lines)
+            return
+        self.buffer.extend(lines)
+        if self.workers > 1 and len(self.buffer) >= self.min_lines_per_worker * 2:
+            self._start()
+            buffer, self.buffer = self.buffer, []
+            self._send(buffer)
+
+    def _start(self):
+        logger.info(f"Starting {self.workers} analysis workers")
+        context = multiprocessing.get_context('spawn')
+        for _ in range(self.workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_shard_worker,
+                args=(child_conn, self.engine, self.arbitrage_options, self.ev_options),
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self.processes.append(process)
+            self.connections.append(parent_conn)
+
+    def _send(self, lines):
+        """Split lines by the worker owning their game; new games go round robin."""
+        shards = [[] for _ in self.connections]
+        game_shards = self.game_shards
+        for line in lines:
+            shard = game_shards.get(line.game_id)
+            if shard is None:
+                shard = game_shards[line.game_id] = len(game_shards) % len(shards)
+            shards[shard].append(line)
+        for conn, shard in zip(self.connections, shards):
+            if shard:
+                conn.send(('lines', shard))
+
+    def _gather(self, command, payload=None):
+        for conn in self.connections:
+            conn.send((command, payload))
+        replies = []
+        for index, conn in enumerate(self.connections):
+            status, reply = conn.recv()
+            if status == 'error':
+                raise RuntimeError(f"Analysis worker {index} failed: {reply}")
+            replies.append(reply)
+        return replies
+
+    def _stop(self):
+        for conn in self.connections:
+            conn.close()
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.connections = []
+        self.processes = []
+
+    def _merge(self, results, sort_index):
+        """Merge shard results sorted descending on sort_index, ties in game order like a single analyzer."""
+        game_rank = self.game_rank
+        merged = [row for rows in results for row in rows]
+        merged.sort(key=lambda row: (-row[sort_index], game_rank[row[0]]))
+        return merged
+
+    def analyze(self):
+        """Analyze every queued line.
+
+        Returns:
+            Tuple of (arbitrage, multiway arbitrage, expected value) results, as returned by
+            ArbitrageAnalyzer.analyze, ArbitrageAnalyzer.analyze_multiway and
+            ExpectedValueAnalyzer.analyze_prop over the whole slate.
+        """
+        if not self.connections:
+            logger.info(f"Analyzing {len(self.buffer)} prop lines in-process")
+            arbitrage = ArbitrageAnalyzer(engine=self.engine, **self.arbitrage_options)
+            arbitrage.add_lines(self.buffer)
+            ev_props = ExpectedValueAnalyzer(engine=self.engine, **self.ev_options)
+            ev_props.add_prop_lines(self.buffer)
+            self.buffer = []
+            return arbitrage.analyze(), arbitrage.analyze_multiway(), ev_props.analyze_prop()
+
+        try:
+            all_overrounds = [overround for overrounds in self._gather('overrounds') for overround in overrounds]
+            median_overround = median(all_overrounds) if all_overrounds else None
+            results = self._gather('analyze', median_overround)
+        finally:
+            self._stop()
+
+        arbitrage_results, multiway_results, ev_results = zip(*results)
+        return (
+            self._merge(arbitrage_results, 13),  # Index 13 is profit_percentage
+            self._merge(multiway_results, 13),
+            self._merge(ev_results, 7)  # Index 7 is ev
+        )
@@ -0,0 +1,114 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class QuotaTracker:
+    """Records Odds API usage per endpoint and sport from the x-requests-* response headers."""
+
+    def __init__(self, reserve=0):
+        """Initialize the tracker.
+
+        Args:
+            reserve: Requests to keep in hand; once the remaining quota would drop below this,
+                low-priority markets should be skipped (default: 0, never skip).
+        """
+        self.reserve = reserve
+        self.remaining = None  # Last known x-requests-remaining
+        self.used = None  # Last known x-requests-used
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def classify(endpoint):
+        """Map a request path to an (endpoint name, sport) pair, e.g. ('event_odds', 'basketball_nba')."""
+        parts = endpoint.strip('/').split('/')
+        # /v4/sports, /v4/sports/{sport}/odds, /v4/sports/{sport}/events/{event_id}/odds
+        if len(parts) <= 2:
+            return parts[-1], None
+        sport = parts[2]
+        if len(parts) >= 6 and parts[3] == 'events':
+            return 'event_odds', sport
+        return parts[3] if len(parts) > 3 else 'sport', sport
+
+    @staticmethod
+    def _header_number(headers, name):
+        """Parse a numeric quota header, returning None when it is missing or malformed."""
+        value = headers.get(name) if headers else None
+        if value is None:
+            return None
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return None
+
+    def record(self, endpoint, status, latency, headers=None):
+        """Record a single API call.
+
+        Args:
+            endpoint: Request path, e.g. '/v4/sports/basketball_nba/odds/'.
+            status: HTTP status code, or None when the request never got a response.
+            latency: Wall time of the call in seconds.
+            headers: Response headers carrying x-requests-remaining/used/last.
+        """
+        name, sport = self.classify(endpoint)
+        remaining = self._header_number(headers, 'x-requests-remaining')
+        used = self._header_number(headers, 'x-requests-used')
+        cost = self._header_number(headers, 'x-requests-last') or 0
+
+        with self._lock:
+            # Responses can arrive out of order from the thread pool, quota only moves one way
+            if remaining is not None:
+                self.remaining = remaining if self.remaining is None else min(self.remaining, remaining)
+            if used is not None:
+                self.used = used if self.used is None else max(self.used, used)
+
+            entry = self.stats.setdefault((name, sport), {
+                'calls': 0, 'cost': 0, 'latency': 0.0, 'max_latency': 0.0, 'statuses': {}
+            })
+            entry['calls'] += 1
+            entry['cost'] += cost
+            entry['latency'] += latency
+            entry['max_latency'] = max(entry['max_latency'], latency)
+            status_key = status if status is not None else 'error'
+            entry['statuses'][status_key] = entry['statuses'].get(status_key, 0) + 1
+
+    def is_low(self, upcoming_cost=0):
+        """Return True when spending upcoming_cost would leave less than the reserve."""
+        if not self.reserve or self.remaining is None:
+            return False
+        return self.remaining - upcoming_cost < self.reserve
+
+    def summary(self):
+        """Summarize usage as a dict with totals and a per endpoint/sport breakdown."""
+        with self._lock:
+            endpoints = []
+            for (name, sport), entry in sorted(self.stats.items(), key=lambda item: (item[0][0], item[0][1] or '')):
+                endpoints.append({
+                    'endpoint': name,
+                    'sport': sport,
+                    'calls': entry['calls'],
+                    'cost': entry['cost'],
+                    'avg_latency': round(entry['latency'] / entry['calls'], 3) if entry['calls'] else 0,
+                    'max_latency': round(entry['max_latency'], 3),
+                    'statuses': dict(entry['statuses'])
+                })
+            return {
+                'calls': sum(e['calls'] for e in endpoints),
+                'cost': sum(e['cost'] for e in endpoints),
+                'remaining': self.remaining,
+                'used': self.used,
+                'endpoints': endpoints
+            }
+
+    def log_summary(self):
+        """Log the usage summary and return it."""
+        summary = self.summary()
+        logger.info(f"Odds API usage: {summary['calls']} calls costing {summary['cost']} requests, "
+                    f"{summary['remaining']} remaining, {summary['used']} used this period")
+        for e in summary['endpoints']:
+            logger.info(f"  {e['endpoint']} ({e['sport'] or 'all'}): {e['calls']} calls, cost {e['cost']}, "
+                        f"avg {e['avg_latency']}s, max {e['max_latency']}s, statuses {e['statuses']}")
+        if self.is_low():
+            logger.warning(f"Odds API quota is below the reserve of {self.reserve} requests")
+        return summary
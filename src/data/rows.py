@@ -0,0 +1,76 @@
+import sys
+from typing import NamedTuple, Optional, Union
+
+
+def intern_str(value):
+    """Intern a string so every row repeating it shares one object; other values pass through."""
+    return sys.intern(value) if type(value) is str else value
+
+
+def parse_point(value):
+    """Turn a betting point written out as text ('20.5' or 'N/A') back into a float, leaving 'N/A' as is."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+class PropBet(NamedTuple):
+    """One outcome of a player prop market, as flattened from an event's props payload."""
+    game_id: str
+    last_updated_timestamp: str
+    bookie: str
+    prop_type: str
+    bet_type: str
+    player_name: Optional[str]
+    betting_line: Optional[int]
+    betting_point: Union[float, str]
+    sport_type: str
+
+
+class GameLine(NamedTuple):
+    """A bookie's moneyline (h2h) for one game."""
+    game_id: str
+    bookie: str
+    matchup_type: str
+    home_team: str
+    line_1: int
+    away_team: str
+    line_2: int
+    event_timestamp: str
+    last_updated_timestamp: str
+    sport_type: str
+
+
+class GameSpread(NamedTuple):
+    """A bookie's point spread for one game."""
+    game_id: str
+    bookie: str
+    matchup_type: str
+    home_team: str
+    spread_1: float
+    line_1: int
+    away_team: str
+    spread_2: float
+    line_2: int
+    event_timestamp: str
+    last_updated_timestamp: str
+    sport_type: str
+
+
+class GameTotal(NamedTuple):
+    """A bookie's over/under total for one game."""
+    game_id: str
+    bookie: str
+    matchup_type: str
+    home_team: str
+    away_team: str
+    over_or_under_1: str
+    over_under_total_1: float
+    over_under_line_1: int
+    over_or_under_2: str
+    over_under_total_2: float
+    over_under_line_2: int
+    event_timestamp: str
+    last_updated_timestamp: str
+    sport_type: str
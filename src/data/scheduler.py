@@ -0,0 +1,214 @@
+import gzip
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+
+from src.data.rows import PropBet, intern_str
+
+logger = logging.getLogger(__name__)
+
+# (minutes until commence_time, refresh interval in minutes), checked in order.
+# Started games and games within the hour are refreshed every run.
+DEFAULT_TIERS = [
+    (60, 0),
+    (6 * 60, 10),
+    (24 * 60, 30),
+    (72 * 60, 120),
+]
+DEFAULT_FAR_INTERVAL = 360  # Minutes between refreshes for games more than 3 days out
+
+
+def parse_timestamp(value):
+    """Parse an Odds API ISO 8601 timestamp ('2025-03-14T02:30:00Z') into an aware datetime."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class PollingScheduler:
+    """Decides which events' props are due for a refresh based on how close they are to starting.
+
+    Each event gets a refresh interval from its commence_time (tight near tip-off, sparse far out),
+    halved while its lines are still moving. Only the fetch is skipped for events that are not due:
+    the prop rows flattened from their last fetch are kept on disk, one gzip JSON file per event,
+    and replayed so every output of the run still covers the whole slate. The replayed rows carry
+    their original last_update. The timing state is a gzip JSON file too, so both survive warm
+    Lambda invocations; an event without saved rows is always due.
+
+    A read_only scheduler picks and replays events the same way but records nothing, so a job that
+    only refreshes the analysis does not mark events as fetched for the main ingestion.
+    """
+
+    def __init__(self, state_path=None, tiers=None, far_interval=DEFAULT_FAR_INTERVAL, moving_factor=0.5,
+                 rows_dir=None, read_only=False):
+        """Initialize the scheduler and load any saved state.
+
+        Args:
+            state_path: Path of the state file (default: POLLING_STATE_PATH env var, or the temp dir).
+            tiers: List of (minutes to start, refresh minutes) pairs (default: DEFAULT_TIERS).
+            far_interval: Refresh minutes for games beyond the last tier (default: 360).
+            moving_factor: Interval multiplier for events whose last_update changed on the
+                previous fetch (default: 0.5).
+            rows_dir: Directory of the per-event prop rows (default: POLLING_ROWS_DIR env var, or
+                the temp dir).
+            read_only: Never record fetches or write state and rows (default: False).
+        """
+        self.state_path = state_path or os.getenv(
+            'POLLING_STATE_PATH', os.path.join(tempfile.gettempdir(), 'odds_polling_state.json.gz')
+        )
+        self.rows_dir = rows_dir or os.getenv(
+            'POLLING_ROWS_DIR', os.path.join(tempfile.gettempdir(), 'odds_polling_rows')
+        )
+        self.read_only = read_only
+        self.tiers = tiers or DEFAULT_TIERS
+        self.far_interval = far_interval
+        self.moving_factor = moving_factor
+        self.state = {}
+        self.load()
+
+    def load(self):
+        """Load the saved state, starting empty if it is missing or unreadable."""
+        try:
+            with gzip.open(self.state_path, 'rt', encoding='utf-8') as f:
+                saved = json.load(f)
+            # Older state files also cached each event's whole payload, which is no longer used
+            self.state = {event_id: {key: value for key, value in event_state.items() if key != 'payload'}
+                          for event_id, event_state in saved.items()}
+            logger.info(f"Loaded polling state for {len(self.state)} events from {self.state_path}")
+        except FileNotFoundError:
+            self.state = {}
+        except Exception as e:
+            logger.warning(f"Could not read polling state from {self.state_path}, starting fresh. Error: {e}")
+            self.state = {}
+
+    def save(self):
+        """Persist the state for the next invocation."""
+        if self.read_only:
+            return
+        try:
+            with gzip.open(self.state_path, 'wt', encoding='utf-8') as f:
+                json.dump(self.state, f)
+        except Exception as e:
+            logger.error(f"Failed to save polling state to {self.state_path}. Error: {e}")
+
+    def refresh_interval(self, commence_time, event_state=None, now=None):
+        """Return the refresh interval in minutes for an event."""
+        now = now or datetime.now(timezone.utc)
+        start = parse_timestamp(commence_time)
+        if start is None:
+            return 0
+        minutes_to_start = (start - now).total_seconds() / 60
+
+        interval = self.far_interval
+        for max_minutes, tier_interval in self.tiers:
+            if minutes_to_start <= max_minutes:
+                interval = tier_interval
+                break
+
+        if event_state and event_state.get('moving'):
+            interval *= self.moving_factor
+        return interval
+
+    def is_due(self, event_id, commence_time, now=None):
+        """Return True if the event has never been fetched, has no saved rows or its refresh interval has elapsed."""
+        now = now or datetime.now(timezone.utc)
+        event_state = self.state.get(event_id)
+        if not event_state or not os.path.exists(self._rows_path(event_id)):
+            return True
+        last_fetched = parse_timestamp(event_state.get('last_fetched'))
+        if last_fetched is None:
+            return True
+        elapsed = (now - last_fetched).total_seconds() / 60
+        return elapsed >= self.refresh_interval(commence_time, event_state, now)
+
+    def due_events(self, all_event_details, now=None):
+        """Filter event detail tuples from get_events down to the events due for a refresh."""
+        now = now or datetime.now(timezone.utc)
+        due = [details for details in all_event_details if self.is_due(details[0], details[2], now)]
+        logger.info(f"{len(due)} of {len(all_event_details)} events are due for a props refresh")
+        return due
+
+    @staticmethod
+    def latest_update(payload):
+        """Return the newest bookmaker/market last_update in a props payload."""
+        latest = ''
+        for bookmaker in payload.get('bookmakers') or []:
+            latest = max(latest, bookmaker.get('last_update') or '')
+            for market in bookmaker.get('markets') or []:
+                latest = max(latest, market.get('last_update') or '')
+        return latest or None
+
+    def record(self, event_id, last_update, now=None):
+        """Record a fresh fetch of an event's props.
+
+        Args:
+            event_id: The event's id.
+            last_update: Newest last_update in the fetched payload, from latest_update().
+            now: Time of the fetch (default: now).
+        """
+        if not event_id or self.read_only:
+            return
+        now = now or datetime.now(timezone.utc)
+        previous = self.state.get(event_id) or {}
+        self.state[event_id] = {
+            'last_fetched': now.isoformat(),
+            'last_update': last_update,
+            'moving': bool(previous.get('last_update')) and previous.get('last_update') != last_update
+        }
+
+    def prune(self, all_event_details):
+        """Forget events that are no longer listed, along with their saved rows."""
+        if self.read_only:
+            return
+        current_ids = {details[0] for details in all_event_details}
+        for event_id in list(self.state):
+            if event_id not in current_ids:
+                del self.state[event_id]
+        try:
+            saved = os.listdir(self.rows_dir)
+        except FileNotFoundError:
+            return
+        for name in saved:
+            if name.endswith('.json.gz') and name[:-len('.json.gz')] not in current_ids:
+                try:
+                    os.remove(os.path.join(self.rows_dir, name))
+                except OSError as e:
+                    logger.warning(f"Could not remove saved prop rows {name}. Error: {e}")
+
+    def _rows_path(self, event_id):
+        return os.path.join(self.rows_dir, f"{os.path.basename(str(event_id))}.json.gz")
+
+    def store_rows(self, event_id, rows):
+        """Save the prop rows flattened from an event's fresh fetch, replacing the previous ones.
+
+        Args:
+            event_id: The event's id.
+            rows: PropBet rows of the event; an empty list is saved too, so the event is not due again early.
+        """
+        if not event_id or self.read_only:
+            return
+        try:
+            os.makedirs(self.rows_dir, exist_ok=True)
+            with gzip.open(self._rows_path(event_id), 'wt', encoding='utf-8') as f:
+                json.dump([list(row) for row in rows], f)
+        except Exception as e:
+            logger.error(f"Failed to save prop rows of event {event_id} to {self.rows_dir}. Error: {e}")
+
+    def load_rows(self, event_id):
+        """Return the PropBet rows saved from the event's last fetch, or None if there are none."""
+        try:
+            with gzip.open(self._rows_path(event_id), 'rt', encoding='utf-8') as f:
+                return [PropBet(*(intern_str(value) for value in row)) for row in json.load(f)]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not read saved prop rows of event {event_id}. Error: {e}")
+            return None
@@ -0,0 +1,77 @@
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+class IngestionSnapshot:
+    """Raw Odds API payloads fetched once per run.
+
+    The Odds_API filters (get_events, bookies_and_odds, prop_bets_filters, filter_scores)
+    accept a snapshot and read from it instead of re-requesting the same endpoints.
+    """
+
+    def __init__(self, sports=None, events=None, team_odds=None, props=None, scores=None, fetched_at=None,
+                 saved_prop_rows=None):
+        """Initialize the snapshot with already fetched payloads.
+
+        Args:
+            sports: Raw /v4/sports payload.
+            events: Raw event payloads for every active sport.
+            team_odds: Raw h2h/spreads/totals odds payloads for every active sport.
+            props: Raw per-event props payloads.
+            scores: Raw score payloads for every active sport.
+            fetched_at: UTC time the snapshot was taken (default: now).
+            saved_prop_rows: PropBet rows saved from the last fetch of events whose props were not
+                fetched for this snapshot.
+        """
+        self.sports = sports or []
+        self.events = events or []
+        self.team_odds = team_odds or []
+        self.props = props or []
+        self.scores = scores or []
+        self.fetched_at = fetched_at or datetime.now(timezone.utc)
+        self.saved_prop_rows = saved_prop_rows or []
+
+    @classmethod
+    def build(cls, odds_api, include_scores=True, include_team_odds=True, include_props=True, scheduler=None):
+        """Fetch every payload a run needs exactly once.
+
+        Args:
+            odds_api: Odds_API client used for the requests.
+            include_scores: Fetch scores (default: True).
+            include_team_odds: Fetch moneyline/spread/total odds (default: True).
+            include_props: Fetch per-event player props (default: True).
+            scheduler: Optional PollingScheduler; only events it reports as due are fetched, the
+                rest come from the rows saved from their last fetch (default: None, fetch every event).
+
+        Returns:
+            IngestionSnapshot holding the raw payloads.
+        """
+        sports = odds_api.fetch_active_sports()
+        events = odds_api.fetch_events()
+        snapshot = cls(sports=sports, events=events)
+
+        if include_scores:
+            snapshot.scores = odds_api.get_scores()
+        if include_team_odds:
+            snapshot.team_odds = odds_api.get_team_odds()
+        if include_props:
+            _, all_event_details = odds_api.get_events(snapshot)
+            if scheduler is not None:
+                due_event_details = scheduler.due_events(all_event_details, snapshot.fetched_at)
+                snapshot.props = odds_api.get_props(due_event_details) if due_event_details else []
+                for payload in snapshot.props:
+                    scheduler.record(payload.get('id'), scheduler.latest_update(payload), snapshot.fetched_at)
+                    scheduler.store_rows(payload.get('id'), odds_api.flatten_event_props(payload, {}))
+                fetched = {payload.get('id') for payload in snapshot.props}
+                for details in all_event_details:
+                    if details[0] not in fetched:
+                        snapshot.saved_prop_rows.extend(scheduler.load_rows(details[0]) or [])
+                scheduler.prune(all_event_details)
+                scheduler.save()
+            else:
+                snapshot.props = odds_api.get_props(all_event_details)
+
+        logger.info(f"Snapshot built with {len(snapshot.events)} events, {len(snapshot.team_odds)} team odds, "
+                    f"{len(snapshot.props)} props payloads and {len(snapshot.scores)} scores")
+        return snapshot
@@ -0,0 +1,31 @@
+"""
+aws.py - boto3 clients created once per process and shared by every caller
+
+Creating a boto3 client loads the service model and sets up its own connection pool, which costs
+tens of milliseconds. Clients are thread-safe once built, so one client per service and region
+is kept for the life of the process: a warm Lambda container reuses it on every invocation, and
+Django reuses it on every request.
+"""
+import threading
+
+import boto3
+
+_clients = {}
+_lock = threading.Lock()  # boto3's default session is not safe to create clients from concurrently
+
+
+def get_client(service, region_name=None):
+    """Return the shared boto3 client for service (e.g. 's3' or 'athena'), creating it on first use.
+
+    Args:
+        service: boto3 service name.
+        region_name: Optional region; defaults to the environment's, as boto3.client does.
+    """
+    key = (service, region_name)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = boto3.client(service, region_name=region_name)
+    return client
@@ -2,30 +2,382 @@
 db.py - Contains functionality to interact with our Azure SQL DB
 """
 import psycopg2
+import csv
 import os
 from pathlib import Path
 import logging
 import io
+import re
+import threading
 import traceback
 import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from psycopg2 import sql
 from psycopg2.extras import execute_batch, execute_values
 
+from src.data.rows import parse_point
+
 
 logger = logging.getLogger(__name__)
 
+# Result tables that can be updated in place: their columns in insert order, the unique key that
+# upserts conflict on and deletes match, and whether rows need their game in scores first
+RESULT_TABLES = {
+    'arbitrage': {
+        'columns': ['game_ID', 'Prop_Type', 'Player_Name', 'Betting_Point', 'sport_type',
+                    'bookie_one', 'outcome_one', 'odds_one', 'bet_amount_one',
+                    'bookie_two', 'outcome_two', 'odds_two', 'bet_amount_two',
+                    'profit_percentage', 'last_updated_timestamp', 'market_type'],
+        'key': ['game_ID', 'Prop_Type', 'Player_Name', 'Betting_Point', 'bookie_one', 'outcome_one', 'bookie_two', 'outcome_two'],
+        'check_scores': False,
+        'has_legs': True,  # Rows go through _arbitrage_row: market_type is derived, multi-way legs go to arbitrage_legs
+    },
+    'expected_value_props': {
+        'columns': ['game_ID', 'Bookie', 'Prop_Type', 'Bet_Type', 'Player_Name', 'Betting_Point', 'Betting_Line',
+                    'Expected_Value', 'Fair_Probability', 'Implied_Probability', 'Market_Overround',
+                    'sport_type', 'last_updated_timestamp', 'num_bookies', 'z_score'],
+        'key': ['game_ID', 'Bookie', 'Prop_Type', 'Bet_Type', 'Player_Name', 'Betting_Line'],
+        'check_scores': True,
+    },
+    'expected_value_moneyline': {
+        'columns': ['game_ID', 'Bookie', 'Matchup_Type', 'Team', 'Line', 'Expected_Value',
+                    'Fair_Probability', 'Implied_Probability', 'Market_Overround', 'sport_type',
+                    'event_timestamp', 'last_updated_timestamp'],
+        'key': ['game_ID', 'Bookie', 'Team', 'Line'],
+        'check_scores': True,
+    },
+}
+
+
+# Tables that are emptied and rewritten every run, by truncate_table or refresh_table
+VALID_TABLES = ['upcoming_games', 'latest_spreads', 'latest_moneyline', 'latest_overunder', 'latest_props', 'expected_value_moneyline', 'expected_value_props', 'arbitrage', 'middles']
+
+# Tables whose rows belong to a refreshed table and are replaced along with it
+REFRESH_DEPENDENTS = {'arbitrage': ['arbitrage_legs']}
+
+# Prefix of the per-refresh schemas holding the shadow copies refresh_table loads before swapping them in
+SHADOW_SCHEMA = 'table_refresh'
+SHADOW_MAX_AGE = 3600  # Seconds after which a shadow schema is taken for a leftover of a refresh that died
+
+
+# History tables partition_history_table can range-partition by UTC day of last_updated_timestamp, so
+# retention drops whole partitions on Postgres; on CockroachDB set_history_ttl has row-level TTL expire
+# them instead. They are created unpartitioned and expire by DELETE until either is in place
+PARTITIONED_HISTORY_TABLES = ['moneyline', 'spreads', 'overunder', 'props']
+HISTORY_RETENTION_DAYS = 1
+HISTORY_PARTITIONS_AHEAD = 2  # Days of partitions created before rows arrive for them
+
+
+def _partition_range(bound):
+    """Parse a partition bound from pg_get_expr into (lower, upper), None for MINVALUE/MAXVALUE.
+
+    Returns None for the DEFAULT partition.
+    """
+    match = re.match(r"FOR VALUES FROM \((.+)\) TO \((.+)\)", bound)
+    if match is None:
+        return None
+    return tuple(None if value in ('MINVALUE', 'MAXVALUE') else datetime.fromisoformat(value.strip("'"))
+                 for value in match.groups())
+
+
+# Arbitrage Prop_Types that are game markets rather than player props
+GAME_MARKET_TYPES = ('h2h', 'spreads', 'totals')
+
+
+def _arbitrage_row(line):
+    """Split an arbitrage tuple into its column values, with market_type appended, and its legs (or None)."""
+    market_type = line[1] if line[1] in GAME_MARKET_TYPES else 'player_prop'
+    return tuple(line[:15]) + (market_type,), (line[15] if len(line) > 15 else None)
+
+
+# Row sanitizers shared by the batch writers, one per history/latest table pair
+def _sanitize_spreads(row):
+    return (
+        str(row[0]),  # game_ID
+        str(row[1]),  # Bookie
+        str(row[2]),  # Matchup_Type
+        str(row[3]),  # Home_Team
+        float(row[4]),  # Spread_1
+        int(row[5]),  # Line_1
+        str(row[6]),  # Away_Team
+        float(row[7]),  # Spread_2
+        int(row[8]),  # Line_2
+        row[9],       # event_timestamp
+        row[10],      # last_updated_timestamp
+        str(row[11])  # sport_type
+    )
+
+def _sanitize_moneyline(row):
+    return (
+        str(row[0]),  # game_ID
+        str(row[1]),  # Bookie
+        str(row[2]),  # Matchup_Type
+        str(row[3]),  # Home_Team
+        int(row[4]),  # Line_1
+        str(row[5]),  # Away_Team
+        int(row[6]),  # Line_2
+        row[7],       # event_timestamp
+        row[8],       # last_updated_timestamp
+        str(row[9])   # sport_type
+    )
+
+def _sanitize_overunder(row):
+    return (
+        str(row[0]),  # game_ID
+        str(row[1]),  # Bookie
+        str(row[2]),  # Matchup_Type
+        str(row[3]),  # Home_Team
+        str(row[4]),  # Away_Team
+        str(row[5]),  # Over_or_Under_1
+        float(row[6]),  # Over_Under_Total_1
+        int(row[7]),  # Over_Under_Line_1
+        str(row[8]),  # Over_or_Under_2
+        float(row[9]),  # Over_Under_Total_2
+        int(row[10]), # Over_Under_Line_2
+        row[11],      # event_timestamp
+        row[12],      # last_updated_timestamp
+        str(row[13])  # sport_type
+    )
+
+def _sanitize_props(row):
+    return (
+        str(row[0]),  # game_ID
+        row[1],       # last_updated_timestamp
+        str(row[2]),  # bookie
+        str(row[3]),  # prop_type
+        str(row[4]),  # bet_type
+        str(row[5]),  # player_name
+        int(row[6]),  # betting_line
+        str(row[7]),  # betting_point
+        str(row[8])   # sport_type
+    )
+
+
+def _sanitized_batches(rows, sanitize, batch_size):
+    """Yield rows in batch_size slices, each sanitized for execute_values."""
+    for start in range(0, len(rows), batch_size):
+        yield [sanitize(row) for row in rows[start:start + batch_size]]
+
+
+# History tables and their latest_ twins: insert columns and row sanitizer, for the COPY loader
+HISTORY_TABLES = {
+    'spreads': {
+        'latest': 'latest_spreads',
+        'columns': "game_ID, Bookie, Matchup_Type, Home_Team, Spread_1, Line_1, Away_Team, Spread_2, Line_2, event_timestamp, last_updated_timestamp, sport_type",
+        'sanitize': _sanitize_spreads,
+    },
+    'moneyline': {
+        'latest': 'latest_moneyline',
+        'columns': "game_ID, Bookie, Matchup_Type, Home_Team, Line_1, Away_Team, Line_2, event_timestamp, last_updated_timestamp, sport_type",
+        'sanitize': _sanitize_moneyline,
+    },
+    'overunder': {
+        'latest': 'latest_overunder',
+        'columns': "game_ID, Bookie, Matchup_Type, Home_Team, Away_Team, Over_or_Under_1, Over_Under_Total_1, Over_Under_Line_1, Over_or_Under_2, Over_Under_Total_2, Over_Under_Line_2, event_timestamp, last_updated_timestamp, sport_type",
+        'sanitize': _sanitize_overunder,
+    },
+    'props': {
+        'latest': 'latest_props',
+        'columns': "game_ID, last_updated_timestamp, bookie, prop_type, bet_type, player_name, betting_line, betting_point, sport_type",
+        'sanitize': _sanitize_props,
+    },
+}
+COPY_NULL = '\\N'  # NULL marker in COPY buffers, so empty strings stay empty strings
+
+
+def _copy_buffer(rows, sanitize):
+    """Write rows, sanitized, into an in-memory CSV buffer for COPY ... FROM STDIN."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        row = sanitize(row)
+        if None in row:
+            row = [COPY_NULL if value is None else value for value in row]
+        writer.writerow(row)
+    buffer.seek(0)
+    return buffer
+
+
+def _copy_rows(cursor, table, columns, rows, sanitize):
+    """COPY rows into table through an in-memory CSV buffer."""
+    cursor.copy_expert(
+        f"COPY {table} ({columns}) FROM STDIN WITH CSV NULL '{COPY_NULL}'",  # Option syntax CockroachDB parses too
+        _copy_buffer(rows, sanitize)
+    )
+
+
+class _DeferredCommits:
+    """Stands in for a connection while refresh_table replaces a table inside one transaction.
+
+    commit() does nothing, so every write in the block lands in the transaction that deleted the
+    old rows; rollback() rolls that transaction back for real and is remembered, because the delete
+    went with it. Everything else is the wrapped connection's.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.rolled_back = False
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self.rolled_back = True
+        self.conn.rollback()
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+class ConnectionPool:
+    """Keeps database connections open between DB instances, so warm Lambda invocations skip the connect.
+
+    A container runs one invocation at a time, so a single idle connection per database URL is
+    usually all that is kept. A connection that sat idle for longer than validate_after seconds is
+    checked with a SELECT 1 before it is handed out again, since the server or a proxy may have
+    dropped it while the container was frozen; broken connections are discarded and replaced.
+    """
+
+    def __init__(self, size=1, validate_after=30):
+        """Initialize the pool.
+
+        Args:
+            size: Idle connections kept per database URL; 0 closes every connection on release (default: 1).
+            validate_after: Idle seconds after which a connection is checked before reuse (default: 30).
+        """
+        self.size = size
+        self.validate_after = validate_after
+        self._idle = {}  # dsn -> [(connection, released_at)]
+        self._lock = threading.Lock()
+
+    def acquire(self, dsn):
+        """Return an open connection to dsn, reusing an idle one when it is still usable."""
+        while True:
+            with self._lock:
+                idle = self._idle.get(dsn)
+                if not idle:
+                    break
+                conn, released_at = idle.pop()
+            if self._usable(conn, released_at):
+                logger.debug("Reusing pooled database connection.")
+                return conn
+            self._discard(conn)
+        return psycopg2.connect(dsn)
+
+    def release(self, conn, dsn):
+        """Take a connection back, rolled back and with its session settings reset, or close it."""
+        if conn.closed:
+            return
+        try:
+            conn.rollback()
+            with conn.cursor() as cursor:
+                cursor.execute("RESET ALL")  # e.g. a search_path left over from an interrupted refresh_table
+            conn.commit()
+        except psycopg2.Error as e:
+            logger.warning(f"Discarding database connection that failed to reset. Error: {e}")
+            self._discard(conn)
+            return
+        with self._lock:
+            idle = self._idle.setdefault(dsn, [])
+            if len(idle) < self.size:
+                idle.append((conn, time.monotonic()))
+                return
+        self._discard(conn)
+
+    def close_all(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn, _ in conns]
+            self._idle.clear()
+        for conn in idle:
+            self._discard(conn)
+
+    def _usable(self, conn, released_at):
+        if conn.closed:
+            return False
+        if time.monotonic() - released_at < self.validate_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            logger.info(f"Pooled database connection is no longer usable, reconnecting. Error: {e}")
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+# Shared by every DB in the process, so it survives between warm Lambda invocations
+CONNECTION_POOL = ConnectionPool(size=int(os.getenv("DB_POOL_SIZE", "1")))
+
+# Server behind each database URL, 'postgres' or 'cockroachdb', looked up on its first connection
+SERVER_TYPES = {}
+
+
+def _server_type(conn):
+    """Tell CockroachDB, which speaks the Postgres protocol but lacks some of its features, from real Postgres."""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT version()")
+        version = cursor.fetchone()[0]
+    conn.commit()
+    return 'cockroachdb' if 'CockroachDB' in version else 'postgres'
+
+
 class DB:
     """Organizes database operations"""
 
     def __init__(self):
         """Constructor method"""
 
+        self.dsn = os.getenv("DATABASE_URL")
+        self.server_type = None
+        self.failed_writes = 0  # Writes that logged their error and rolled back; refresh_table checks it
         try:
-            self.conn = psycopg2.connect(os.getenv("DATABASE_URL"))
+            self.conn = CONNECTION_POOL.acquire(self.dsn)
             self.cursor = self.conn.cursor()
-            logger.info("Database connection established.")
+            if self.dsn not in SERVER_TYPES:
+                SERVER_TYPES[self.dsn] = _server_type(self.conn)
+            self.server_type = SERVER_TYPES[self.dsn]
+            logger.info(f"Database connection established ({self.server_type}).")
         except Exception as e:
             logger.error(f"Failed to connect to the database. Error: {e}", exc_info=True)
 
+        # Load history/latest tables with COPY through staging tables (temporary ones on Postgres,
+        # a shared table keyed by load id on CockroachDB); DB_COPY_LOADS=0 keeps the batched VALUES path
+        self.copy_loads = self.server_type is not None and os.getenv("DB_COPY_LOADS", "1") != "0"
+
+
+    def _rows_with_scores(self, cursor, rows, table):
+        """Keeps the rows whose game_ID (first field) exists in scores, looked up with one query.
+
+        Rows of unknown games are dropped and reported in a single warning instead of one per row.
+
+        Args:
+            cursor: Cursor of the transaction the rows will be written in.
+            rows: Rows to write, game_ID first.
+            table: Table the rows are for, used in the warning.
+
+        Returns:
+            list: The rows whose game exists, in their original order.
+        """
+        game_ids = list({row[0] for row in rows})
+        if not game_ids:
+            return []
+        cursor.execute("SELECT game_id FROM scores WHERE game_id = ANY(%s)", (game_ids,))
+        existing = {game_id for game_id, in cursor.fetchall()}
+        kept = [row for row in rows if row[0] in existing]
+        if len(kept) < len(rows):
+            missing = sorted(set(game_ids) - existing)
+            logger.warning(f"Skipping {len(rows) - len(kept)} rows for '{table}': {len(missing)} game IDs do not exist in scores: {missing}")
+        return kept
 
     def create_db(self):
         """Creates database in cluster
@@ -83,6 +435,8 @@ class DB:
             logger.info(f"Successfully inserted upcoming NFL games into upcoming_games table")
         except Exception as e:
             logger.error(f"Failed to insert data into upcoming_games table. Error: {e}, data: {upcoming_games}", exc_info=True)
+            self.conn.rollback()
+            self.failed_writes += 1
 
 ### END NFL upcoming games Create, insert, Get, Clear
 
@@ -138,32 +492,32 @@ class DB:
         """
         try:
             with self.conn.cursor() as cursor:
-                for spread in spreads:
-                    game_id = spread[0]  # Assuming game_ID is the first element in each tuple
-
-                    # Check if game_ID exists in the 'scores' table
-                    cursor.execute("SELECT 1 FROM scores WHERE game_id = %s", (game_id,))
-                    if not cursor.fetchone():
-                        # If game_ID does not exist, log an error and skip this insert
-                        logger.error(f"Game ID {game_id} does not exist in scores. Skipping insertion for this game.")
-                        continue
-
-                    # If game_ID exists, proceed with the insert
-                    cursor.execute("""
-                        INSERT INTO spreads (
-                            game_ID, Bookie, Matchup_Type, Home_Team, Spread_1, Line_1, 
-                            Away_Team, Spread_2, Line_2, event_timestamp, last_updated_timestamp, sport_type
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, spread)
-                    logger.info(f"Game ID {game_id} succesfully inserted into latest spreads.")
+                spreads = self._rows_with_scores(cursor, spreads, 'spreads')
+                execute_values(cursor, f"INSERT INTO spreads ({HISTORY_TABLES['spreads']['columns']}) VALUES %s", spreads)
 
             self.conn.commit()
             logger.info("Successfully inserted data into spreads table")
         except Exception as e:
             logger.error(f"Failed to insert data into spreads table. Error: {e}, data: {spreads}", exc_info=True)
 
-    def insert_spreads_and_latest_spreads(self, spreads, batch_size=1000, max_retries=3):
-        """Inserts provided list of spreads into both 'spreads' and 'latest_spreads' tables in batches with retry logic."""
+    def insert_spreads_and_latest_spreads(self, spreads, batch_size=1000, max_retries=3, history_rows=None):
+        """Inserts provided list of spreads into both 'spreads' and 'latest_spreads' tables in batches with retry logic.
+
+        Args:
+            spreads: Every current row; all of them are written to 'latest_spreads'.
+            history_rows: Optional subset of rows whose price changed since the last run. When given,
+                only these are appended to 'spreads' instead of every row.
+
+        Returns:
+            bool: True if the rows were committed.
+        """
+        if self.copy_loads and self.copy_latest_and_history('spreads', spreads, history_rows):
+            return True
+        if history_rows is not None:
+            return self._insert_latest_and_history(
+                'spreads', 'latest_spreads', "game_ID, Bookie, Matchup_Type, Home_Team, Spread_1, Line_1, Away_Team, Spread_2, Line_2, event_timestamp, last_updated_timestamp, sport_type",
+                spreads, history_rows, _sanitize_spreads, batch_size, max_retries
+            )
         try:
             logger.debug("Splitting data into batches for spreads and latest_spreads.")
             batches = [spreads[i:i + batch_size] for i in range(0, len(spreads), batch_size)]
@@ -173,23 +527,7 @@ class DB:
                     with self.conn.cursor() as cursor:
                         for batch_index, batch in enumerate(batches):
                             logger.debug(f"Inserting batch {batch_index + 1} with {len(batch)} rows.")
-                            sanitized_batch = [
-                                (
-                                    str(row[0]),  # game_ID
-                                    str(row[1]),  # Bookie
-                                    str(row[2]),  # Matchup_Type
-                                    str(row[3]),  # Home_Team
-                                    float(row[4]),  # Spread_1
-                                    int(row[5]),  # Line_1
-                                    str(row[6]),  # Away_Team
-                                    float(row[7]),  # Spread_2
-                                    int(row[8]),  # Line_2
-                                    row[9],       # event_timestamp
-                                    row[10],      # last_updated_timestamp
-                                    str(row[11])  # sport_type
-                                )
-                                for row in batch
-                            ]
+                            sanitized_batch = [_sanitize_spreads(row) for row in batch]
 
                             query = """
                                 WITH inserted AS (
@@ -218,7 +556,7 @@ class DB:
 
                     self.conn.commit()
                     logger.info(f"Successfully inserted {len(spreads)} rows into both spreads and latest_spreads tables.")
-                    return
+                    return True
                 except psycopg2.OperationalError as e:
                     logger.warning(f"Serialization failure on attempt {attempt + 1}/{max_retries}. Retrying...")
                     self.conn.rollback()
@@ -232,6 +570,8 @@ class DB:
             raise Exception("Max retries exceeded for insert_spreads_and_latest_spreads.")
         except Exception as e:
             logger.error(f"Unhandled error in insert_spreads_and_latest_spreads. Full traceback:\n{traceback.format_exc()}")
+            self.failed_writes += 1
+            return False
 
 ###### END NFL SPREADS Create, insert, Get, Clear
 
@@ -284,31 +624,32 @@ class DB:
         """
         try:
             with self.conn.cursor() as cursor:
-                for line in moneyline:
-                    game_id = line[0]  # Assuming game_ID is the first element in each tuple
-
-                    # Check if game_ID exists in the 'scores' table
-                    cursor.execute("SELECT 1 FROM scores WHERE game_id = %s", (game_id,))
-                    if not cursor.fetchone():
-                        # If game_ID does not exist, log an error and skip this insert
-                        logger.error(f"Game ID {game_id} does not exist in scores. Skipping insertion for this game.")
-                        continue
-
-                    # If game_ID exists, proceed with the insert
-                    cursor.execute("""
-                        INSERT INTO moneyline (
-                            game_ID, Bookie, Matchup_Type, Home_Team, Line_1, Away_Team, 
-                            Line_2, event_timestamp, last_updated_timestamp, sport_type
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, line)
+                moneyline = self._rows_with_scores(cursor, moneyline, 'moneyline')
+                execute_values(cursor, f"INSERT INTO moneyline ({HISTORY_TABLES['moneyline']['columns']}) VALUES %s", moneyline)
 
             self.conn.commit()
             logger.info("Successfully inserted data into moneyline table")
         except Exception as e:
             logger.error(f"Failed to insert data into moneyline table. Error: {e}, data: {moneyline}", exc_info=True)
 
-    def insert_moneyline_and_latest_moneyline(self, moneyline, batch_size=1000, max_retries=3):
-        """Inserts provided list of moneyline data into both 'moneyline' and 'latest_moneyline' tables in batches with retry logic."""
+    def insert_moneyline_and_latest_moneyline(self, moneyline, batch_size=1000, max_retries=3, history_rows=None):
+        """Inserts provided list of moneyline data into both 'moneyline' and 'latest_moneyline' tables in batches with retry logic.
+
+        Args:
+            moneyline: Every current row; all of them are written to 'latest_moneyline'.
+            history_rows: Optional subset of rows whose price changed since the last run. When given,
+                only these are appended to 'moneyline' instead of every row.
+
+        Returns:
+            bool: True if the rows were committed.
+        """
+        if self.copy_loads and self.copy_latest_and_history('moneyline', moneyline, history_rows):
+            return True
+        if history_rows is not None:
+            return self._insert_latest_and_history(
+                'moneyline', 'latest_moneyline', "game_ID, Bookie, Matchup_Type, Home_Team, Line_1, Away_Team, Line_2, event_timestamp, last_updated_timestamp, sport_type",
+                moneyline, history_rows, _sanitize_moneyline, batch_size, max_retries
+            )
         try:
             logger.debug("Splitting data into batches for moneyline and latest_moneyline.")
             batches = [moneyline[i:i + batch_size] for i in range(0, len(moneyline), batch_size)]
@@ -318,21 +659,7 @@ class DB:
                     with self.conn.cursor() as cursor:
                         for batch_index, batch in enumerate(batches):
                             logger.debug(f"Inserting batch {batch_index + 1} with {len(batch)} rows.")
-                            sanitized_batch = [
-                                (
-                                    str(row[0]),  # game_ID
-                                    str(row[1]),  # Bookie
-                                    str(row[2]),  # Matchup_Type
-                                    str(row[3]),  # Home_Team
-                                    int(row[4]),  # Line_1
-                                    str(row[5]),  # Away_Team
-                                    int(row[6]),  # Line_2
-                                    row[7],       # event_timestamp
-                                    row[8],       # last_updated_timestamp
-                                    str(row[9])   # sport_type
-                                )
-                                for row in batch
-                            ]
+                            sanitized_batch = [_sanitize_moneyline(row) for row in batch]
 
                             query = """
                                 WITH inserted AS (
@@ -361,7 +688,7 @@ class DB:
 
                     self.conn.commit()
                     logger.info(f"Successfully inserted {len(moneyline)} rows into both moneyline and latest_moneyline tables.")
-                    return
+                    return True
                 except psycopg2.OperationalError as e:
                     logger.warning(f"Serialization failure on attempt {attempt + 1}/{max_retries}. Retrying...")
                     self.conn.rollback()
@@ -375,6 +702,8 @@ class DB:
             raise Exception("Max retries exceeded for insert_moneyline_and_latest_moneyline.")
         except Exception as e:
             logger.error(f"Unhandled error in insert_moneyline_and_latest_moneyline. Full traceback:\n{traceback.format_exc()}")
+            self.failed_writes += 1
+            return False
 
 
 ### END NFL MoneyLine Create, insert, Get, Clear
@@ -435,21 +764,31 @@ class DB:
         """
         try:
             with self.conn.cursor() as cursor:
-                for line in overunder:
-                    # Check if the game_id exists in the scores table before inserting
-                    game_id = line[0]
-                    cursor.execute("SELECT 1 FROM scores WHERE game_id = %s", (game_id,))
-                    if cursor.fetchone():
-                        cursor.execute("INSERT INTO overunder (game_ID, Bookie, Matchup_Type, Home_Team, Away_Team, Over_or_Under_1, Over_Under_Total_1, Over_Under_Line_1, Over_or_Under_2, Over_Under_Total_2, Over_Under_Line_2, event_timestamp, last_updated_timestamp, sport_type) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)", line)
-                    else:
-                        logger.error(f"Game ID {game_id} not found in scores table. Skipping insert.")
+                overunder = self._rows_with_scores(cursor, overunder, 'overunder')
+                execute_values(cursor, f"INSERT INTO overunder ({HISTORY_TABLES['overunder']['columns']}) VALUES %s", overunder)
                 self.conn.commit()
                 logger.info("Successfully inserted data into overunder table")
         except Exception as e:
             logger.error(f"Failed to insert data into overunder table. Error: {e}, data: {overunder}", exc_info=True)
 
-    def insert_overunder_and_latest_overunder(self, overunder, batch_size=1000, max_retries=3):
-        """Inserts provided list of overunder data into both 'overunder' and 'latest_overunder' tables in batches with retry logic."""
+    def insert_overunder_and_latest_overunder(self, overunder, batch_size=1000, max_retries=3, history_rows=None):
+        """Inserts provided list of overunder data into both 'overunder' and 'latest_overunder' tables in batches with retry logic.
+
+        Args:
+            overunder: Every current row; all of them are written to 'latest_overunder'.
+            history_rows: Optional subset of rows whose price changed since the last run. When given,
+                only these are appended to 'overunder' instead of every row.
+
+        Returns:
+            bool: True if the rows were committed.
+        """
+        if self.copy_loads and self.copy_latest_and_history('overunder', overunder, history_rows):
+            return True
+        if history_rows is not None:
+            return self._insert_latest_and_history(
+                'overunder', 'latest_overunder', "game_ID, Bookie, Matchup_Type, Home_Team, Away_Team, Over_or_Under_1, Over_Under_Total_1, Over_Under_Line_1, Over_or_Under_2, Over_Under_Total_2, Over_Under_Line_2, event_timestamp, last_updated_timestamp, sport_type",
+                overunder, history_rows, _sanitize_overunder, batch_size, max_retries
+            )
         try:
             logger.debug("Splitting data into batches for overunder and latest_overunder.")
             batches = [overunder[i:i + batch_size] for i in range(0, len(overunder), batch_size)]
@@ -459,25 +798,7 @@ class DB:
                     with self.conn.cursor() as cursor:
                         for batch_index, batch in enumerate(batches):
                             logger.debug(f"Inserting batch {batch_index + 1} with {len(batch)} rows.")
-                            sanitized_batch = [
-                                (
-                                    str(row[0]),  # game_ID
-                                    str(row[1]),  # Bookie
-                                    str(row[2]),  # Matchup_Type
-                                    str(row[3]),  # Home_Team
-                                    str(row[4]),  # Away_Team
-                                    str(row[5]),  # Over_or_Under_1
-                                    float(row[6]),  # Over_Under_Total_1
-                                    int(row[7]),  # Over_Under_Line_1
-                                    str(row[8]),  # Over_or_Under_2
-                                    float(row[9]),  # Over_Under_Total_2
-                                    int(row[10]), # Over_Under_Line_2
-                                    row[11],      # event_timestamp
-                                    row[12],      # last_updated_timestamp
-                                    str(row[13])  # sport_type
-                                )
-                                for row in batch
-                            ]
+                            sanitized_batch = [_sanitize_overunder(row) for row in batch]
 
                             query = """
                                 WITH inserted AS (
@@ -509,7 +830,7 @@ class DB:
 
                     self.conn.commit()
                     logger.info(f"Successfully inserted {len(overunder)} rows into both overunder and latest_overunder tables.")
-                    return
+                    return True
                 except psycopg2.OperationalError as e:
                     logger.warning(f"Serialization failure on attempt {attempt + 1}/{max_retries}. Retrying...")
                     self.conn.rollback()
@@ -523,6 +844,8 @@ class DB:
             raise Exception("Max retries exceeded for insert_overunder_and_latest_overunder.")
         except Exception as e:
             logger.error(f"Unhandled error in insert_overunder_and_latest_overunder. Full traceback:\n{traceback.format_exc()}")
+            self.failed_writes += 1
+            return False
 
 ### END NFL Overunder Create, insert, Get, Clear
 
@@ -555,7 +878,18 @@ class DB:
             logger.error(f"error creating props table. Error: {e}", exc_info=True)
 
     def bulk_insert_with_copy_props(self, props):
-        """Fallback to bulk insert using INSERT statements for CockroachDB (for props table)."""
+        """Bulk inserts props with COPY on Postgres, or with batched INSERT statements when COPY loads are off or fail."""
+        if self.copy_loads:
+            try:
+                with self.conn.cursor() as cursor:
+                    _copy_rows(cursor, 'props', HISTORY_TABLES['props']['columns'], props, _sanitize_props)
+                self.conn.commit()
+                logger.info(f"Successfully copied {len(props)} rows into props.")
+                return
+            except Exception as e:
+                logger.warning(f"COPY into props failed, falling back to batch INSERT. Error: {e}", exc_info=True)
+                self.conn.rollback()
+                self.copy_loads = False
         try:
             with self.conn.cursor() as cursor:
                 query = """
@@ -728,24 +1062,8 @@ class DB:
         """
         try:
             with self.conn.cursor() as cursor:
-                for spread in spreads:
-                    game_id = spread[0]  # Assuming game_ID is the first element in each tuple
-
-                    # Check if game_ID exists in the 'scores' table
-                    cursor.execute("SELECT 1 FROM scores WHERE game_id = %s", (game_id,))
-                    if not cursor.fetchone():
-                        # If game_ID does not exist, log an error and skip this insert
-                        logger.error(f"Game ID {game_id} does not exist in scores. Skipping insertion for this game.")
-                        continue
-
-                    # If game_ID exists, proceed with the insert
-                    cursor.execute("""
-                        INSERT INTO latest_spreads (
-                            game_ID, Bookie, Matchup_Type, Home_Team, Spread_1, Line_1, 
-                            Away_Team, Spread_2, Line_2, event_timestamp, last_updated_timestamp, sport_type
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, spread)
-                    logger.info(f"Game ID {game_id} succesfully inserted into latest spreads.")
+                spreads = self._rows_with_scores(cursor, spreads, 'latest_spreads')
+                execute_values(cursor, f"INSERT INTO latest_spreads ({HISTORY_TABLES['spreads']['columns']}) VALUES %s", spreads)
 
             self.conn.commit()
             logger.info("Successfully inserted data into latest_spreads table")
@@ -803,23 +1121,8 @@ class DB:
         """
         try:
             with self.conn.cursor() as cursor:
-                for line in moneyline:
-                    game_id = line[0]  # Assuming game_ID is the first element in each tuple
-
-                    # Check if game_ID exists in the 'scores' table
-                    cursor.execute("SELECT 1 FROM scores WHERE game_id = %s", (game_id,))
-                    if not cursor.fetchone():
-                        # If game_ID does not exist, log an error and skip this insert
-                        logger.error(f"Game ID {game_id} does not exist in scores. Skipping insertion for this game.")
-                        continue
-
-                    # If game_ID exists, proceed with the insert
-                    cursor.execute("""
-                        INSERT INTO latest_moneyline (
-                            game_ID, Bookie, Matchup_Type, Home_Team, Line_1, Away_Team, 
-                            Line_2, event_timestamp, last_updated_timestamp, sport_type
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, line)
+                moneyline = self._rows_with_scores(cursor, moneyline, 'latest_moneyline')
+                execute_values(cursor, f"INSERT INTO latest_moneyline ({HISTORY_TABLES['moneyline']['columns']}) VALUES %s", moneyline)
 
             self.conn.commit()
             logger.info("Successfully inserted data into latest_moneyline table")
@@ -885,14 +1188,8 @@ class DB:
         """
         try:
             with self.conn.cursor() as cursor:
-                for line in overunder:
-                    # Check if the game_id exists in the scores table before inserting
-                    game_id = line[0]
-                    cursor.execute("SELECT 1 FROM scores WHERE game_id = %s", (game_id,))
-                    if cursor.fetchone():
-                        cursor.execute("INSERT INTO latest_overunder (game_ID, Bookie, Matchup_Type, Home_Team, Away_Team, Over_or_Under_1, Over_Under_Total_1, Over_Under_Line_1, Over_or_Under_2, Over_Under_Total_2, Over_Under_Line_2, event_timestamp, last_updated_timestamp, sport_type) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)", line)
-                    else:
-                        logger.error(f"Game ID {game_id} not found in scores table. Skipping insert.")
+                overunder = self._rows_with_scores(cursor, overunder, 'latest_overunder')
+                execute_values(cursor, f"INSERT INTO latest_overunder ({HISTORY_TABLES['overunder']['columns']}) VALUES %s", overunder)
                 self.conn.commit()
                 logger.info("Successfully inserted data into latest_overunder table")
         except Exception as e:
@@ -930,7 +1227,18 @@ class DB:
             logger.error(f"error creating latest_props table. Error: {e}", exc_info=True)
 
     def bulk_insert_with_copy_latest_props(self, props):
-            """Fallback to bulk insert using INSERT statements for CockroachDB."""
+            """Bulk inserts props into latest_props with COPY on Postgres, or with batched INSERT statements when COPY loads are off or fail."""
+            if self.copy_loads:
+                try:
+                    with self.conn.cursor() as cursor:
+                        _copy_rows(cursor, 'latest_props', HISTORY_TABLES['props']['columns'], props, _sanitize_props)
+                    self.conn.commit()
+                    logger.info(f"Successfully copied {len(props)} rows into latest_props.")
+                    return
+                except Exception as e:
+                    logger.warning(f"COPY into latest_props failed, falling back to batch INSERT. Error: {e}", exc_info=True)
+                    self.conn.rollback()
+                    self.copy_loads = False
             try:
                 with self.conn.cursor() as cursor:
                     query = """
@@ -970,8 +1278,24 @@ class DB:
         except Exception as e:
             logger.error(f"Error inserting data into latest_props table. Full traceback:\n{traceback.format_exc()}")
 
-    def insert_props_and_latest_props(self, props, batch_size=5000, max_retries=3):
-        """Inserts provided list of props into both 'props' and 'latest_props' tables in batches with retry logic."""
+    def insert_props_and_latest_props(self, props, batch_size=5000, max_retries=3, history_rows=None):
+        """Inserts provided list of props into both 'props' and 'latest_props' tables in batches with retry logic.
+
+        Args:
+            props: Every current row; all of them are written to 'latest_props'.
+            history_rows: Optional subset of rows whose price changed since the last run. When given,
+                only these are appended to 'props' instead of every row.
+
+        Returns:
+            bool: True if the rows were committed.
+        """
+        if self.copy_loads and self.copy_latest_and_history('props', props, history_rows):
+            return True
+        if history_rows is not None:
+            return self._insert_latest_and_history(
+                'props', 'latest_props', "game_ID, last_updated_timestamp, bookie, prop_type, bet_type, player_name, betting_line, betting_point, sport_type",
+                props, history_rows, _sanitize_props, batch_size, max_retries
+            )
         try:
             logger.debug("Splitting data into batches for props and latest_props.")
             batches = [props[i:i + batch_size] for i in range(0, len(props), batch_size)]
@@ -981,20 +1305,7 @@ class DB:
                     with self.conn.cursor() as cursor:
                         for batch_index, batch in enumerate(batches):
                             logger.debug(f"Inserting batch {batch_index + 1} with {len(batch)} rows.")
-                            sanitized_batch = [
-                                (
-                                    str(row[0]),  # game_ID
-                                    row[1],       # last_updated_timestamp
-                                    str(row[2]),  # bookie
-                                    str(row[3]),  # prop_type
-                                    str(row[4]),  # bet_type
-                                    str(row[5]),  # player_name
-                                    int(row[6]),  # betting_line
-                                    str(row[7]),  # betting_point
-                                    str(row[8])   # sport_type
-                                )
-                                for row in batch
-                            ]
+                            sanitized_batch = [_sanitize_props(row) for row in batch]
 
                             query = """
                                 WITH inserted AS (
@@ -1023,7 +1334,7 @@ class DB:
 
                     self.conn.commit()
                     logger.info(f"Successfully inserted {len(props)} props into both props and latest_props tables.")
-                    return
+                    return True
                 except psycopg2.OperationalError as e:
                     logger.warning(f"Serialization failure on attempt {attempt + 1}/{max_retries}. Retrying...")
                     self.conn.rollback()
@@ -1037,6 +1348,163 @@ class DB:
             raise Exception("Max retries exceeded for insert_props_and_latest_props.")
         except Exception as e:
             logger.error(f"Unhandled error in insert_props_and_latest_props. Full traceback:\n{traceback.format_exc()}")
+            self.failed_writes += 1
+            return False
+
+    def copy_latest_and_history(self, history_table, rows, history_rows=None, max_retries=3):
+        """Loads a history table and its latest_ twin through COPY into a staging table.
+
+        The rows are copied from an in-memory CSV buffer into a staging table and moved into the
+        real tables with one INSERT ... SELECT ... ON CONFLICT DO NOTHING each, in a single
+        transaction. On Postgres the staging table is an ON COMMIT DROP temporary table (never
+        WAL-logged and private to this session); CockroachDB has no such tables, so there the rows
+        go into a regular {history_table}_staging table tagged with a per-load id and are deleted
+        again before the commit.
+
+        Args:
+            history_table: Key of HISTORY_TABLES ('spreads', 'moneyline', 'overunder' or 'props').
+            rows: Every current row; all of them are written to the latest table.
+            history_rows: Optional subset of rows whose price changed since the last run. When given,
+                only these are appended to the history table; otherwise rows newly inserted into the
+                history table are also written to the latest table, like the combined CTE writers.
+
+        Returns:
+            True once the rows are committed, False if the load failed and the caller should fall
+            back to the batched VALUES writers. A failure other than a serialization retry turns
+            COPY loads off for this connection.
+        """
+        spec = HISTORY_TABLES[history_table]
+        latest_table = spec['latest']
+        columns = spec['columns']
+        sanitize = spec['sanitize']
+        staging_table = f"{history_table}_staging"
+        shared_staging = self.server_type != 'postgres'
+        if shared_staging and not self._create_staging_table(history_table):
+            return False
+
+        for attempt in range(max_retries):
+            load_id = uuid.uuid4().hex
+            if shared_staging:
+                copy_columns = f"load_id, {columns}"
+                copy_sanitize = lambda row: (load_id, *sanitize(row))
+                staged = f"SELECT {columns} FROM {staging_table} WHERE load_id = %(load_id)s"
+                clear_staging = f"DELETE FROM {staging_table} WHERE load_id = %(load_id)s"
+            else:
+                copy_columns = columns
+                copy_sanitize = sanitize
+                staged = f"SELECT {columns} FROM {staging_table}"
+                clear_staging = f"TRUNCATE {staging_table}"
+            params = {'load_id': load_id}
+
+            try:
+                with self.conn.cursor() as cursor:
+                    if not shared_staging:
+                        cursor.execute(
+                            f"CREATE TEMP TABLE {staging_table} ON COMMIT DROP AS "
+                            f"SELECT {columns} FROM {latest_table} WITH NO DATA"
+                        )
+                    _copy_rows(cursor, staging_table, copy_columns, rows, copy_sanitize)
+
+                    if history_rows is None:
+                        cursor.execute(f"""
+                            WITH inserted AS (
+                                INSERT INTO {history_table} ({columns})
+                                {staged}
+                                ON CONFLICT DO NOTHING
+                                RETURNING {columns}
+                            )
+                            INSERT INTO {latest_table} ({columns})
+                            SELECT * FROM inserted
+                            ON CONFLICT DO NOTHING;
+                        """, params)
+                    else:
+                        cursor.execute(f"INSERT INTO {latest_table} ({columns}) {staged} ON CONFLICT DO NOTHING", params)
+                        cursor.execute(clear_staging, params)
+                        _copy_rows(cursor, staging_table, copy_columns, history_rows, copy_sanitize)
+                        cursor.execute(f"INSERT INTO {history_table} ({columns}) {staged} ON CONFLICT DO NOTHING", params)
+                    if shared_staging:
+                        cursor.execute(clear_staging, params)
+
+                self.conn.commit()
+                changed = len(rows) if history_rows is None else len(history_rows)
+                logger.info(f"Copied {len(rows)} rows into {latest_table} and {changed} rows into {history_table}.")
+                return True
+            except psycopg2.OperationalError as e:
+                logger.warning(f"Serialization failure on attempt {attempt + 1}/{max_retries} copying {history_table}. Retrying...")
+                self.conn.rollback()
+                time.sleep(2 ** attempt)
+            except Exception as e:
+                logger.warning(f"COPY load of {history_table} and {latest_table} failed, falling back to batched inserts. Error: {e}", exc_info=True)
+                self.conn.rollback()
+                self.copy_loads = False
+                return False
+
+        logger.error(f"Failed to copy {history_table} and {latest_table} after {max_retries} retries.")
+        return False
+
+    def _create_staging_table(self, history_table):
+        """Creates the shared {history_table}_staging table COPY loads use off Postgres, if missing.
+
+        The table has the latest_ table's data columns plus a load_id column, so concurrent loads
+        from other containers only ever read and delete their own rows.
+
+        Returns:
+            True if the staging table exists, False if it could not be created.
+        """
+        spec = HISTORY_TABLES[history_table]
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {history_table}_staging AS
+                    SELECT ''::TEXT AS load_id, {spec['columns']} FROM {spec['latest']} WHERE false
+                """)
+            self.conn.commit()
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to create {history_table}_staging, falling back to batched inserts. Error: {e}", exc_info=True)
+            self.conn.rollback()
+            self.copy_loads = False
+            return False
+
+    def _insert_latest_and_history(self, history_table, latest_table, columns, rows, history_rows, sanitize,
+                                   batch_size=1000, max_retries=3):
+        """Inserts every row into the latest table but only the changed rows into the history table.
+
+        Both inserts run in one transaction with the same retry logic as the combined CTE writers.
+
+        Returns:
+            bool: True if the transaction was committed.
+        """
+        template = "(" + ", ".join(["%s"] * len(columns.split(","))) + ")"
+
+        for attempt in range(max_retries):
+            try:
+                with self.conn.cursor() as cursor:
+                    for table, table_rows in ((latest_table, rows), (history_table, history_rows)):
+                        for sanitized_batch in _sanitized_batches(table_rows, sanitize, batch_size):
+                            execute_values(
+                                cursor,
+                                f"INSERT INTO {table} ({columns}) VALUES %s ON CONFLICT DO NOTHING",
+                                sanitized_batch,
+                                template=template
+                            )
+
+                self.conn.commit()
+                logger.info(f"Inserted {len(rows)} rows into {latest_table} and {len(history_rows)} changed rows into {history_table}.")
+                return True
+            except psycopg2.OperationalError as e:
+                logger.warning(f"Serialization failure on attempt {attempt + 1}/{max_retries}. Retrying...")
+                self.conn.rollback()
+                time.sleep(2 ** attempt)
+            except Exception as e:
+                logger.error(f"Error inserting data into {history_table} and {latest_table} tables. Full traceback:\n{traceback.format_exc()}")
+                self.conn.rollback()
+                self.failed_writes += 1
+                return False
+
+        logger.error(f"Failed to insert {history_table} and {latest_table} after {max_retries} retries.")
+        self.failed_writes += 1
+        return False
 
 ##### Same tables as insert and create above but will be refreshed with the latest API data
 
@@ -1145,6 +1613,77 @@ class DB:
         except Exception as e:
             logger.error(f"Error occurred deleting old game data from scores table. Error: {e}", exc_info=True)
 
+    def read_latest_rows(self, history_table):
+        """Reads back every row of a history table's latest_ twin, laid out like the Odds_API rows.
+
+        Betting points are stored as text ('20.5' or 'N/A'), so numeric ones are turned back into
+        floats; an OddsDeltaCache seeded from these rows then matches freshly fetched rows.
+
+        Args:
+            history_table: Key of HISTORY_TABLES ('spreads', 'moneyline', 'overunder' or 'props').
+
+        Returns:
+            list: The rows as tuples in HISTORY_TABLES column order, or None if they could not be read.
+        """
+        spec = HISTORY_TABLES[history_table]
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute(f"SELECT {spec['columns']} FROM {spec['latest']}")
+                rows = cursor.fetchall()
+            self.conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to read {spec['latest']} table. Error: {e}", exc_info=True)
+            self.conn.rollback()
+            return None
+        if history_table == 'props':
+            rows = [row[:7] + (parse_point(row[7]),) + row[8:] for row in rows]
+        logger.info(f"Read {len(rows)} rows from {spec['latest']}")
+        return rows
+
+    def get_delta_generation(self):
+        """Returns the generation of the last OddsDeltaCache any run saved, or None if there is none yet."""
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute("SELECT generation FROM delta_state WHERE id = 1")
+                row = cursor.fetchone()
+            self.conn.commit()
+            return row[0] if row else None
+        except Exception as e:
+            logger.warning(f"Could not read delta_state, the delta cache will be reseeded. Error: {e}")
+            self.conn.rollback()
+            return None
+
+    def set_delta_generation(self, generation):
+        """Records the generation of the OddsDeltaCache a run just saved, creating delta_state if needed.
+
+        Returns:
+            bool: True if the transaction was committed.
+        """
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS delta_state (
+                        id INT PRIMARY KEY,
+                        generation TEXT NOT NULL,
+                        updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                    );
+                    """
+                )
+                cursor.execute(
+                    """
+                    INSERT INTO delta_state (id, generation, updated_at) VALUES (1, %s, now())
+                    ON CONFLICT (id) DO UPDATE SET generation = EXCLUDED.generation, updated_at = EXCLUDED.updated_at
+                    """,
+                    (generation,)
+                )
+            self.conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to record delta cache generation. Error: {e}", exc_info=True)
+            self.conn.rollback()
+            return False
+
 
 # ### End NFL Props Create, insert, Get, Clear
 
@@ -1221,39 +1760,27 @@ class DB:
         if not isinstance(expected_value_moneyline, list):
             raise TypeError(f"expected_value_moneyline must be a list of tuples, got {type(expected_value_moneyline)}")
 
-        inserted_count = 0
-        line = None
         try:
             with self.conn.cursor() as cursor:
-                for line in expected_value_moneyline:
-                    game_id = line[0]  # game_ID is the first element in each tuple
-
-                    # Check if game_ID exists in the 'scores' table
-                    cursor.execute("SELECT 1 FROM scores WHERE game_id = %s", (game_id,))
-                    if not cursor.fetchone():
-                        logger.warning(f"Game ID {game_id} does not exist in scores. Skipping insertion for this game.")
-                        continue
-
-                    # Insert the row, using the unique constraint to handle duplicates
-                    cursor.execute("""
-                        INSERT INTO expected_value_moneyline (
-                            game_ID, Bookie, Matchup_Type, Team, Line, Expected_Value, 
-                            Fair_Probability, Implied_Probability, Market_Overround, sport_type, 
-                            event_timestamp, last_updated_timestamp
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        ON CONFLICT ON CONSTRAINT expected_value_moneyline_game_id_bookie_team_line_key 
-                        DO NOTHING
-                    """, line)
-                    inserted_count += 1
+                lines = self._rows_with_scores(cursor, expected_value_moneyline, 'expected_value_moneyline')
+
+                # Insert the rows, using the unique constraint to handle duplicates
+                execute_values(cursor, """
+                    INSERT INTO expected_value_moneyline (
+                        game_ID, Bookie, Matchup_Type, Team, Line, Expected_Value, 
+                        Fair_Probability, Implied_Probability, Market_Overround, sport_type, 
+                        event_timestamp, last_updated_timestamp
+                    ) VALUES %s
+                    ON CONFLICT ON CONSTRAINT expected_value_moneyline_game_id_bookie_team_line_key 
+                    DO NOTHING
+                """, lines)
 
             self.conn.commit()
-            logger.info(f"Successfully inserted {inserted_count} rows into 'expected_value_moneyline' table")
+            logger.info(f"Successfully inserted {len(lines)} rows into 'expected_value_moneyline' table")
         except Exception as e:
-            if line is not None:
-                logger.error(f"Failed to insert into 'expected_value_moneyline' table. Error: {e}, problematic line: {line}", exc_info=True)
-            else:
-                logger.error(f"Failed to insert into 'expected_value_moneyline' table. Error: {e}", exc_info=True)
+            logger.error(f"Failed to insert into 'expected_value_moneyline' table. Error: {e}", exc_info=True)
             self.conn.rollback()  # Roll back on error
+            self.failed_writes += 1
 
 
                         # id SERIAL PRIMARY KEY,
@@ -1326,36 +1853,26 @@ class DB:
         if not isinstance(expected_value_props, list):
             raise TypeError(f"expected_value_props must be a list of tuples, got {type(expected_value_props)}")
 
-        inserted_count = 0
-        line = None
         try:
             with self.conn.cursor() as cursor:
-                for line in expected_value_props:
-                    game_id = line[0]
-                    cursor.execute("SELECT 1 FROM scores WHERE game_id = %s", (game_id,))
-                    if not cursor.fetchone():
-                        logger.warning(f"Game ID {game_id} does not exist in scores. Skipping insertion.")
-                        continue
-
-                    cursor.execute("""
-                        INSERT INTO expected_value_props (
-                            game_ID, Bookie, Prop_Type, Bet_Type, Player_Name, Betting_Point, Betting_Line,
-                            Expected_Value, Fair_Probability, Implied_Probability, Market_Overround,
-                            sport_type, last_updated_timestamp, num_bookies, z_score
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        ON CONFLICT ON CONSTRAINT expected_value_props_game_id_bookie_prop_bet_player_line_key 
-                        DO NOTHING
-                    """, line)
-                    inserted_count += 1
+                lines = self._rows_with_scores(cursor, expected_value_props, 'expected_value_props')
+
+                execute_values(cursor, """
+                    INSERT INTO expected_value_props (
+                        game_ID, Bookie, Prop_Type, Bet_Type, Player_Name, Betting_Point, Betting_Line,
+                        Expected_Value, Fair_Probability, Implied_Probability, Market_Overround,
+                        sport_type, last_updated_timestamp, num_bookies, z_score
+                    ) VALUES %s
+                    ON CONFLICT ON CONSTRAINT expected_value_props_game_id_bookie_prop_bet_player_line_key 
+                    DO NOTHING
+                """, lines)
 
             self.conn.commit()
-            logger.info(f"Successfully inserted {inserted_count} rows into 'expected_value_props' table")
+            logger.info(f"Successfully inserted {len(lines)} rows into 'expected_value_props' table")
         except Exception as e:
-            if line is not None:
-                logger.error(f"Failed to insert into 'expected_value_props' table. Error: {e}, problematic line: {line}", exc_info=True)
-            else:
-                logger.error(f"Failed to insert into 'expected_value_props' table. Error: {e}", exc_info=True)
+            logger.error(f"Failed to insert into 'expected_value_props' table. Error: {e}", exc_info=True)
             self.conn.rollback()
+            self.failed_writes += 1
 
 ### START +EV table
 
@@ -1382,16 +1899,52 @@ class DB:
                         bet_amount_two FLOAT NOT NULL,
                         profit_percentage FLOAT NOT NULL,
                         last_updated_timestamp TIMESTAMPTZ NOT NULL,
+                        market_type TEXT NOT NULL DEFAULT 'player_prop',
                         UNIQUE (game_ID, Prop_Type, Player_Name, Betting_Point, bookie_one, outcome_one, bookie_two, outcome_two)
                     );
                     """
                 )
+                # Tables created before game markets were analyzed
+                cursor.execute("ALTER TABLE arbitrage ADD COLUMN IF NOT EXISTS market_type TEXT NOT NULL DEFAULT 'player_prop';")
             self.conn.commit()
             logger.info("Successfully created arbitrage table or table already exists")
         except Exception as e:
             logger.error(f"Failed to create arbitrage table. Error: {e}", exc_info=True)
             self.conn.rollback()
 
+    def create_arbitrage_legs(self):
+        """Creates the arbitrage_legs table holding every leg of a multi-way arbitrage if it doesn't exist."""
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS arbitrage_legs (
+                        id SERIAL PRIMARY KEY,
+                        arbitrage_id INT NOT NULL REFERENCES arbitrage(id) ON DELETE CASCADE,
+                        leg_number INT NOT NULL,
+                        bookie TEXT NOT NULL,
+                        outcome TEXT NOT NULL,
+                        odds INT NOT NULL,
+                        bet_amount FLOAT NOT NULL,
+                        UNIQUE (arbitrage_id, leg_number)
+                    );
+                    """
+                )
+            self.conn.commit()
+            logger.info("Successfully created arbitrage_legs table or table already exists")
+        except Exception as e:
+            logger.error(f"Failed to create arbitrage_legs table. Error: {e}", exc_info=True)
+            self.conn.rollback()
+
+    def _insert_arbitrage_legs(self, cursor, arbitrage_id, legs):
+        """Replace the legs of one arbitrage row with (bookie, outcome, odds, bet_amount) tuples."""
+        cursor.execute("DELETE FROM arbitrage_legs WHERE arbitrage_id = %s", (arbitrage_id,))
+        execute_values(
+            cursor,
+            "INSERT INTO arbitrage_legs (arbitrage_id, leg_number, bookie, outcome, odds, bet_amount) VALUES %s",
+            [(arbitrage_id, leg_number, *leg) for leg_number, leg in enumerate(legs, start=1)]
+        )
+
     def insert_arbitrage(self, arbitrage):
         """
         Inserts arbitrage opportunities into the database.
@@ -1413,6 +1966,9 @@ class DB:
                 - bet_amount_two (float): Suggested bet amount on bookie_two to lock in profit.
                 - profit_percentage (float): Percentage profit from the arbitrage opportunity, rounded to 2 decimal places.
                 - last_updated_timestamp (str): ISO 8601 format timestamp of the latest odds update.
+                market_type is 'h2h', 'spreads' or 'totals' for game markets and 'player_prop' otherwise.
+                Multi-way opportunities carry a 16th element, the tuple of every leg as
+                (bookie, outcome, odds, bet_amount), which is written to arbitrage_legs.
         """
 
         if not isinstance(arbitrage, list):
@@ -1423,16 +1979,21 @@ class DB:
         try:
             with self.conn.cursor() as cursor:
                 for line in arbitrage:
+                    values, legs = _arbitrage_row(line)
                     cursor.execute("""
                         INSERT INTO arbitrage (
                             game_ID, Prop_Type, Player_Name, Betting_Point, sport_type,
                             bookie_one, outcome_one, odds_one, bet_amount_one,
                             bookie_two, outcome_two, odds_two, bet_amount_two,
-                            profit_percentage, last_updated_timestamp
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                            profit_percentage, last_updated_timestamp, market_type
+                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                         ON CONFLICT (game_ID, Prop_Type, Player_Name, Betting_Point, bookie_one, outcome_one, bookie_two, outcome_two) DO NOTHING
-                    """, line)
+                        RETURNING id
+                    """, values)
                     inserted_count += cursor.rowcount  # Accurately count inserted rows
+                    inserted = cursor.fetchone()
+                    if legs and inserted:
+                        self._insert_arbitrage_legs(cursor, inserted[0], legs)
 
             self.conn.commit()
             logger.info(f"Successfully inserted {inserted_count} rows into 'arbitrage' table")
@@ -1442,6 +2003,156 @@ class DB:
             else:
                 logger.error(f"Failed to insert into 'arbitrage' table. Error: {e}", exc_info=True)
             self.conn.rollback()
+            self.failed_writes += 1
+
+
+    def apply_result_changes(self, table, upserts, deleted_keys, replace=False):
+        """Upserts and deletes rows of a result table in one transaction, so readers never see it empty.
+
+        Args:
+            table (str): One of RESULT_TABLES ('arbitrage', 'expected_value_props', 'expected_value_moneyline').
+            upserts (list of tuples): Rows in the same column order as the table's insert function,
+                including the trailing legs of multi-way arbitrage rows.
+            deleted_keys (list of tuples): Unique keys of rows to delete, in RESULT_TABLES[table]['key'] order.
+            replace (bool): Delete every existing row first, for when the upserts are the whole table.
+
+        Returns:
+            bool: True if the transaction was committed.
+        """
+        if table not in RESULT_TABLES:
+            logger.error(f"Invalid table name: {table}. Result update aborted.")
+            raise ValueError(f"Invalid table name: {table}")
+
+        spec = RESULT_TABLES[table]
+        columns = spec['columns']
+        key_columns = spec['key']
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns if column not in key_columns)
+        upsert_sql = f"""
+            INSERT INTO {table} ({", ".join(columns)})
+            VALUES ({", ".join(["%s"] * len(columns))})
+            ON CONFLICT ({", ".join(key_columns)}) DO UPDATE SET {updates}
+            RETURNING id
+        """
+        delete_sql = f"DELETE FROM {table} WHERE " + " AND ".join(f"{column} IS NOT DISTINCT FROM %s" for column in key_columns)
+
+        upserted_count = 0
+        deleted_count = 0
+        line = None
+        try:
+            with self.conn.cursor() as cursor:
+                if replace:
+                    cursor.execute(f"DELETE FROM {table}")
+                for line in deleted_keys:
+                    # Betting_Point is TEXT; floats were stored through the same str() conversion
+                    cursor.execute(delete_sql, [str(value) if isinstance(value, float) else value for value in line])
+                    deleted_count += cursor.rowcount
+                if spec['check_scores']:
+                    upserts = self._rows_with_scores(cursor, upserts, table)
+                for line in upserts:
+                    values, legs = _arbitrage_row(line) if spec.get('has_legs') else (line, None)
+                    cursor.execute(upsert_sql, values)
+                    row_id = cursor.fetchone()[0]
+                    if legs:
+                        self._insert_arbitrage_legs(cursor, row_id, legs)
+                    upserted_count += 1
+
+            self.conn.commit()
+            logger.info(f"Updated '{table}' table: {upserted_count} rows upserted, {deleted_count} deleted" + (" after clearing it" if replace else ""))
+            return True
+        except Exception as e:
+            if line is not None:
+                logger.error(f"Failed to update '{table}' table. Error: {e}, problematic line: {line}", exc_info=True)
+            else:
+                logger.error(f"Failed to update '{table}' table. Error: {e}", exc_info=True)
+            self.conn.rollback()
+            return False
+
+
+    def create_middles(self):
+        """Creates the middles table if it doesn't exist."""
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS middles (
+                        id SERIAL PRIMARY KEY,
+                        game_ID VARCHAR(255) NOT NULL,
+                        Prop_Type TEXT NOT NULL,
+                        Player_Name TEXT NOT NULL,
+                        sport_type TEXT NOT NULL,
+                        bookie_over TEXT NOT NULL,
+                        over_point FLOAT NOT NULL,
+                        over_odds INT NOT NULL,
+                        over_bet_amount FLOAT NOT NULL,
+                        bookie_under TEXT NOT NULL,
+                        under_point FLOAT NOT NULL,
+                        under_odds INT NOT NULL,
+                        under_bet_amount FLOAT NOT NULL,
+                        gap FLOAT NOT NULL,
+                        worst_case_percentage FLOAT NOT NULL,
+                        middle_percentage FLOAT NOT NULL,
+                        last_updated_timestamp TIMESTAMPTZ NOT NULL,
+                        UNIQUE (game_ID, Prop_Type, Player_Name, bookie_over, over_point, bookie_under, under_point)
+                    );
+                    """
+                )
+            self.conn.commit()
+            logger.info("Successfully created middles table or table already exists")
+        except Exception as e:
+            logger.error(f"Failed to create middles table. Error: {e}", exc_info=True)
+            self.conn.rollback()
+
+    def insert_middles(self, middles):
+        """
+        Inserts middles into the database.
+
+        Args:
+            middles (list of tuples): List of tuples from MiddleDetector.analyze with the following columns:
+                - game_ID (str): Unique ID from OddsAPI for the relevant game or event.
+                - Prop_Type (str): Type of prop bet, or 'totals' for game totals.
+                - Player_Name (str): Player of the prop, or 'N/A' for game totals.
+                - sport_type (str): Sport type (e.g., 'basketball_nba').
+                - bookie_over (str): Bookmaker offering the Over.
+                - over_point (float): Point of the Over.
+                - over_odds (int): American odds of the Over.
+                - over_bet_amount (float): Stake on the Over out of $100.
+                - bookie_under (str): Bookmaker offering the Under.
+                - under_point (float): Point of the Under, above over_point.
+                - under_odds (int): American odds of the Under.
+                - under_bet_amount (float): Stake on the Under out of $100.
+                - gap (float): under_point - over_point.
+                - worst_case_percentage (float): Return when only one side wins; negative is the cost of the middle.
+                - middle_percentage (float): Return when the result lands in the gap and both sides win.
+                - last_updated_timestamp (str): ISO 8601 format timestamp of the latest odds update.
+        """
+        if not isinstance(middles, list):
+            raise TypeError(f"middles must be a list of tuples, got {type(middles)}")
+
+        inserted_count = 0
+        line = None
+        try:
+            with self.conn.cursor() as cursor:
+                for line in middles:
+                    cursor.execute("""
+                        INSERT INTO middles (
+                            game_ID, Prop_Type, Player_Name, sport_type,
+                            bookie_over, over_point, over_odds, over_bet_amount,
+                            bookie_under, under_point, under_odds, under_bet_amount,
+                            gap, worst_case_percentage, middle_percentage, last_updated_timestamp
+                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        ON CONFLICT (game_ID, Prop_Type, Player_Name, bookie_over, over_point, bookie_under, under_point) DO NOTHING
+                    """, line)
+                    inserted_count += cursor.rowcount
+
+            self.conn.commit()
+            logger.info(f"Successfully inserted {inserted_count} rows into 'middles' table")
+        except Exception as e:
+            if line is not None:
+                logger.error(f"Failed to insert into 'middles' table. Error: {e}, problematic line: {line}", exc_info=True)
+            else:
+                logger.error(f"Failed to insert into 'middles' table. Error: {e}", exc_info=True)
+            self.conn.rollback()
+            self.failed_writes += 1
 
 
 ### end arbitrage
@@ -1449,6 +2160,10 @@ class DB:
     def clean_old_data(self, table: str) -> None:
         """Deletes records older than 24 hours from the specified table based on last_updated_timestamp.
 
+        History tables converted by partition_history_table drop their expired partitions instead,
+        through maintain_history_partitions. On CockroachDB the table is handed to row-level TTL
+        (set_history_ttl) and no DELETE is run; it is only the fallback if that fails.
+
         Args:
             table (str): The name of the table to clean.
         """
@@ -1458,6 +2173,9 @@ class DB:
             logger.error(f"Invalid table name: {table}. Cleanup operation aborted.")
             raise ValueError(f"Invalid table name: {table}")
 
+        if self.maintain_history_partitions(table) or self.set_history_ttl(table):
+            return
+
         try:
             with self.conn.cursor() as cursor:
                 query = f"""
@@ -1472,6 +2190,209 @@ class DB:
             logger.error(f"Failed to clean {table} table. Error: {e}", exc_info=True)
 
 
+    def set_history_ttl(self, table, retention_days=HISTORY_RETENTION_DAYS):
+        """Has CockroachDB expire a history table's rows with row-level TTL instead of DELETE.
+
+        Sets ttl_expiration_expression so every row expires retention_days after its
+        last_updated_timestamp, and CockroachDB's background TTL job deletes it in small batches off
+        the write path. A table that already has a TTL is left as it is. Postgres has no row-level
+        TTL; partition_history_table is its counterpart there.
+
+        Args:
+            table (str): One of PARTITIONED_HISTORY_TABLES.
+            retention_days (int): Days of history to keep (default: HISTORY_RETENTION_DAYS).
+
+        Returns:
+            bool: True if the table's rows expire by TTL, False if the server is not CockroachDB or
+            the TTL could not be set.
+        """
+        if table not in PARTITIONED_HISTORY_TABLES:
+            logger.error(f"Invalid table name: {table}. TTL aborted.")
+            raise ValueError(f"Invalid table name: {table}")
+        if self.server_type != 'cockroachdb':
+            return False
+
+        # TIMESTAMPTZ + INTERVAL depends on the session time zone; CockroachDB wants an immutable expression
+        expiry = f"((last_updated_timestamp AT TIME ZONE 'UTC') + INTERVAL '{int(retention_days)} days') AT TIME ZONE 'UTC'"
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute(f"SHOW CREATE TABLE {table}")
+                if 'ttl_expiration_expression' in cursor.fetchone()[1]:
+                    self.conn.rollback()
+                    return True
+                cursor.execute(f"ALTER TABLE {table} SET (ttl_expiration_expression = %s)", (expiry,))
+            self.conn.commit()
+            logger.info(f"{table} rows now expire by row-level TTL after {retention_days} days")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to set a row-level TTL on {table}; expiring its rows with DELETE. Error: {e}", exc_info=True)
+            self.conn.rollback()
+            return False
+
+    def _is_partitioned(self, cursor, table):
+        cursor.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = %s::regclass", (table,))
+        return cursor.fetchone()[0]
+
+    def _partition_ranges(self, cursor, table):
+        """Return {partition: (lower, upper)} for the range partitions of table, skipping DEFAULT."""
+        cursor.execute(
+            """
+            SELECT c.oid::regclass::text, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            (table,)
+        )
+        ranges = {}
+        for partition, bound in cursor.fetchall():
+            partition_range = _partition_range(bound)
+            if partition_range is not None:
+                ranges[partition] = partition_range
+        return ranges
+
+    def maintain_history_partitions(self, table, days_ahead=HISTORY_PARTITIONS_AHEAD, retention_days=HISTORY_RETENTION_DAYS):
+        """Creates upcoming day partitions of a history table and drops the expired ones.
+
+        Every UTC day from retention_days ago to days_ahead from today gets a partition unless one
+        already covers it; rows that landed in the default partition for that day are moved into it.
+        Partitions that end before the retention cutoff are dropped whole, which is a catalog change
+        rather than a row-by-row delete, and expired rows left in the default partition are deleted.
+
+        Args:
+            table (str): One of PARTITIONED_HISTORY_TABLES.
+            days_ahead (int): Days after today to create partitions for (default: HISTORY_PARTITIONS_AHEAD).
+            retention_days (int): Days of history to keep (default: HISTORY_RETENTION_DAYS).
+
+        Returns:
+            bool: True once maintained, False if the server is not Postgres, the table is not
+            partitioned or maintenance failed.
+        """
+        if table not in PARTITIONED_HISTORY_TABLES:
+            logger.error(f"Invalid table name: {table}. Partition maintenance aborted.")
+            raise ValueError(f"Invalid table name: {table}")
+        if self.server_type != 'postgres':
+            return False
+
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=retention_days)
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        try:
+            with self.conn.cursor() as cursor:
+                if not self._is_partitioned(cursor, table):
+                    logger.debug(f"{table} is not partitioned; partition_history_table('{table}') converts it.")
+                    self.conn.rollback()
+                    return False
+
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT")
+                ranges = self._partition_ranges(cursor, table)
+
+                created = 0
+                for offset in range(-retention_days, days_ahead + 1):
+                    lower = today + timedelta(days=offset)
+                    upper = lower + timedelta(days=1)
+                    if any((start is None or start < upper) and (end is None or end > lower) for start, end in ranges.values()):
+                        continue
+                    # Built detached and attached, so rows of this day already in the default partition can move over
+                    partition = f"{table}_p{lower:%Y%m%d}"
+                    cursor.execute(f"CREATE TABLE {partition} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+                    cursor.execute(f"""
+                        WITH moved AS (
+                            DELETE FROM {table}_default
+                            WHERE last_updated_timestamp >= %s AND last_updated_timestamp < %s
+                            RETURNING *
+                        )
+                        INSERT INTO {partition} SELECT * FROM moved
+                    """, (lower, upper))
+                    cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {partition} FOR VALUES FROM (%s) TO (%s)",
+                                   (lower.isoformat(), upper.isoformat()))
+                    created += 1
+
+                dropped = 0
+                for partition, (start, end) in ranges.items():
+                    if end is not None and end <= cutoff:
+                        cursor.execute(f"DROP TABLE {partition}")
+                        dropped += 1
+
+                cursor.execute(f"DELETE FROM {table}_default WHERE last_updated_timestamp < %s", (cutoff,))
+                purged = cursor.rowcount
+            self.conn.commit()
+            logger.info(f"Maintained {table} partitions: {created} created, {dropped} expired dropped, {purged} old rows deleted from {table}_default")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to maintain {table} partitions. Error: {e}", exc_info=True)
+            self.conn.rollback()
+            return False
+
+    def partition_history_table(self, table):
+        """Converts an existing unpartitioned history table into a day-partitioned one in place.
+
+        The old table is renamed to {table}_legacy and attached as a single partition holding
+        everything up to the end of its newest day, so no rows are copied (only its primary key is
+        rebuilt on (id, last_updated_timestamp), as a partition's must be). maintain_history_partitions
+        drops it whole once all of it has expired. Its id sequence is handed to the new table so ids
+        keep counting up.
+
+        Declarative partitioning, DEFAULT partitions and ATTACH PARTITION are Postgres features;
+        on any other server (CockroachDB) the table is left as it is and set_history_ttl expires it.
+
+        Args:
+            table (str): One of PARTITIONED_HISTORY_TABLES.
+
+        Returns:
+            bool: True if the table is partitioned afterwards.
+        """
+        if table not in PARTITIONED_HISTORY_TABLES:
+            logger.error(f"Invalid table name: {table}. Partitioning aborted.")
+            raise ValueError(f"Invalid table name: {table}")
+        if self.server_type != 'postgres':
+            logger.error(f"Cannot partition {table} on {self.server_type}; clean_old_data expires it by row-level TTL.")
+            return False
+
+        tomorrow = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        legacy = f"{table}_legacy"
+        try:
+            with self.conn.cursor() as cursor:
+                if self._is_partitioned(cursor, table):
+                    logger.info(f"{table} is already partitioned")
+                    self.conn.rollback()
+                    return True
+
+                cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", (table,))
+                sequence = cursor.fetchone()[0]
+                cursor.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+                cursor.execute(f"ALTER INDEX IF EXISTS {table}_game_id_idx RENAME TO {legacy}_game_id_idx")
+                cursor.execute(f"""
+                    CREATE TABLE {table} (
+                        LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+                        FOREIGN KEY (game_ID) REFERENCES scores(game_ID) ON DELETE CASCADE,
+                        PRIMARY KEY (id, last_updated_timestamp)
+                    ) PARTITION BY RANGE (last_updated_timestamp)
+                """)
+                if sequence:
+                    cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_game_id_idx ON {table} (game_ID)")
+
+                # The partition gets the parent's (id, last_updated_timestamp) key; a table can only have one
+                cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'", (legacy,))
+                for name, in cursor.fetchall():
+                    cursor.execute(sql.SQL("ALTER TABLE {} DROP CONSTRAINT {}").format(sql.Identifier(legacy), sql.Identifier(name)))
+
+                cursor.execute(f"SELECT max(last_updated_timestamp) FROM {legacy}")
+                newest = cursor.fetchone()[0]
+                upper = tomorrow
+                if newest is not None and newest >= tomorrow:
+                    upper = newest.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+                cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE) TO (%s)",
+                               (upper.isoformat(),))
+            self.conn.commit()
+            logger.info(f"Partitioned {table}; its existing rows are in {legacy} until they expire")
+        except Exception as e:
+            logger.error(f"Failed to partition {table}. Error: {e}", exc_info=True)
+            self.conn.rollback()
+            return False
+        return self.maintain_history_partitions(table)
+
     ### truncate data from table
     def truncate_table(self, table: str) -> None:
         """Truncates a specified table in the database, with validation.
@@ -1479,26 +2400,244 @@ class DB:
         Args:
             table (str): The name of the table to truncate.
         """
-        VALID_TABLES = ['upcoming_games', 'latest_spreads', 'latest_moneyline', 'latest_overunder', 'latest_props', 'expected_value_moneyline', 'expected_value_props', 'arbitrage']
-
         if table not in VALID_TABLES:
             logger.error(f"Invalid table name: {table}. Truncate operation aborted.")
             raise ValueError(f"Invalid table name: {table}")
 
         try:
             with self.conn.cursor() as cursor:
-                cursor.execute(f"TRUNCATE TABLE {table};")
+                # arbitrage_legs references arbitrage, so its legs go with it
+                cascade = " CASCADE" if table == 'arbitrage' else ""
+                cursor.execute(f"TRUNCATE TABLE {table}{cascade};")
             self.conn.commit()
             logger.info(f"Successfully truncated {table} table")
         except Exception as e:
             logger.error(f"Failed to truncate {table} table. Error: {e}", exc_info=True)
 
+    @contextmanager
+    def refresh_table(self, table):
+        """Replaces the contents of a table with the rows written inside the block, atomically.
+
+        An empty shadow copy of the table is created in a schema of this refresh's own, named after
+        SHADOW_SCHEMA, and that schema is put first in the search_path, so the insert methods write
+        into the shadow while readers keep seeing the old rows, and refreshes running at the same
+        time (e.g. the arbitrage_and_ev job and the main run) never share a shadow. When the block
+        exits cleanly the shadow replaces the live table in a single transaction. If the block
+        raises, or an insert method inside it logs a failed write (see failed_writes), the shadow
+        is dropped and the live table is left as it was. Tables in REFRESH_DEPENDENTS are shadowed
+        and swapped along with their parent.
+
+        The swap moves sequences and tables between schemas through the Postgres catalogs, so on
+        CockroachDB, or if the shadow cannot be set up, the rows are replaced in one transaction
+        instead (see _refresh_in_transaction); readers never see the table empty either way.
+
+            with db.refresh_table('arbitrage'):
+                db.insert_arbitrage(arbitrage)
+
+        Args:
+            table (str): The name of the table to refresh, one of VALID_TABLES.
+        """
+        if table not in VALID_TABLES:
+            logger.error(f"Invalid table name: {table}. Refresh aborted.")
+            raise ValueError(f"Invalid table name: {table}")
+
+        tables = [table] + REFRESH_DEPENDENTS.get(table, [])
+        if self.server_type != 'postgres':
+            with self._refresh_in_transaction(tables):
+                yield
+            return
+
+        shadow_schema = f"{SHADOW_SCHEMA}_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+        try:
+            search_path, schema = self._create_shadow_tables(tables, shadow_schema)
+        except Exception as e:
+            logger.warning(f"Could not create a shadow {table} table, replacing its rows in one transaction instead. Error: {e}", exc_info=True)
+            self.conn.rollback()
+            self._drop_shadow_tables(tables, shadow_schema)
+            with self._refresh_in_transaction(tables):
+                yield
+            return
+
+        failed_writes = self.failed_writes
+        try:
+            yield
+        except BaseException:
+            self.conn.rollback()
+            self._drop_shadow_tables(tables, shadow_schema, search_path)
+            raise
+        if self.failed_writes > failed_writes:
+            logger.error(f"A write into the shadow {table} failed; keeping the previous rows")
+            self._drop_shadow_tables(tables, shadow_schema, search_path)
+            return
+        self._swap_shadow_tables(tables, shadow_schema, search_path, schema)
+
+    @contextmanager
+    def _refresh_in_transaction(self, tables):
+        """Deletes the rows of tables and keeps the block's writes in the same transaction.
+
+        Inside the block self.conn is a _DeferredCommits, so the insert methods' commits wait for
+        the block to exit and readers keep seeing the old rows until the new ones commit with the
+        delete. If the block raises, a write inside it fails or rolls back, or the delete itself
+        fails, the transaction is rolled back and the old rows stay. A failed final commit (e.g. a
+        CockroachDB serialization error) counts in failed_writes, since the history rows written
+        by the insert_*_and_latest_* methods were in that transaction too.
+        """
+        conn = self.conn
+        deferred = _DeferredCommits(conn)
+        try:
+            with conn.cursor() as cursor:
+                # Dependents first; their foreign keys point at the parent
+                for table in reversed(tables):
+                    cursor.execute(f"DELETE FROM {table}")
+        except Exception as e:
+            logger.error(f"Failed to clear {', '.join(tables)} for a refresh. Error: {e}", exc_info=True)
+            deferred.rollback()
+
+        failed_writes = self.failed_writes
+        self.conn = deferred
+        try:
+            yield
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self.conn = conn
+        if deferred.rolled_back or self.failed_writes > failed_writes:
+            logger.error(f"A write into the refreshed {tables[0]} failed; keeping the previous rows")
+            conn.rollback()
+            return
+        try:
+            conn.commit()
+            logger.info(f"Replaced the rows of {', '.join(tables)}")
+        except Exception as e:
+            logger.error(f"Failed to commit refreshed {', '.join(tables)}; keeping the previous rows. Error: {e}", exc_info=True)
+            conn.rollback()
+            self.failed_writes += 1
+
+    def _create_shadow_tables(self, tables, shadow_schema):
+        """Creates empty shadow copies of tables in shadow_schema and puts it first in the search_path.
+
+        The copies get the live tables' columns, defaults, constraints, indexes, foreign keys and
+        grants; a dependent's foreign key to its parent points at the parent's shadow. Shadow
+        schemas older than SHADOW_MAX_AGE are dropped on the way.
+
+        Returns:
+            tuple: The search_path to restore afterwards and the schema of the live tables.
+        """
+        with self.conn.cursor() as cursor:
+            cursor.execute("SHOW search_path")
+            search_path = cursor.fetchone()[0]
+            cursor.execute("SELECT relnamespace::regnamespace::text FROM pg_class WHERE oid = %s::regclass", (tables[0],))
+            schema = cursor.fetchone()[0]
+
+            # Leftovers of refreshes that died before swapping; a running one is never that old
+            cursor.execute("SELECT nspname FROM pg_namespace WHERE nspname LIKE %s", (f"{SHADOW_SCHEMA}\\_%",))
+            for name, in cursor.fetchall():
+                created = name[len(SHADOW_SCHEMA) + 1:].split('_')[0]
+                if created.isdigit() and time.time() - int(created) > SHADOW_MAX_AGE:
+                    cursor.execute(f"DROP SCHEMA IF EXISTS {name} CASCADE")
+            cursor.execute(f"CREATE SCHEMA {shadow_schema}")
+
+            foreign_keys = []
+            for table in tables:
+                cursor.execute(f"CREATE TABLE {shadow_schema}.{table} (LIKE {schema}.{table} INCLUDING ALL)")
+                # Foreign keys are not copied by LIKE; their definitions name tables as seen from search_path
+                cursor.execute(
+                    "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+                    (f"{schema}.{table}",)
+                )
+                foreign_keys += [(table, name, definition) for name, definition in cursor.fetchall()]
+                cursor.execute(
+                    """
+                    SELECT grantee, string_agg(privilege_type, ', ')
+                    FROM information_schema.role_table_grants
+                    WHERE table_schema = %s AND table_name = %s AND grantee <> current_user
+                    GROUP BY grantee
+                    """,
+                    (schema, table)
+                )
+                for grantee, privileges in cursor.fetchall():
+                    cursor.execute(sql.SQL("GRANT {} ON {}.{} TO {}").format(
+                        sql.SQL(privileges), sql.Identifier(shadow_schema), sql.Identifier(table),
+                        sql.SQL('PUBLIC') if grantee == 'PUBLIC' else sql.Identifier(grantee)
+                    ))
+
+            # Session-wide, so it outlasts the insert methods' own commits and rollbacks
+            cursor.execute("SELECT set_config('search_path', %s, false)", (f"{shadow_schema}, {search_path}",))
+            for table, name, definition in foreign_keys:
+                cursor.execute(sql.SQL("ALTER TABLE {}.{} ADD CONSTRAINT {} " + definition).format(
+                    sql.Identifier(shadow_schema), sql.Identifier(table), sql.Identifier(name)
+                ))
+        self.conn.commit()
+        logger.info(f"Created shadow tables for {', '.join(tables)}")
+        return search_path, schema
+
+    def _swap_shadow_tables(self, tables, shadow_schema, search_path, schema):
+        """Replaces the live tables with their shadows in one transaction and restores the search_path.
+
+        The live tables are locked first, so a concurrent refresh of the same table swaps in after
+        this one rather than in the middle of it. Their sequences are detached before the drop and
+        handed to the shadows once those are in the live schema (a sequence can only be owned by a
+        table in its own schema), so ids keep counting up. If the swap fails the live tables are
+        kept and the shadows dropped.
+        """
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute("SELECT set_config('search_path', %s, false)", (search_path,))
+                # Readers hold the live tables only briefly; give up rather than queue behind a stuck one
+                cursor.execute("SET LOCAL lock_timeout = '30s'")
+                for table in tables:
+                    cursor.execute(f"LOCK TABLE {schema}.{table} IN ACCESS EXCLUSIVE MODE")
+                owned_sequences = []
+                for table in tables:
+                    cursor.execute(
+                        """
+                        SELECT s.oid::regclass::text, quote_ident(a.attname)
+                        FROM pg_depend d
+                        JOIN pg_class s ON s.oid = d.objid AND s.relkind = 'S'
+                        JOIN pg_attribute a ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+                        WHERE d.refobjid = %s::regclass AND d.deptype = 'a'
+                        """,
+                        (f"{schema}.{table}",)
+                    )
+                    for sequence, column in cursor.fetchall():
+                        cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+                        owned_sequences.append((sequence, table, column))
+                for table in reversed(tables):
+                    cursor.execute(f"DROP TABLE {schema}.{table}")
+                for table in tables:
+                    cursor.execute(f"ALTER TABLE {shadow_schema}.{table} SET SCHEMA {schema}")
+                for sequence, table, column in owned_sequences:
+                    cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {schema}.{table}.{column}")
+                cursor.execute(f"DROP SCHEMA {shadow_schema}")
+            self.conn.commit()
+            logger.info(f"Swapped in refreshed {', '.join(tables)}")
+        except Exception as e:
+            logger.error(f"Failed to swap in refreshed {', '.join(tables)}; keeping the previous rows. Error: {e}", exc_info=True)
+            self.conn.rollback()
+            self._drop_shadow_tables(tables, shadow_schema, search_path)
+
+    def _drop_shadow_tables(self, tables, shadow_schema, search_path=None):
+        """Drops the shadow copies of tables with their schema and restores the search_path, if given."""
+        try:
+            with self.conn.cursor() as cursor:
+                if search_path is not None:
+                    cursor.execute("SELECT set_config('search_path', %s, false)", (search_path,))
+                cursor.execute(f"DROP SCHEMA IF EXISTS {shadow_schema} CASCADE")
+            self.conn.commit()
+            logger.info(f"Dropped shadow tables for {', '.join(tables)}")
+        except Exception as e:
+            logger.error(f"Failed to drop shadow tables for {', '.join(tables)}. Error: {e}", exc_info=True)
+            self.conn.rollback()
+
 #Close database connection after api calls run.
     def close_connection(self):
-        """Closes the database connection"""
+        """Returns the database connection to the pool for the next invocation (DB_POOL_SIZE=0 closes it)"""
         if self.conn:
             try:
-                self.conn.close()
-                logger.info("Database connection closed.")
+                self.cursor.close()
+                CONNECTION_POOL.release(self.conn, self.dsn)
+                self.conn = None  # The next DB may already be using it
+                logger.info("Database connection released.")
             except Exception as e:
                 logger.error(f"Failed to close database connection. Error: {e}", exc_info=True)
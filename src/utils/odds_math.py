@@ -0,0 +1,64 @@
+"""
+odds_math.py - American odds conversions shared by the analyzers and the Django tasks
+
+Prices from the Odds API are integers, so every conversion is precomputed once per price and
+looked up with a plain subscript (IMPLIED_PROBABILITY[odds]) in the hot loops. Prices outside the
+table, non-integer prices and 0 fall through to the formula, so a lookup always returns exactly
+what the formula would.
+"""
+
+TABLE_ODDS_MAX = 10000  # Prices precomputed on each side of even; rarer long shots are computed on access
+
+
+def american_to_implied_probability(odds):
+    """Implied probability of American odds, or None for 0."""
+    if odds > 0:
+        return 100 / (odds + 100)
+    elif odds < 0:
+        return -odds / (-odds + 100)
+    else:
+        return None
+
+
+def american_to_decimal(odds):
+    """Decimal odds (total return per unit staked) of American odds, or None for 0."""
+    if odds > 0:
+        return (odds / 100.0) + 1
+    elif odds < 0:
+        return (100.0 / abs(odds)) + 1
+    else:
+        return None
+
+
+def american_to_payout(odds):
+    """Profit of a winning $100 bet at American odds."""
+    bet_amount = 100
+    if odds > 0:
+        return (odds / 100) * bet_amount
+    else:
+        return (100 / abs(odds)) * bet_amount
+
+
+class OddsTable(dict):
+    """A conversion precomputed for every non-zero integer price in [-odds_max, odds_max].
+
+    Subscripting a price that is not in the table computes it with the conversion instead of
+    raising KeyError; those results are not stored.
+    """
+
+    def __init__(self, conversion, odds_max=TABLE_ODDS_MAX):
+        super().__init__((odds, conversion(odds)) for odds in range(-odds_max, odds_max + 1) if odds)
+        self.conversion = conversion
+
+    def __missing__(self, odds):
+        return self.conversion(odds)
+
+
+IMPLIED_PROBABILITY = OddsTable(american_to_implied_probability)
+DECIMAL_ODDS = OddsTable(american_to_decimal)
+PAYOUT = OddsTable(american_to_payout)
+
+
+def expected_value(odds, fair_probability):
+    """Expected value of a $100 bet at American odds given the fair probability of it winning."""
+    return (fair_probability * PAYOUT[odds]) - ((1 - fair_probability) * 100)
@@ -0,0 +1,54 @@
+import os
+import threading
+import uuid
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import src.data.odds_api as odds_api_module
+from tests.stubs import StubOddsHandler
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubOddsHandler)
+    server.responses = [(200, {}, [])]
+    server.paths = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff delays instead of sleeping through them."""
+    delays = []
+    monkeypatch.setattr(odds_api_module.time, 'sleep', delays.append)
+    return delays
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A DB on the TEST_DATABASE_URL server, with its tables in a scratch schema dropped afterwards."""
+    url = os.getenv('TEST_DATABASE_URL')
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    pytest.importorskip('psycopg2')
+    from src.utils.db import DB
+
+    monkeypatch.setenv('DATABASE_URL', url)
+    monkeypatch.delenv('DB_COPY_LOADS', raising=False)
+    db = DB()
+    schema = f"pytest_{uuid.uuid4().hex[:8]}"
+    with db.conn.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA {schema}")
+        cursor.execute(f"SET search_path TO {schema}")
+    db.conn.commit()
+    yield db
+    db.conn.rollback()
+    with db.conn.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+    db.conn.commit()
+    db.close_connection()
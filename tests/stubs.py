@@ -0,0 +1,91 @@
+"""Stand-ins for the Odds API and small fixed slates shared by the tests."""
+import json
+import random
+from http.server import BaseHTTPRequestHandler
+
+from src.data.odds_api import Odds_API
+from src.data.rows import PropBet
+
+
+class StubOddsHandler(BaseHTTPRequestHandler):
+    """Serves the server's scripted (status, headers, body) responses in order, repeating the last one."""
+
+    def do_GET(self):
+        responses = self.server.responses
+        status, headers, body = responses.pop(0) if len(responses) > 1 else responses[0]
+        self.server.paths.append(self.path)
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_client(server, api_key='test-key', **kwargs):
+    """An Odds_API pointed at a stub server."""
+    host, port = server.server_address
+    return Odds_API(link=f"http://{host}:{port}", api_key=api_key, **kwargs)
+
+
+BOOKIES = [f"bookie{index}" for index in range(8)]
+
+
+def to_american(probability):
+    """Convert an implied probability into American odds rounded to 5."""
+    probability = min(max(probability, 0.01), 0.97)
+    if probability >= 0.5:
+        return -int(round(probability / (1 - probability) * 100 / 5) * 5)
+    return int(round((1 - probability) / probability * 100 / 5) * 5)
+
+
+def prop_slate(games=4, players=6, seed=11):
+    """A small deterministic slate of PropBet rows, in per-game order like Odds_API.iter_prop_bets.
+
+    Covers multi-outcome, yes/no (sometimes one-sided) and over/under props, with long shots, the
+    odd missing side and occasional soft prices so both arbitrage and +EV rows come out of it.
+    """
+    rng = random.Random(seed)
+    lines = []
+
+    def add(game_id, bookie, prop_type, bet_type, player, price, point):
+        lines.append(PropBet(game_id, '2025-03-14T00:06:03Z', bookie, prop_type, bet_type, player,
+                             price, point, 'basketball_nba'))
+
+    def price(probability):
+        if rng.random() < 0.04:
+            return to_american(probability * 0.8)  # Soft line
+        return to_american(probability * 1.045 + rng.gauss(0, 0.03))
+
+    for game in range(games):
+        game_id = f"game{game:03d}"
+        names = [f"{game_id} Player {index}" for index in range(players)]
+
+        weights = [rng.random() ** 2 + 0.05 for _ in names]
+        for bookie in rng.sample(BOOKIES, rng.randint(2, len(BOOKIES))):
+            for player, weight in zip(names, weights):
+                probability = weight / sum(weights) * rng.uniform(1.1, 1.35)
+                add(game_id, bookie, 'player_first_basket', 'Yes', player, to_american(probability), 'N/A')
+
+        for player in names:
+            chance = rng.uniform(0.05, 0.6)
+            sides = ('Yes', 'No') if rng.random() < 0.8 else ('Yes',)
+            for bookie in rng.sample(BOOKIES, rng.randint(1, 6)):
+                for side in sides:
+                    add(game_id, bookie, 'player_double_double', side, player,
+                        price(chance if side == 'Yes' else 1 - chance), 'N/A')
+
+            for point in (10.5 + rng.randint(0, 20), 0.5):
+                chance = rng.uniform(0.1, 0.8)
+                for bookie in rng.sample(BOOKIES, rng.randint(1, len(BOOKIES))):
+                    for side in ('Over', 'Under'):
+                        if rng.random() < 0.05:
+                            continue
+                        add(game_id, bookie, 'player_points', side, player,
+                            price(chance if side == 'Over' else 1 - chance), point)
+    return lines
@@ -0,0 +1,134 @@
+import random
+
+import pytest
+
+from src.data.arbitrage import ArbitrageAnalyzer, np
+from src.data.rows import PropBet
+from tests.stubs import BOOKIES, prop_slate
+
+requires_numpy = pytest.mark.skipif(np is None, reason="numpy is not installed")
+
+PRICES = [-130, -125, -120, -115, -110, -105]
+OUTLIER_PRICES = [100, 110, 120, 150, 250, 400]
+
+
+def edge_case_lines(count=3000, seed=7):
+    """Yes/no and over/under props with ties, one-sided props, and missing, zero and out-of-range prices."""
+    rng = random.Random(seed)
+    lines = []
+    prop = 0
+    while len(lines) < count:
+        game_id = f"game{prop // 40:04d}"
+        player = f"Player {prop % 40}"
+        if prop % 5 == 0:
+            prop_type, sides, point = 'player_double_double', ('Yes', 'No'), 'N/A'
+        else:
+            prop_type, sides, point = 'player_points', ('Over', 'Under'), 10.5 + prop % 20
+        if prop % 17 == 0:
+            sides = sides[:1]
+        for bookie in rng.sample(BOOKIES, rng.randint(1, len(BOOKIES))):
+            for side in sides:
+                price = rng.choice(PRICES)
+                roll = rng.random()
+                if roll < 0.05:
+                    price = rng.choice(OUTLIER_PRICES)
+                elif roll < 0.07:
+                    price = None
+                elif roll < 0.09:
+                    price = 0
+                elif roll < 0.1:
+                    price = 60000
+                lines.append(PropBet(game_id, '2025-03-14T00:06:03Z', bookie, prop_type, side, player,
+                                     price, point, 'basketball_nba'))
+        prop += 1
+    return lines
+
+
+def analyze(engine, lines, chunks=1, **options):
+    analyzer = ArbitrageAnalyzer(engine=engine, **options)
+    size = -(-len(lines) // chunks)
+    for start in range(0, len(lines), size):
+        analyzer.add_lines(lines[start:start + size])
+    return analyzer.analyze()
+
+
+def test_two_way_arbitrage():
+    lines = [
+        PropBet('game1', 'ts', 'draftkings', 'player_points', 'Over', 'Player One', 120, 20.5, 'basketball_nba'),
+        PropBet('game1', 'ts', 'fanduel', 'player_points', 'Under', 'Player One', 115, 20.5, 'basketball_nba'),
+        PropBet('game1', 'ts', 'betmgm', 'player_points', 'Under', 'Player One', -110, 20.5, 'basketball_nba'),
+    ]
+    (row,) = analyze('python', lines)
+    assert row[:3] == ('game1', 'player_points', 'Player One')
+    assert (row[5], row[6], row[9], row[10]) == ('draftkings', 'over', 'fanduel', 'under')
+    assert row[13] > 1
+
+
+@requires_numpy
+@pytest.mark.parametrize('lines', [edge_case_lines(), prop_slate()], ids=['edge_cases', 'slate'])
+def test_numpy_engine_matches_python(lines):
+    expected = analyze('python', lines)
+    assert expected
+    assert analyze('numpy', lines) == expected
+    # Streaming the lines in chunks must not change the result either
+    assert analyze('numpy', lines, chunks=7) == expected
+
+
+@requires_numpy
+def test_numpy_engine_matches_python_with_options():
+    lines = edge_case_lines(seed=3)
+    options = {'min_profit_percentage': 0.5, 'max_odds': 300}
+    assert analyze('numpy', lines, **options) == analyze('python', lines, **options)
+
+
+def first_scorer_lines(quotes):
+    """First touchdown scorer Yes lines from {bookie: {player: price}}."""
+    return [
+        PropBet('game1', 'ts', bookie, 'player_1st_td', 'Yes', player, price, 'N/A', 'americanfootball_nfl')
+        for bookie, prices in quotes.items() for player, price in prices.items()
+    ]
+
+
+def analyze_multiway(lines):
+    analyzer = ArbitrageAnalyzer(engine='python')
+    analyzer.add_lines(lines)
+    return analyzer.analyze_multiway()
+
+
+# Sums to roughly 0.9 once the favourite is left out
+FIELD_WITHOUT_FAVOURITE = {'Player Two': 300, 'Player Three': 400, 'Player Four': 500, 'Player Five': 600}
+
+
+def test_truncated_multiway_field_is_not_an_arbitrage():
+    # No bookie lists the favourite and the books disagree on the field, so the sum below 1 proves nothing
+    lines = first_scorer_lines({
+        'draftkings': FIELD_WITHOUT_FAVOURITE,
+        'fanduel': {'Player Two': 290, 'Player Three': 390},
+    })
+    assert analyze_multiway(lines) == []
+
+
+def test_single_bookie_field_is_not_an_arbitrage():
+    assert analyze_multiway(first_scorer_lines({'draftkings': FIELD_WITHOUT_FAVOURITE})) == []
+
+
+def test_multiway_field_closed_by_no_scorer():
+    lines = first_scorer_lines({'draftkings': dict(FIELD_WITHOUT_FAVOURITE, **{'No Touchdown Scorer': 2000})})
+    (row,) = analyze_multiway(lines)
+    assert row[1] == 'player_1st_td'
+    assert len(row[15]) == 5
+
+
+def test_multiway_field_agreed_on_by_every_bookie():
+    field = {'Player One': 160, 'Player Two': 300, 'Player Three': 400, 'Player Four': 600}
+    lines = first_scorer_lines({
+        'draftkings': field,
+        'fanduel': {player: price - 20 for player, price in field.items()},
+    })
+    (row,) = analyze_multiway(lines)
+    assert {leg[0] for leg in row[15]} == {'draftkings'}
+    assert 2 < row[13] < 3
+
+    # The same prices with one book missing a player no longer prove the field is complete
+    del lines[-1]
+    assert analyze_multiway(lines) == []
@@ -0,0 +1,301 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.data.delta import OddsDeltaCache
+from src.data.rows import PropBet
+from tests.stubs import prop_slate
+
+
+def prop_tables(db, rows):
+    db.create_NFL_scores()
+    db.create_NFL_props()
+    db.create_latest_props()
+    db.insert_NFL_scores([(game_id, 'NBA', '2025-03-14T23:00:00Z', 'False', None, None, None, None, None)
+                          for game_id in sorted({row[0] for row in rows})])
+
+
+def table_rows(db, table):
+    with db.conn.cursor() as cursor:
+        cursor.execute(f"SELECT game_ID, last_updated_timestamp, bookie, prop_type, bet_type, player_name, "
+                       f"betting_line, betting_point, sport_type FROM {table} ORDER BY 1, 3, 4, 5, 6, 8")
+        return cursor.fetchall()
+
+
+def upcoming_games(count, suffix=''):
+    return [(f"game{index}{suffix}", 'NBA', '2025-03-14T23:00:00Z', 'Home', 'Away') for index in range(count)]
+
+
+def game_ids(db, table='upcoming_games'):
+    with db.conn.cursor() as cursor:
+        cursor.execute(f"SELECT game_ID FROM {table} ORDER BY id")
+        rows = [game_id for game_id, in cursor.fetchall()]
+    db.conn.commit()
+    return rows
+
+
+def shadow_schemas(db):
+    with db.conn.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM pg_namespace WHERE nspname LIKE 'table\\_refresh\\_%'")
+        count = cursor.fetchone()[0]
+    db.conn.commit()
+    return count
+
+
+def test_copy_loads_are_on_for_both_servers(db):
+    assert db.server_type in ('postgres', 'cockroachdb')
+    assert db.copy_loads
+
+
+@pytest.mark.parametrize('history_rows', [None, slice(None, None, 3)])
+def test_copy_and_values_loads_write_the_same_rows(db, history_rows):
+    rows = prop_slate(games=2)
+    prop_tables(db, rows)
+    changed = rows if history_rows is None else rows[history_rows]
+    server_type = db.server_type
+    loaded = {}
+    # The shared staging table CockroachDB loads through also works on Postgres, so both run here
+    for path, copy_loads, staging_server in (('values', False, server_type), ('temp staging', True, 'postgres'),
+                                             ('shared staging', True, 'cockroachdb')):
+        if staging_server == 'postgres' and server_type != 'postgres':
+            continue
+        db.copy_loads, db.server_type = copy_loads, staging_server
+        try:
+            assert db.insert_props_and_latest_props(rows, history_rows=None if history_rows is None else changed)
+        finally:
+            db.server_type = server_type
+        assert db.copy_loads == copy_loads  # The COPY path did not fall back
+        loaded[path] = table_rows(db, 'props'), table_rows(db, 'latest_props')
+        with db.conn.cursor() as cursor:
+            cursor.execute("TRUNCATE props, latest_props")
+        db.conn.commit()
+
+    assert table_rows(db, 'props_staging') == []  # Each load deletes its staged rows
+    history, latest = loaded['values']
+    assert all(tables == loaded['values'] for tables in loaded.values())
+    assert len(history) == len(changed)
+    assert len(latest) == len(rows)
+
+
+REFRESH_PATHS = ['shadow schema', 'one transaction']
+
+
+def use_refresh_path(db, path):
+    """Send refresh_table down path; off Postgres only the one-transaction path exists."""
+    if path == 'one transaction':
+        db.server_type = 'cockroachdb'
+    elif db.server_type != 'postgres':
+        pytest.skip("the shadow schema swap is Postgres only")
+
+
+def other_connection(db):
+    """A second DB on the same scratch schema, like a concurrent reader or run."""
+    with db.conn.cursor() as cursor:
+        cursor.execute("SELECT current_schema()")
+        schema = cursor.fetchone()[0]
+    other = type(db)()
+    with other.conn.cursor() as cursor:
+        cursor.execute(f"SET search_path TO {schema}")
+    other.conn.commit()
+    return other
+
+
+@pytest.mark.parametrize('path', REFRESH_PATHS)
+def test_refresh_replaces_the_rows(db, path):
+    use_refresh_path(db, path)
+    db.create_NFL_upcoming_games()
+    db.insert_NFL_upcoming_games(upcoming_games(3, 'old'))
+    with db.refresh_table('upcoming_games'):
+        db.insert_NFL_upcoming_games(upcoming_games(2, 'new'))
+
+    assert game_ids(db) == ['game0new', 'game1new']
+    assert shadow_schemas(db) == 0
+
+
+@pytest.mark.parametrize('path', REFRESH_PATHS)
+def test_refresh_keeps_the_rows_when_a_write_fails(db, path):
+    use_refresh_path(db, path)
+    db.create_NFL_upcoming_games()
+    db.insert_NFL_upcoming_games(upcoming_games(3))
+    with db.refresh_table('upcoming_games'):
+        db.insert_NFL_upcoming_games([('broken', None, '2025-03-14T23:00:00Z', 'Home', 'Away')])
+
+    assert db.failed_writes == 1
+    assert game_ids(db) == ['game0', 'game1', 'game2']
+    assert shadow_schemas(db) == 0
+
+
+def test_overlapping_refreshes_keep_their_own_shadows(db):
+    db.create_NFL_upcoming_games()
+    other = other_connection(db)
+    try:
+        with db.refresh_table('upcoming_games'):
+            db.insert_NFL_upcoming_games(upcoming_games(2, 'main'))
+            with other.refresh_table('upcoming_games'):
+                other.insert_NFL_upcoming_games(upcoming_games(1, 'job'))
+            assert game_ids(other) == ['game0job']
+    finally:
+        other.close_connection()
+
+    assert game_ids(db) == ['game0main', 'game1main']
+    assert shadow_schemas(db) == 0
+
+
+def test_refresh_in_one_transaction_keeps_the_old_rows_visible(db):
+    use_refresh_path(db, 'one transaction')
+    db.create_NFL_upcoming_games()
+    db.insert_NFL_upcoming_games(upcoming_games(3, 'old'))
+    other = other_connection(db)
+    try:
+        with db.refresh_table('upcoming_games'):
+            db.insert_NFL_upcoming_games(upcoming_games(2, 'new'))
+            assert game_ids(other) == ['game0old', 'game1old', 'game2old']
+        assert game_ids(other) == ['game0new', 'game1new']
+    finally:
+        other.close_connection()
+
+
+def test_refresh_in_one_transaction_keeps_the_rows_when_the_commit_fails(db):
+    if db.server_type != 'postgres':
+        pytest.skip("the commit is failed with a Postgres constraint trigger")
+    use_refresh_path(db, 'one transaction')
+    db.create_NFL_upcoming_games()
+    db.insert_NFL_upcoming_games(upcoming_games(3))
+    with db.conn.cursor() as cursor:
+        cursor.execute("CREATE FUNCTION fail_commit() RETURNS trigger LANGUAGE plpgsql "
+                       "AS $$ BEGIN RAISE EXCEPTION 'commit failed'; END $$")
+    db.conn.commit()
+
+    with db.refresh_table('upcoming_games'):
+        with db.conn.cursor() as cursor:
+            # Fires at the commit, which then fails like a CockroachDB retry error would
+            cursor.execute("CREATE CONSTRAINT TRIGGER fail_commit AFTER INSERT ON upcoming_games "
+                           "DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION fail_commit()")
+        db.insert_NFL_upcoming_games(upcoming_games(1, 'new'))
+
+    assert db.failed_writes == 1
+    assert game_ids(db) == ['game0', 'game1', 'game2']
+
+
+@pytest.mark.parametrize('path', REFRESH_PATHS)
+def test_refresh_swaps_dependents_and_keeps_ids_counting(db, path):
+    use_refresh_path(db, path)
+    db.create_arbitrage()
+    db.create_arbitrage_legs()
+    legs = [('draftkings', 'Player 0', 400, 20.0), ('fanduel', 'Player 1', 450, 18.0), ('betmgm', 'No Scorer', 300, 25.0)]
+
+    def arbitrage(game_id):
+        return [(game_id, 'player_first_basket', 'N/A', 'N/A', 'basketball_nba', 'draftkings', 'Player 0', 400, 20.0,
+                 'fanduel', 'Player 1', 450, 18.0, 2.5, '2025-03-14T00:06:03Z', legs)]
+
+    for game_id in ('game0', 'game1'):
+        with db.refresh_table('arbitrage'):
+            db.insert_arbitrage(arbitrage(game_id))
+
+    with db.conn.cursor() as cursor:
+        cursor.execute("SELECT a.id, a.game_ID, count(l.id) FROM arbitrage a JOIN arbitrage_legs l ON l.arbitrage_id = a.id GROUP BY 1, 2")
+        assert cursor.fetchall() == [(2, 'game1', 3)]
+        cursor.execute("SELECT confrelid::regclass::text FROM pg_constraint WHERE conrelid = 'arbitrage_legs'::regclass AND contype = 'f'")
+        assert cursor.fetchall() == [('arbitrage',)]
+    db.conn.commit()
+    assert shadow_schemas(db) == 0
+
+
+def history_props(db, ages):
+    """Write one props row per age (a timedelta before now) into props and latest_props."""
+    now = datetime.now(timezone.utc)
+    rows = [PropBet('game0', now - age, 'draftkings', 'player_points', 'Over', f"Player {index}", -110, '20.5', 'basketball_nba')
+            for index, age in enumerate(ages)]
+    prop_tables(db, rows)
+    assert db.insert_props_and_latest_props(rows)
+    return rows
+
+
+def is_partitioned(db, table):
+    with db.conn.cursor() as cursor:
+        cursor.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = %s::regclass", (table,))
+        partitioned = cursor.fetchone()[0]
+    db.conn.commit()
+    return partitioned
+
+
+def history_count(db, table='props'):
+    with db.conn.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {table}")
+        count = cursor.fetchone()[0]
+    db.conn.commit()
+    return count
+
+
+def test_history_tables_are_created_unpartitioned_and_expire_by_delete_or_ttl(db):
+    history_props(db, [timedelta(hours=1), timedelta(days=2)])
+
+    assert not is_partitioned(db, 'props')
+    assert db.set_history_ttl('props') == (db.server_type == 'cockroachdb')
+    db.clean_old_data('props')
+    if db.server_type == 'cockroachdb':
+        # The TTL job deletes in the background, so the DELETE is skipped
+        with db.conn.cursor() as cursor:
+            cursor.execute("SHOW CREATE TABLE props")
+            assert 'ttl_expiration_expression' in cursor.fetchone()[1]
+        db.conn.commit()
+        assert history_count(db) == 2
+    else:
+        assert history_count(db) == 1
+
+
+def test_history_expires_by_delete_when_the_ttl_cannot_be_set(db):
+    if db.server_type != 'postgres':
+        pytest.skip("fails the TTL by running the CockroachDB statements on Postgres")
+    history_props(db, [timedelta(hours=1), timedelta(days=2)])
+    db.server_type = 'cockroachdb'
+
+    assert not db.set_history_ttl('props')
+    db.clean_old_data('props')
+    assert history_count(db) == 1
+
+
+def test_partitioned_history_keeps_rows_and_drops_expired_days(db):
+    history_props(db, [timedelta(hours=1), timedelta(days=3)])
+    if db.server_type != 'postgres':
+        assert not db.partition_history_table('props')
+        return
+
+    assert db.partition_history_table('props')
+    assert is_partitioned(db, 'props')
+    assert history_count(db) == 2
+    now = datetime.now(timezone.utc)
+    new_rows = [PropBet('game0', now, 'fanduel', 'player_points', 'Over', 'Player 9', -105, '20.5', 'basketball_nba')]
+    assert db.insert_props_and_latest_props(new_rows)
+    with db.conn.cursor() as cursor:
+        cursor.execute("SELECT id FROM props ORDER BY id")
+        assert [row_id for row_id, in cursor.fetchall()] == [1, 2, 3]
+        # The legacy partition covers up to tomorrow, day partitions take over after it
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (f"props_p{now + timedelta(days=2):%Y%m%d}",))
+        assert cursor.fetchone()[0]
+    db.conn.commit()
+
+    # The legacy partition goes whole once all of it has expired; until then the rows stay
+    db.clean_old_data('props')
+    assert history_count(db) == 3
+    assert db.maintain_history_partitions('props', retention_days=-2)
+    assert history_count(db) == 0
+    assert is_partitioned(db, 'props')
+
+
+def test_latest_rows_seed_the_delta_cache(db, tmp_path):
+    rows = prop_slate(games=2) + [PropBet('game0', '2025-03-14T00:06:03Z', 'fanduel', 'player_points', 'Over',
+                                          'game000 Player 0', -110, 20.0, 'basketball_nba')]
+    prop_tables(db, rows)
+    assert db.insert_props_and_latest_props(rows)
+
+    delta = OddsDeltaCache(cache_path=str(tmp_path / 'delta.json.gz'))
+    delta.seed({'props': db.read_latest_rows('props')})
+    assert delta.changed('props', rows) == []
+
+
+def test_delta_generation_round_trip(db):
+    assert db.get_delta_generation() is None
+    assert db.set_delta_generation('first')
+    assert db.set_delta_generation('second')
+    assert db.get_delta_generation() == 'second'
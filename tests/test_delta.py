@@ -0,0 +1,29 @@
+from src.data.delta import OddsDeltaCache
+from tests.stubs import prop_slate
+
+
+def test_seeded_cache_matches_the_written_rows(tmp_path):
+    rows = prop_slate(games=2)
+    delta = OddsDeltaCache(cache_path=str(tmp_path / 'delta.json.gz'))
+    delta.seed({'props': rows})
+
+    assert delta.generation is None
+    assert delta.changed('props', rows) == []
+
+
+def test_reseeding_catches_a_price_that_moved_back(tmp_path):
+    # Two containers with their own files; the second one saves in between
+    first = OddsDeltaCache(cache_path=str(tmp_path / 'first.json.gz'))
+    second = OddsDeltaCache(cache_path=str(tmp_path / 'second.json.gz'))
+    rows = prop_slate(games=1)
+    moved = [rows[0]._replace(betting_line=rows[0].betting_line + 50)] + rows[1:]
+
+    first.changed('props', rows)
+    first.save()
+    second.changed('props', moved)
+    second.save()
+
+    # The price is back to what the first container saw, but the latest written rows hold the moved one
+    assert first.changed('props', rows) == []
+    first.seed({'props': moved})
+    assert first.changed('props', rows) == [rows[0]]
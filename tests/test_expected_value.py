@@ -0,0 +1,93 @@
+import random
+from statistics import median
+
+import pytest
+
+from src.data.expected_value import ExpectedValueAnalyzer, SideStats, np
+from src.data.rows import PropBet
+from tests.stubs import BOOKIES, prop_slate, to_american
+
+requires_numpy = pytest.mark.skipif(np is None, reason="numpy is not installed")
+
+
+def two_pass_z_score(value, values):
+    """The z-score with a separate mean and variance pass, as calculate_z_score first computed it."""
+    if len(values) < 2:
+        return None
+    mean = sum(values) / len(values)
+    std = (sum((v - mean) ** 2 for v in values) / len(values)) ** 0.5
+    if std == 0:
+        return 0
+    return (value - mean) / std
+
+
+def test_side_stats_match_two_pass_statistics():
+    rng = random.Random(5)
+    for size in (1, 2, 3, 10, 25):
+        values = [rng.uniform(0.2, 0.8) for _ in range(size)]
+        stats = SideStats(values)
+        for value in values:
+            z_score = stats.z_score(value)
+            expected = two_pass_z_score(value, values)
+            assert (z_score is None) == (expected is None)
+            if expected is not None:
+                assert abs(z_score - expected) < 1e-9
+        assert stats.median == median(values)
+
+
+def test_side_stats_of_identical_prices():
+    stats = SideStats([0.5, 0.5, 0.5])
+    assert stats.z_score(0.5) == 0
+    assert SideStats().median is None
+
+
+def custom_limit_lines(games=3, players=8, seed=13):
+    """Over/under props with their own PROP_BET_CRITERIA, and a second multi-outcome market."""
+    rng = random.Random(seed)
+    lines = []
+    for game in range(games):
+        game_id = f"mlb{game:03d}"
+        names = [f"{game_id} Batter {index}" for index in range(players)]
+        weights = [rng.random() + 0.1 for _ in names]
+        for bookie in rng.sample(BOOKIES, 5):
+            for player, weight in zip(names, weights):
+                probability = weight / sum(weights) * rng.uniform(1.1, 1.3)
+                lines.append(PropBet(game_id, '2025-03-14T00:06:03Z', bookie, 'batter_first_home_run', 'Yes',
+                                     player, to_american(probability), 'N/A', 'baseball_mlb'))
+        for player in names:
+            for prop_type, point in (('batter_home_runs', 0.5), ('batter_hits', 1.5)):
+                chance = rng.uniform(0.1, 0.7)
+                for bookie in rng.sample(BOOKIES, rng.randint(2, len(BOOKIES))):
+                    for side in ('Over', 'Under'):
+                        probability = chance if side == 'Over' else 1 - chance
+                        if rng.random() < 0.05:
+                            probability *= 0.7  # Soft line
+                        lines.append(PropBet(game_id, '2025-03-14T00:06:03Z', bookie, prop_type, side, player,
+                                             to_american(probability * 1.045), point, 'baseball_mlb'))
+    return lines
+
+
+def analyze_prop(engine, lines):
+    analyzer = ExpectedValueAnalyzer(engine=engine)
+    analyzer.add_prop_lines(lines)
+    return analyzer.analyze_prop()
+
+
+@requires_numpy
+@pytest.mark.parametrize('lines', [prop_slate(), prop_slate(games=8, seed=3) + custom_limit_lines()],
+                         ids=['slate', 'custom_limits'])
+def test_numpy_engine_matches_python_row_for_row(lines):
+    expected = analyze_prop('python', lines)
+    assert expected
+    actual = analyze_prop('numpy', lines)
+    assert len(actual) == len(expected)
+    for actual_row, expected_row in zip(actual, expected):
+        assert actual_row == expected_row
+
+
+@requires_numpy
+def test_numpy_engine_skips_lines_without_a_price():
+    lines = prop_slate(seed=5)
+    priced = analyze_prop('numpy', lines)
+    unpriced = [line._replace(betting_line=None) for line in lines[:1]] + [line._replace(betting_line=0) for line in lines[1:2]]
+    assert analyze_prop('numpy', [line for line in lines if line.betting_line] + unpriced) == priced
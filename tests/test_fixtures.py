@@ -0,0 +1,45 @@
+import gzip
+import json
+import os
+
+from src.data.fixtures import FixtureStore
+from src.data.odds_api import Odds_API
+from tests.stubs import make_client
+
+QUOTA_HEADERS = {'x-requests-remaining': '480', 'x-requests-used': '20', 'x-requests-last': '3', 'Server': 'stub'}
+PARAMS = {'regions': 'us', 'markets': 'h2h', 'oddsFormat': 'american'}
+
+
+def test_key_ignores_the_api_key():
+    assert FixtureStore.key('/v4/sports', {'apiKey': 'one', 'regions': 'us'}) == \
+        FixtureStore.key('/v4/sports', {'regions': 'us', 'apiKey': 'two'})
+    assert FixtureStore.key('/v4/sports', {'regions': 'us'}) != FixtureStore.key('/v4/sports', {'regions': 'eu'})
+
+
+def test_record_then_replay_without_network(stub_server, tmp_path):
+    body = [{'id': 'event-1', 'bookmakers': []}]
+    stub_server.responses = [(200, QUOTA_HEADERS, body)]
+    recorder = make_client(stub_server, fixture_mode='record', fixture_dir=str(tmp_path))
+    assert recorder._make_request('/v4/sports/basketball_nba/odds/', dict(PARAMS)) == body
+
+    (fixture_path,) = [os.path.join(tmp_path, name) for name in os.listdir(tmp_path)]
+    with gzip.open(fixture_path, 'rt', encoding='utf-8') as f:
+        fixture = json.load(f)
+    assert 'apiKey' not in fixture['params']
+    assert fixture['headers'] == {'x-requests-remaining': '480', 'x-requests-used': '20', 'x-requests-last': '3'}
+
+    # Nothing listens on the replaying client's host
+    stub_server.shutdown()
+    replayer = make_client(stub_server, fixture_mode='replay', fixture_dir=str(tmp_path), api_key='other-key')
+    assert replayer._make_request('/v4/sports/basketball_nba/odds/', dict(PARAMS)) == body
+    assert replayer.fixtures.hits == 1
+    assert replayer.quota.remaining == 480
+    assert replayer.quota.summary()['cost'] == 3
+
+
+def test_replay_miss_returns_empty(tmp_path):
+    api = Odds_API(link='http://127.0.0.1:9', api_key='test-key', fixture_mode='replay', fixture_dir=str(tmp_path))
+
+    assert api._make_request('/v4/sports') == {}
+    assert api.fixtures.misses == 1
+    assert api.quota.summary()['endpoints'][0]['statuses'] == {'error': 1}
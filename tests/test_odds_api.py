@@ -0,0 +1,84 @@
+from http.server import ThreadingHTTPServer
+
+from tests.stubs import StubOddsHandler, make_client
+
+
+QUOTA_HEADERS = {'x-requests-remaining': '480', 'x-requests-used': '20', 'x-requests-last': '3'}
+
+
+def test_retries_429_and_5xx_then_returns_data(stub_server, sleeps):
+    stub_server.responses = [
+        (429, {'Retry-After': '2'}, {'message': 'slow down'}),
+        (503, {}, {'message': 'unavailable'}),
+        (200, QUOTA_HEADERS, [{'key': 'basketball_nba', 'active': True}]),
+    ]
+    api = make_client(stub_server, max_retries=3, backoff_factor=0.5, backoff_max=30)
+
+    data = api._make_request('/v4/sports')
+
+    assert data == [{'key': 'basketball_nba', 'active': True}]
+    assert len(stub_server.paths) == 3
+    assert all('apiKey=test-key' in path for path in stub_server.paths)
+    # The 429 waits at least its Retry-After, the 503 backs off within backoff_factor * 2 ** attempt
+    assert len(sleeps) == 2
+    assert 2 <= sleeps[0] <= 30
+    assert 0 <= sleeps[1] <= 1.0
+
+
+def test_retry_after_is_capped_by_backoff_max(stub_server, sleeps):
+    stub_server.responses = [(429, {'Retry-After': '600'}, {}), (200, {}, {'ok': True})]
+    api = make_client(stub_server, max_retries=1, backoff_max=5)
+
+    assert api._make_request('/v4/sports') == {'ok': True}
+    assert sleeps == [5]
+
+
+def test_gives_up_after_max_retries(stub_server, sleeps):
+    stub_server.responses = [(500, {}, {'message': 'boom'})]
+    api = make_client(stub_server, max_retries=2, backoff_factor=0.5, backoff_max=30)
+
+    assert api._make_request('/v4/sports') == {}
+    assert len(stub_server.paths) == 3
+    assert len(sleeps) == 2
+    assert all(0 <= delay <= 0.5 * 2 ** attempt for attempt, delay in enumerate(sleeps))
+
+
+def test_unauthorized_is_not_retried(stub_server, sleeps):
+    stub_server.responses = [(401, {}, {'message': 'bad key'})]
+    api = make_client(stub_server, max_retries=3)
+
+    assert api._make_request('/v4/sports') == {}
+    assert len(stub_server.paths) == 1
+    assert sleeps == []
+
+
+def test_quota_headers_are_tracked_per_endpoint(stub_server, sleeps):
+    stub_server.responses = [
+        (503, {}, {}),
+        (200, QUOTA_HEADERS, [{'id': 'event-1'}]),
+        (200, {'x-requests-remaining': '470', 'x-requests-used': '30', 'x-requests-last': '10'}, {'id': 'event-1'}),
+    ]
+    api = make_client(stub_server, max_retries=1)
+
+    api._make_request('/v4/sports/basketball_nba/odds/')
+    api._make_request('/v4/sports/basketball_nba/events/event-1/odds/')
+
+    summary = api.quota.summary()
+    assert summary['remaining'] == 470
+    assert summary['used'] == 30
+    assert summary['calls'] == 3
+    assert summary['cost'] == 13
+    by_endpoint = {(e['endpoint'], e['sport']): e for e in summary['endpoints']}
+    assert by_endpoint[('odds', 'basketball_nba')]['statuses'] == {503: 1, 200: 1}
+    assert by_endpoint[('event_odds', 'basketball_nba')]['cost'] == 10
+
+
+def test_connection_errors_are_retried(sleeps):
+    # Nothing listens on this port once the server is closed
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubOddsHandler)
+    server.server_close()
+    api = make_client(server, max_retries=2, timeout=1)
+
+    assert api._make_request('/v4/sports') == {}
+    assert len(sleeps) == 2
+    assert api.quota.summary()['endpoints'][0]['statuses'] == {'error': 3}
@@ -0,0 +1,24 @@
+import pytest
+
+from src.utils.odds_math import (
+    DECIMAL_ODDS, IMPLIED_PROBABILITY, PAYOUT, TABLE_ODDS_MAX,
+    american_to_decimal, american_to_implied_probability, american_to_payout
+)
+
+PRICES = [-10000, -250, -110, -100, 100, 105, 400, 9999, TABLE_ODDS_MAX, TABLE_ODDS_MAX + 1, -TABLE_ODDS_MAX - 50, 25000]
+
+
+@pytest.mark.parametrize('table, conversion', [
+    (IMPLIED_PROBABILITY, american_to_implied_probability),
+    (DECIMAL_ODDS, american_to_decimal),
+    (PAYOUT, american_to_payout),
+])
+def test_tables_match_their_formula(table, conversion):
+    assert [table[odds] for odds in PRICES] == [conversion(odds) for odds in PRICES]
+    assert table[-110.0] == conversion(-110.0)
+
+
+def test_prices_outside_the_table_are_not_stored():
+    IMPLIED_PROBABILITY[TABLE_ODDS_MAX + 7]
+    assert TABLE_ODDS_MAX + 7 not in IMPLIED_PROBABILITY
+    assert IMPLIED_PROBABILITY[0] is None
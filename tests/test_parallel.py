@@ -0,0 +1,57 @@
+from itertools import groupby
+
+import src.data.parallel as parallel_module
+from src.data.arbitrage import ArbitrageAnalyzer
+from src.data.expected_value import ExpectedValueAnalyzer
+from src.data.parallel import ParallelPropAnalyzer
+from tests.stubs import prop_slate
+
+
+def game_chunks(lines):
+    return [list(rows) for _, rows in groupby(lines, key=lambda line: line.game_id)]
+
+
+def single_process(lines):
+    arbitrage = ArbitrageAnalyzer()
+    arbitrage.add_lines(lines)
+    ev_props = ExpectedValueAnalyzer()
+    ev_props.add_prop_lines(lines)
+    return arbitrage.analyze(), arbitrage.analyze_multiway(), ev_props.analyze_prop()
+
+
+def test_sharded_results_match_a_single_analyzer(monkeypatch):
+    monkeypatch.setattr(parallel_module, 'available_cpus', lambda: 2)
+    lines = prop_slate(games=6)
+    expected = single_process(lines)
+    assert expected[0] and expected[2]
+
+    analyzer = ParallelPropAnalyzer(workers=2, min_lines_per_worker=50)
+    for chunk in game_chunks(lines):
+        analyzer.add_lines(chunk)
+    assert len(analyzer.processes) == 2
+
+    assert analyzer.analyze() == expected
+    assert analyzer.processes == []
+
+
+def test_small_slates_stay_in_process(monkeypatch):
+    monkeypatch.setattr(parallel_module, 'available_cpus', lambda: 2)
+    lines = prop_slate(games=2)
+    analyzer = ParallelPropAnalyzer(workers=2, min_lines_per_worker=len(lines))
+    for chunk in game_chunks(lines):
+        analyzer.add_lines(chunk)
+
+    assert analyzer.processes == []
+    assert analyzer.analyze() == single_process(lines)
+
+
+def test_one_cpu_stays_in_process(monkeypatch):
+    monkeypatch.setattr(parallel_module, 'available_cpus', lambda: 1)
+    lines = prop_slate(games=6)
+    analyzer = ParallelPropAnalyzer(workers=4, min_lines_per_worker=50)
+    for chunk in game_chunks(lines):
+        analyzer.add_lines(chunk)
+
+    assert analyzer.workers == 1
+    assert analyzer.processes == []
+    assert analyzer.analyze() == single_process(lines)
@@ -0,0 +1,50 @@
+import json
+
+from src.data.odds_api import Odds_API
+from src.data.rows import PropBet
+from src.data.snapshot import IngestionSnapshot
+
+
+def props_payload(game_id):
+    return {'id': game_id, 'sport_key': 'basketball_nba', 'bookmakers': [
+        {'key': bookie, 'markets': [
+            {'key': 'player_points', 'last_update': '2025-03-14T00:06:03Z', 'outcomes': [
+                {'name': side, 'description': player, 'price': -110, 'point': 20.5}
+                for player in ('Player One', 'Player Two') for side in ('Over', 'Under')
+            ]},
+            {'key': 'player_first_basket', 'last_update': '2025-03-14T00:07:00Z', 'outcomes': [
+                {'name': 'Yes', 'description': 'Player Three', 'price': 650},
+            ]},
+        ]}
+        for bookie in ('draftkings', 'fanduel')
+    ]}
+
+
+def test_flatten_builds_interned_prop_bets():
+    api = Odds_API(link='http://127.0.0.1:9', api_key='test-key')
+    # Round trip through JSON so each row starts from its own string objects, like a parsed response
+    data = json.loads(json.dumps(props_payload('game-1')))
+    unique_player_props = {}
+
+    rows = api.flatten_event_props(data, unique_player_props)
+
+    assert len(rows) == 10
+    assert all(type(row) is PropBet for row in rows)
+    assert rows[0] == PropBet('game-1', '2025-03-14T00:06:03Z', 'draftkings', 'player_points', 'Over',
+                              'Player One', -110, 20.5, 'basketball_nba')
+    assert rows[4].betting_point == 'N/A'
+    assert rows[0].player_name is rows[5].player_name
+    assert rows[0].prop_type is rows[6].prop_type
+    assert list(unique_player_props) == [('Player One', 'game-1'), ('Player Two', 'game-1'), ('Player Three', 'game-1')]
+    assert unique_player_props[('Player Three', 'game-1')][3] == '2025-03-14T00:07:00Z'
+
+
+def test_prop_bets_filters_matches_streaming():
+    api = Odds_API(link='http://127.0.0.1:9', api_key='test-key')
+    payloads = [props_payload('game-1'), {'id': 'game-2', 'sport_key': 'basketball_nba', 'bookmakers': []}, props_payload('game-3')]
+
+    all_prop_bets, unique_player_props = api.prop_bets_filters(IngestionSnapshot(props=payloads))
+
+    streamed = {}
+    assert all_prop_bets == [row for payload in payloads for row in api.flatten_event_props(payload, streamed)]
+    assert unique_player_props == list(streamed.values())
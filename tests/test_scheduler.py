@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta, timezone
+
+from src.data.delta import OddsDeltaCache
+from src.data.incremental import IncrementalPropAnalyzer
+from src.data.odds_api import Odds_API
+from src.data.scheduler import PollingScheduler
+from src.data.snapshot import IngestionSnapshot
+
+NOW = datetime(2025, 3, 14, 12, 0, tzinfo=timezone.utc)
+
+
+def event_details(event_id, hours_to_start):
+    start = datetime.now(timezone.utc) + timedelta(hours=hours_to_start)
+    return (event_id, 'NBA', start.isoformat(), 'Home', 'Away')
+
+
+def props_payload(event_id, over_price=-110, under_price=-110):
+    outcomes = [
+        {'name': 'Over', 'description': 'Player One', 'price': over_price, 'point': 20.5},
+        {'name': 'Under', 'description': 'Player One', 'price': under_price, 'point': 20.5},
+    ]
+    return {'id': event_id, 'sport_key': 'basketball_nba', 'bookmakers': [
+        {'key': bookie, 'markets': [{'key': 'player_points', 'last_update': '2025-03-14T11:00:00Z', 'outcomes': outcomes}]}
+        for bookie in ('draftkings', 'fanduel')
+    ]}
+
+
+class StubOddsAPI(Odds_API):
+    """Serves props payloads from a dict instead of the network."""
+
+    def __init__(self, payloads):
+        super().__init__(link='http://127.0.0.1:9', api_key='test-key', max_workers=1)
+        self.payloads = payloads
+        self.fetched = []
+
+    def _fetch_event_props(self, event_id, sport_name, sport, markets_joined):
+        self.fetched.append(event_id)
+        return self.payloads.get(event_id)
+
+
+def make_scheduler(tmp_path, **kwargs):
+    return PollingScheduler(state_path=str(tmp_path / 'state.json.gz'), rows_dir=str(tmp_path / 'rows'), **kwargs)
+
+
+def test_state_keeps_timing_only(tmp_path):
+    scheduler = make_scheduler(tmp_path)
+    payload = props_payload('far')
+    scheduler.record(payload['id'], scheduler.latest_update(payload), NOW)
+    scheduler.state['old'] = {'last_fetched': NOW.isoformat(), 'payload': props_payload('old')}
+    scheduler.save()
+
+    reloaded = make_scheduler(tmp_path)
+    assert reloaded.state['far'] == {'last_fetched': NOW.isoformat(), 'last_update': '2025-03-14T11:00:00Z', 'moving': False}
+    assert reloaded.state['old'] == {'last_fetched': NOW.isoformat()}
+
+
+def test_skipped_events_replay_their_last_rows(tmp_path):
+    details = [event_details('near', 0.5), event_details('far', 100)]
+    api = StubOddsAPI({'near': props_payload('near'), 'far': props_payload('far')})
+    first_props, second_props = {}, {}
+
+    first = list(api.iter_prop_bets(details, first_props, scheduler=make_scheduler(tmp_path)))
+    second = list(api.iter_prop_bets(details, second_props, scheduler=make_scheduler(tmp_path)))
+
+    assert api.fetched == ['near', 'far', 'near']
+    assert second == first
+    assert second_props == first_props == {
+        ('Player One', game_id): ('Player One', game_id, 'basketball_nba', '2025-03-14T11:00:00Z') for game_id in ('near', 'far')
+    }
+
+
+def test_failed_fetch_replays_saved_rows(tmp_path):
+    details = [event_details('near', 0.5)]
+    api = StubOddsAPI({'near': props_payload('near')})
+    first = list(api.iter_prop_bets(details, scheduler=make_scheduler(tmp_path)))
+    api.payloads = {}
+
+    assert list(api.iter_prop_bets(details, scheduler=make_scheduler(tmp_path))) == first
+    assert api.fetched == ['near', 'near']
+
+
+def test_events_without_saved_rows_are_due(tmp_path):
+    details = [event_details('far', 100)]
+    api = StubOddsAPI({'far': props_payload('far')})
+    list(api.iter_prop_bets(details, scheduler=make_scheduler(tmp_path)))
+    for saved in (tmp_path / 'rows').iterdir():
+        saved.unlink()
+
+    assert len(list(api.iter_prop_bets(details, scheduler=make_scheduler(tmp_path)))) == 1
+    assert api.fetched == ['far', 'far']
+
+
+def test_read_only_scheduler_does_not_mark_events_fetched(tmp_path):
+    details = [event_details('near', 0.5), event_details('far', 100)]
+    api = StubOddsAPI({'near': props_payload('near'), 'far': props_payload('far')})
+    list(api.iter_prop_bets([details[0]], scheduler=make_scheduler(tmp_path)))
+
+    job_rows = list(api.iter_prop_bets(details, scheduler=make_scheduler(tmp_path, read_only=True)))
+    assert [rows[0].game_id for rows in job_rows] == ['near', 'far']
+    list(api.iter_prop_bets(details, scheduler=make_scheduler(tmp_path)))
+
+    # 'far' was fetched by the job but is still due for the main ingestion
+    assert api.fetched == ['near', 'near', 'far', 'near', 'far']
+    assert sorted(path.name for path in (tmp_path / 'rows').iterdir()) == ['far.json.gz', 'near.json.gz']
+
+
+def test_pruned_events_lose_their_saved_rows(tmp_path):
+    api = StubOddsAPI({'near': props_payload('near'), 'far': props_payload('far')})
+    list(api.iter_prop_bets([event_details('near', 0.5), event_details('far', 100)], scheduler=make_scheduler(tmp_path)))
+    list(api.iter_prop_bets([event_details('near', 0.5)], scheduler=make_scheduler(tmp_path)))
+
+    assert [path.name for path in (tmp_path / 'rows').iterdir()] == ['near.json.gz']
+    assert set(make_scheduler(tmp_path).state) == {'near'}
+
+
+def test_snapshot_carries_saved_rows_of_skipped_events(tmp_path):
+    api = StubOddsAPI({'far': props_payload('far')})
+    scheduler = make_scheduler(tmp_path)
+    rows = api.flatten_event_props(props_payload('far'), {})
+    scheduler.record('far', '2025-03-14T11:00:00Z')
+    scheduler.store_rows('far', rows)
+
+    snapshot = IngestionSnapshot(saved_prop_rows=make_scheduler(tmp_path).load_rows('far'))
+    all_prop_bets, unique_player_props = api.prop_bets_filters(snapshot)
+    assert all_prop_bets == rows
+    assert unique_player_props == [('Player One', 'far', 'basketball_nba', '2025-03-14T11:00:00Z')]
+
+
+def test_replayed_games_keep_prices_and_results(tmp_path):
+    delta = OddsDeltaCache(cache_path=str(tmp_path / 'delta.json.gz'))
+    incremental = IncrementalPropAnalyzer(state_path=str(tmp_path / 'incremental.json.gz'), engine='python')
+    details = [event_details('near', 0.5), event_details('far', 100)]
+    api = StubOddsAPI({'near': props_payload('near'), 'far': props_payload('far', 120, 120)})
+
+    def run():
+        delta.begin('props')
+        incremental.begin(delta.generation)
+        changed = []
+        for rows in api.iter_prop_bets(details, scheduler=make_scheduler(tmp_path)):
+            changed_rows = delta.check('props', rows)
+            changed += changed_rows
+            incremental.feed(rows, changed_rows)
+        incremental.remove(delta.finish('props'))
+        upserts, deleted_keys = incremental.analyze()['arbitrage']
+        delta.save()
+        incremental.save(delta.generation)
+        return changed, upserts, deleted_keys
+
+    # An arbitrage in 'far' (+120 / +120) is found on the first fetch
+    changed, upserts, _ = run()
+    assert len(changed) == 8
+    assert [row[0] for row in upserts] == ['far']
+
+    # Skipped: its rows are replayed, so nothing goes to history and its arbitrage stays
+    changed, upserts, deleted_keys = run()
+    assert api.fetched == ['near', 'far', 'near']
+    assert changed == []
+    assert upserts == []
+    assert deleted_keys == []